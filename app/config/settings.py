@@ -1,6 +1,8 @@
 import os
 from dataclasses import dataclass
 
+from app.utils.env import env_truthy
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -26,6 +28,89 @@ class Settings:
     # App
     output_fps: int = int(os.getenv("OUTPUT_FPS", "30"))
     signed_url_expire_seconds: int = int(os.getenv("SIGNED_URL_EXPIRE_SECONDS", "86400"))
+    # 物語生成時のシーン並列処理の上限（LLM/画像/TTS 呼び出しの同時実行数）
+    story_max_workers: int = int(os.getenv("STORY_MAX_WORKERS", "4"))
+    # シーン完成ごとに動画セグメントをエンコードする（生成とエンコードを重ねる）
+    streaming_compose: bool = env_truthy("STREAMING_COMPOSE", "0")
+    # 複数シーンの動画を1回の ffmpeg 実行（filter_complex）で直接レンダーする（0 でシーンごとにエンコードして連結）
+    single_pass_render: bool = env_truthy("SINGLE_PASS_RENDER", "1")
+    # セグメント方式でのエンコード並列数（0 は利用可能な CPU 数）
+    segment_encode_workers: int = int(os.getenv("SEGMENT_ENCODE_WORKERS", "0"))
+    # 動画の出力プロファイル: preview（下書き用・小さく低 fps）/ native（画像の解像度のまま）/ 1080p / vertical（1080x1920）
+    render_profile: str = os.getenv("RENDER_PROFILE", "1080p")
+    # 静止画向けのエンコード設定（低 fps・-tune stillimage・長い GOP・CRF）。0 で OUTPUT_FPS/2000kbps の従来設定
+    still_image_encode: bool = env_truthy("STILL_IMAGE_ENCODE", "1")
+    still_image_fps: int = int(os.getenv("STILL_IMAGE_FPS", "5"))
+    still_image_gop_sec: float = float(os.getenv("STILL_IMAGE_GOP_SEC", "10"))
+    still_image_preset: str = os.getenv("STILL_IMAGE_PRESET", "fast")
+    still_image_crf: int = int(os.getenv("STILL_IMAGE_CRF", "20"))
+    # 画像プロンプト等を全シーン分まとめて1回の LLM 呼び出しで生成する
+    llm_batch: bool = env_truthy("LLM_BATCH", "0")
+    # シーン分割とスタイルヒント決定を1回の LLM 呼び出しにまとめる
+    fused_planning: bool = env_truthy("FUSED_PLANNING", "0")
+    # シーン画像の一貫性の取り方: rolling（直近5シーンの画像を参照、逐次）/ anchor（先頭で作る参照画像1枚のみを参照、全シーン並列）
+    consistency_mode: str = os.getenv("CONSISTENCY_MODE", "rolling")
+    # ジョブの途中経過を outputs_root()/<job_id>/manifest.json に記録し、resume_story で再開可能にする
+    job_checkpoint: bool = env_truthy("JOB_CHECKPOINT", "0")
+    # 参照画像の正規化（長辺の上限・不要なアルファの除去・形式。auto は透過なしなら JPEG、ありなら PNG）
+    ref_image_normalize: bool = env_truthy("REF_IMAGE_NORMALIZE", "1")
+    ref_image_max_edge: int = int(os.getenv("REF_IMAGE_MAX_EDGE", "1024"))
+    ref_image_format: str = os.getenv("REF_IMAGE_FORMAT", "auto")
+    ref_image_quality: int = int(os.getenv("REF_IMAGE_QUALITY", "85"))
+    # URL 指定の参照画像の取得（並列数・タイムアウト・サイズ上限・ETag/Last-Modified 対応のディスクキャッシュ）
+    ref_http_max_concurrency: int = int(os.getenv("REF_HTTP_MAX_CONCURRENCY", "8"))
+    ref_http_timeout_sec: float = float(os.getenv("REF_HTTP_TIMEOUT_SEC", "5"))
+    ref_http_max_bytes: int = int(float(os.getenv("REF_HTTP_MAX_MB", "20")) * 1024 * 1024)
+    ref_http_cache_enabled: bool = env_truthy("REF_HTTP_CACHE", "1")
+    ref_http_cache_max_mb: int = int(os.getenv("REF_HTTP_CACHE_MAX_MB", "256"))
+    # 参照画像の base64 data URL をコンテンツハッシュで使い回すキャッシュの上限（MB、プロセス内）
+    data_url_cache_mb: int = int(os.getenv("DATA_URL_CACHE_MB", "64"))
+    # 計画フェーズ（参照画像の取得・シーン分割・スタイル決定を並行実行）全体の締め切り（秒）
+    planning_timeout_sec: float = float(os.getenv("PLANNING_TIMEOUT_SEC", "120"))
+
+    # 画像生成結果のディスクキャッシュ（CACHE_DIR 配下、既定は無効）
+    image_cache_enabled: bool = env_truthy("IMAGE_CACHE", "0")
+    image_cache_max_mb: int = int(os.getenv("IMAGE_CACHE_MAX_MB", "512"))
+    # TTS 音声（話速調整後）のディスクキャッシュ（既定は無効）
+    tts_cache_enabled: bool = env_truthy("TTS_CACHE", "0")
+    tts_cache_max_mb: int = int(os.getenv("TTS_CACHE_MAX_MB", "256"))
+    # LLM ヘルパー応答のメモ化（プロセス内 LRU + ディスク。LLM_CACHE=0 で無効）
+    llm_cache_enabled: bool = env_truthy("LLM_CACHE", "1")
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+    llm_cache_max_mb: int = int(os.getenv("LLM_CACHE_MAX_MB", "64"))
+    # プロバイダ API 用 HTTP コネクションプール（app/services/clients.py で共有）
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+    http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "16"))
+    http_keepalive_expiry_sec: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SEC", "60"))
+    http_timeout_sec: float = float(os.getenv("HTTP_TIMEOUT_SEC", "180"))
+    http_connect_timeout_sec: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SEC", "10"))
+    # h2 パッケージがあれば HTTP/2 を使う
+    http2_enabled: bool = env_truthy("HTTP2", "1")
+    # プロバイダ呼び出しのリトライ（app/utils/resilience.py。指数バックオフ + ジッター）
+    retry_max_attempts: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+    retry_base_delay_sec: float = float(os.getenv("RETRY_BASE_DELAY_SEC", "0.5"))
+    retry_max_delay_sec: float = float(os.getenv("RETRY_MAX_DELAY_SEC", "20"))
+    # Retry-After ヘッダに従って待つ秒数の上限
+    retry_after_max_sec: float = float(os.getenv("RETRY_AFTER_MAX_SEC", "60"))
+    # 一過性の失敗がこの回数連続したら、CIRCUIT_RESET_SEC 秒はそのプロバイダを呼ばずに失敗させる
+    circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    circuit_reset_sec: float = float(os.getenv("CIRCUIT_RESET_SEC", "30"))
+    # プロバイダ/モデル単位の rpm/tpm 予算（JSON。app/utils/rate_limit.py。未設定なら無制限）
+    rate_limits: str = os.getenv("RATE_LIMITS", "")
+    # 画像/TTS の同時実行数を AIMD で自動調整（app/utils/adaptive.py。プロセス全体で共有）
+    adaptive_concurrency: bool = env_truthy("ADAPTIVE_CONCURRENCY", "1")
+    adaptive_initial_limit: int = int(os.getenv("ADAPTIVE_INITIAL_LIMIT", "4"))
+    adaptive_min_limit: int = int(os.getenv("ADAPTIVE_MIN_LIMIT", "1"))
+    adaptive_max_limit: int = int(os.getenv("ADAPTIVE_MAX_LIMIT", "16"))
+    # 応答時間が最小観測値のこの倍率以内なら「健全」とみなして上限を増やす
+    adaptive_latency_tolerance: float = float(os.getenv("ADAPTIVE_LATENCY_TOLERANCE", "2.0"))
+    # 画像生成のヘッジ（app/utils/hedging.py）。直近の応答時間のパーセンタイルを超えたら同じリクエストを追加で送る
+    image_hedging: bool = env_truthy("IMAGE_HEDGING", "0")
+    hedge_percentile: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    hedge_min_samples: int = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))
+    # 1呼び出しあたりの追加リクエスト数と、全呼び出し数に対する追加リクエスト累計の上限比率（コスト抑制）
+    hedge_max_extra: int = int(os.getenv("HEDGE_MAX_EXTRA", "1"))
+    hedge_budget_ratio: float = float(os.getenv("HEDGE_BUDGET_RATIO", "0.1"))
 
     # OpenRouter（画像生成用）
     # AAP系と通常の環境変数の両方に対応
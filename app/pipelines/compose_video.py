@@ -2,15 +2,25 @@ from __future__ import annotations
 from app.utils.log import log
 from app.utils.env import env_truthy, outputs_root
 from app.config.settings import get_settings
+from app.utils.audio_duration import audio_duration_sec
+from app.utils.ffmpeg_async import probe_async, run_ffmpeg_async
 
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Dict, Any, cast
+from dataclasses import dataclass, replace
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Literal, cast
+import asyncio
+import itertools
 import tempfile
+import threading
 import os
+import sys
 import time
+import uuid
 
 import ffmpeg as _ffmpeg  # type: ignore
+from PIL import Image
 ffmpeg: Any = _ffmpeg
 
 
@@ -19,15 +29,40 @@ def _final_dir() -> Path:
     return outputs_root() / "final"
 
 
+def _audio_duration_sec(audio: bytes, path: str) -> float | None:
+    """音声の長さ（秒）。メモリ上のバイト列をヘッダ解析し、解析できない場合のみ ffprobe を使う。"""
+    dur = audio_duration_sec(audio)
+    return dur if dur is not None else _probe_audio_duration_sec(path)
+
+
+async def _audio_duration_sec_async(audio: bytes, path: str) -> float | None:
+    """`_audio_duration_sec` の非同期版。"""
+    dur = audio_duration_sec(audio)
+    return dur if dur is not None else await _probe_audio_duration_sec_async(path)
+
+
 def _probe_audio_duration_sec(path: str) -> float | None:
     """ffprobe を用いて音声の長さ（秒）を取得します。取得できなければ None。"""
     try:
-        info: Dict[str, Any] = cast(Dict[str, Any], ffmpeg.probe(path))
+        info: dict[str, Any] = cast(dict[str, Any], ffmpeg.probe(path))
     except ffmpeg.Error:
         return None
+    return _duration_from_probe(info)
+
 
+async def _probe_audio_duration_sec_async(path: str) -> float | None:
+    """`_probe_audio_duration_sec` の非同期版。"""
+    try:
+        info = await probe_async(path)
+    except (ffmpeg.Error, OSError, ValueError):
+        return None
+    return _duration_from_probe(info)
+
+
+def _duration_from_probe(info: dict[str, Any]) -> float | None:
+    """ffprobe の結果から再生時間（秒）を取り出す。"""
     # format > duration が最も信頼できる
-    fmt: Dict[str, Any] = cast(Dict[str, Any], info.get("format") or {})
+    fmt: dict[str, Any] = cast(dict[str, Any], info.get("format") or {})
     dur = fmt.get("duration")
     if isinstance(dur, str):
         try:
@@ -36,7 +71,7 @@ def _probe_audio_duration_sec(path: str) -> float | None:
             pass
 
     # stream 側の duration をフォールバックで探す
-    for st in cast(list[Dict[str, Any]], info.get("streams", []) or []):
+    for st in cast(list[dict[str, Any]], info.get("streams", []) or []):
         if st.get("codec_type") == "audio":
             sd = st.get("duration")
             if isinstance(sd, str):
@@ -58,109 +93,453 @@ class SceneMedia:
     """
     image: list[bytes]
     audio: list[bytes]
+    # 日本語コメント: 出力プロファイル（未指定時は設定値 RENDER_PROFILE）
+    profile: RenderProfile | str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RenderProfile:
+    """
+    動画の出力設定（解像度・フレームレート・ビットレート）。
 
+    Params:
+        name: プロファイル名
+        width / height: 出力解像度。None の場合は画像の実サイズに合わせる
+        max_edge: 画像サイズに合わせる場合の長辺の上限（None は上限なし）
+        fps: フレームレート（None は STILL_IMAGE_FPS、静止画プロファイル無効時は OUTPUT_FPS）
+        video_bitrate: 映像ビットレート（例: "2000k"。None は CRF、静止画プロファイル無効時は 2000k）
+        preset: x264 プリセット（None は STILL_IMAGE_PRESET）
+        crf: 画質（None は STILL_IMAGE_CRF）
+    """
+    name: str
+    width: int | None = None
+    height: int | None = None
+    max_edge: int | None = None
+    fps: int | None = None
+    video_bitrate: str | None = None
+    preset: str | None = None
+    crf: int | None = None
+
+
+RenderProfileLiteral = Literal["preview", "native", "1080p", "vertical"]
+
+# 日本語コメント: preview は下書き確認用（小さく・低 fps・最速プリセット）、native は画像の解像度のまま拡大しない
+RENDER_PROFILES: dict[str, RenderProfile] = {
+    "preview": RenderProfile("preview", max_edge=640, fps=2, preset="ultrafast", crf=30),
+    "native": RenderProfile("native"),
+    "1080p": RenderProfile("1080p", width=1920, height=1080),
+    "vertical": RenderProfile("vertical", width=1080, height=1920),
+}
+
+
+def render_profile(
+    profile: RenderProfile | str | None = None,
+    *,
+    fps: int | None = None,
+    video_bitrate: str | None = None,
+) -> RenderProfile:
+    """
+    プロファイル名（未指定時は RENDER_PROFILE）から出力設定を取得し、fps / ビットレートを上書きする。
 
-def _compose_single_scene_video(image: bytes, audio: bytes) -> Dict[str, str]:
+    Params:
+        profile: プロファイル名（"preview" / "native" / "1080p" / "vertical"）または RenderProfile
+        fps: 上書きするフレームレート（None は上書きしない）
+        video_bitrate: 上書きする映像ビットレート（例: "4000k"。None は上書きしない）
+    Returns:
+        RenderProfile（未知の名前は ValueError）
+    """
+    if isinstance(profile, RenderProfile):
+        base = profile
+    else:
+        name = profile or get_settings().render_profile
+        if name not in RENDER_PROFILES:
+            raise ValueError(f"unknown render profile: {name!r} (choose from {', '.join(RENDER_PROFILES)})")
+        base = RENDER_PROFILES[name]
+    if fps:
+        base = replace(base, fps=int(fps))
+    if video_bitrate:
+        base = replace(base, video_bitrate=video_bitrate)
+    return base
+
+
+def _resolve_frame(profile: RenderProfile, image: bytes) -> RenderProfile:
+    """画像サイズに合わせるプロファイルの解像度を確定する（yuv420p のため偶数に丸める）。"""
+    if profile.width and profile.height:
+        return profile
+    try:
+        with Image.open(BytesIO(image)) as img:
+            w, h = img.size
+    except Exception:
+        w, h = 1920, 1080
+    if profile.max_edge and max(w, h) > profile.max_edge:
+        scale = profile.max_edge / max(w, h)
+        w, h = round(w * scale), round(h * scale)
+    return replace(profile, width=max(2, w - w % 2), height=max(2, h - h % 2))
+
+
+def _media_profile(media: SceneMedia) -> RenderProfile:
+    profile = render_profile(media.profile)
+    return _resolve_frame(profile, media.image[0]) if media.image else profile
+
+
+def _compose_single_scene_video(
+    image: bytes, audio: bytes, profile: RenderProfile | None = None, threads: int = 0
+) -> dict[str, str]:
     """
     静止画1枚とナレーション音声1本から MP4 を1本合成する。
 
     - 画像は `-loop 1`（静止画を動画化）
-    - 音声の実長を ffprobe で取得し、出力 `-t` に指定して画像と長さを完全一致
-    - 解像度は 1920x1080 にフィット（scale + pad、アスペクト維持）
+    - 音声の実長をヘッダ解析（失敗時は ffprobe）で取得し、出力 `-t` に指定して画像と長さを完全一致
+    - 解像度はプロファイル（未指定時は RENDER_PROFILE）にフィット（scale + pad、アスペクト維持）
     - H.264 + AAC、`+faststart` でストリーミング再生向け最適化
+    - threads > 0 は並列エンコード用。ffmpeg のスレッド数を抑え、ログは失敗時のみ標準エラーへ出す
     Returns:
         出力動画情報の辞書（video_path, video_url など）
     """
-    s = get_settings()
-    out_dir = _final_dir()
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    out_path = out_dir / f"scene_{int(time.time())}.mp4"
+    out_path = _new_output_path("scene")
+    profile = _resolve_frame(profile or render_profile(), image)
 
     created_temp_paths: list[str] = []
     try:
-        # image を一時ファイル化
-        img_tmp = tempfile.NamedTemporaryFile(prefix="img_", suffix=".png", delete=False)
-        img_tmp.write(image)
-        img_tmp.flush()
-        img_tmp.close()
-        image_path = img_tmp.name
+        # image / audio を一時ファイル化
+        image_path = _write_temp(image, prefix="img_", suffix=".png")
         created_temp_paths.append(image_path)
-
-        # audio を一時ファイル化
-        aud_tmp = tempfile.NamedTemporaryFile(prefix="aud_", suffix=".mp3", delete=False)
-        aud_tmp.write(audio)
-        aud_tmp.flush()
-        aud_tmp.close()
-        audio_path = aud_tmp.name
+        audio_path = _write_temp(audio, prefix="aud_", suffix=".mp3")
         created_temp_paths.append(audio_path)
 
         # 音声の実再生時間
-        audio_dur = _probe_audio_duration_sec(audio_path)
-
-        # 入力（画像）
-        v_in: Any = (
-            ffmpeg
-            .input(image_path, loop=1, framerate=s.output_fps)
-            .filter("scale", "1920", "1080", force_original_aspect_ratio="decrease")
-            .filter("pad", "1920", "1080", "(ow-iw)/2", "(oh-ih)/2", color="black")
-            .filter("setsar", "1")
-        )
+        audio_dur = _audio_duration_sec(audio, audio_path)
+
+        stream = _single_scene_stream(image_path, audio_path, out_path, audio_dur, profile, threads)
+        if threads > 0:
+            # 日本語コメント: 並列実行時は ffmpeg の出力が混ざるため捕捉し、失敗時だけ表示する
+            try:
+                stream.run(quiet=True)
+            except ffmpeg.Error as e:
+                _report_ffmpeg_error(e)
+                raise
+        else:
+            stream.run(quiet=False)  # デバッグ時は False に
+
+        if env_truthy("PYTEST", "0"):
+            log("[_compose_single_scene_video] audio_dur=", audio_dur)
+            log("[_compose_single_scene_video] video_path=", str(out_path))
+        return _video_result(out_path)
+    finally:
+        _remove_paths(created_temp_paths)
+
+
+async def _compose_single_scene_video_async(
+    image: bytes, audio: bytes, profile: RenderProfile | None = None, threads: int = 0
+) -> dict[str, str]:
+    """
+    `_compose_single_scene_video` の非同期版（asyncio サブプロセスで ffmpeg を実行）。
+
+    ffmpeg の出力は常に捕捉されるため、失敗時のみ標準エラーへ出す。
+    """
+    out_path = _new_output_path("scene")
+    profile = _resolve_frame(profile or render_profile(), image)
+
+    created_temp_paths: list[str] = []
+    try:
+        image_path = _write_temp(image, prefix="img_", suffix=".png")
+        created_temp_paths.append(image_path)
+        audio_path = _write_temp(audio, prefix="aud_", suffix=".mp3")
+        created_temp_paths.append(audio_path)
+
+        audio_dur = await _audio_duration_sec_async(audio, audio_path)
+        try:
+            await run_ffmpeg_async(
+                _single_scene_stream(image_path, audio_path, out_path, audio_dur, profile, threads)
+            )
+        except ffmpeg.Error as e:
+            _report_ffmpeg_error(e)
+            raise
+
+        if env_truthy("PYTEST", "0"):
+            log("[_compose_single_scene_video_async] audio_dur=", audio_dur)
+            log("[_compose_single_scene_video_async] video_path=", str(out_path))
+        return _video_result(out_path)
+    finally:
+        _remove_paths(created_temp_paths)
+
+
+def _single_scene_stream(
+    image_path: str,
+    audio_path: str,
+    out_path: Path,
+    audio_dur: float | None,
+    profile: RenderProfile,
+    threads: int = 0,
+) -> Any:
+    """
+    静止画 + 音声から単一シーン MP4 を出力する ffmpeg ストリームを組み立てる（解像度は確定済みであること）。
+
+    threads > 0 のときはエンコードのスレッド数を指定する（0 は ffmpeg の既定＝全コア）。
+    """
+    # 入力（画像）
+    v_in: Any = _fitted_image_input(image_path, profile)
+
+    # 入力（音声）
+    a_in: Any = ffmpeg.input(audio_path)
+
+    out_kwargs = _encode_kwargs(profile)
+
+    if audio_dur is not None and audio_dur > 0:
+        out_kwargs["t"] = f"{audio_dur:.3f}"
+    else:
+        out_kwargs["shortest"] = True
+    if threads > 0:
+        out_kwargs["threads"] = threads
 
-        # 入力（音声）
-        a_in: Any = ffmpeg.input(audio_path)
-
-        out_kwargs: Dict[str, object] = dict(
-            vcodec="libx264",
-            acodec="aac",
-            audio_bitrate="192k",
-            ar="48000",
-            ac="2",
-            pix_fmt="yuv420p",
-            r=s.output_fps,
-            movflags="+faststart",
-            video_bitrate="2000k",
+    return ffmpeg.output(v_in, a_in, str(out_path), **out_kwargs).overwrite_output()
+
+
+def _fitted_image_input(image_path: str, profile: RenderProfile, **input_kwargs: object) -> Any:
+    """静止画をループ入力し、プロファイルの解像度にフィット（scale + pad、アスペクト維持）した映像ストリーム。"""
+    w, h = str(profile.width or 1920), str(profile.height or 1080)
+    return (
+        ffmpeg
+        .input(image_path, loop=1, framerate=_render_fps(profile), **input_kwargs)
+        .filter("scale", w, h, force_original_aspect_ratio="decrease")
+        .filter("pad", w, h, "(ow-iw)/2", "(oh-ih)/2", color="black")
+        .filter("setsar", "1")
+    )
+
+
+def _render_fps(profile: RenderProfile) -> int:
+    """出力フレームレート（プロファイル指定 > STILL_IMAGE_FPS > OUTPUT_FPS）。"""
+    if profile.fps:
+        return profile.fps
+    s = get_settings()
+    return s.still_image_fps if s.still_image_encode else s.output_fps
+
+
+def _encode_kwargs(profile: RenderProfile) -> dict[str, object]:
+    """
+    H.264 + AAC の出力オプション（セグメント/一括レンダーで共通）。
+
+    静止画プロファイル（STILL_IMAGE_ENCODE=1）では、同じ1枚が音声の長さだけ続く前提で
+    低フレームレート・`-tune stillimage`・長い GOP（シーンカット検出なし）・CRF で符号化する。
+    出力パラメータは全セグメントで同一のため concat demuxer でそのまま連結できる。
+    プロファイルの fps / ビットレート / プリセット / CRF が指定されていればそちらを優先する。
+    """
+    s = get_settings()
+    fps = _render_fps(profile)
+    kwargs: dict[str, object] = {
+        "vcodec": "libx264",
+        "acodec": "aac",
+        "audio_bitrate": "192k",
+        "ar": "48000",
+        "ac": "2",
+        "pix_fmt": "yuv420p",
+        "r": fps,
+        "movflags": "+faststart",
+    }
+    if not s.still_image_encode:
+        kwargs["video_bitrate"] = profile.video_bitrate or "2000k"
+        if profile.preset:
+            kwargs["preset"] = profile.preset
+        return kwargs
+    gop = max(1, round(fps * s.still_image_gop_sec))
+    kwargs.update(
+        preset=profile.preset or s.still_image_preset,
+        tune="stillimage",
+        g=gop,
+        keyint_min=gop,
+        sc_threshold=0,
+    )
+    if profile.video_bitrate:
+        kwargs["video_bitrate"] = profile.video_bitrate
+    else:
+        kwargs["crf"] = profile.crf if profile.crf is not None else s.still_image_crf
+    return kwargs
+
+
+def _single_pass_stream(
+    image_paths: list[str],
+    audio_paths: list[str],
+    durations: list[float],
+    out_path: Path,
+    profile: RenderProfile,
+) -> Any:
+    """
+    全シーンを1回の ffmpeg 実行で MP4 にする filter_complex を組み立てる。
+
+    - 各画像は `-loop 1 -t <音声長>` で入力し、プロファイルの解像度にフィット
+    - 各音声は 48kHz/ステレオに揃え、無音で伸ばしてから音声長で切り詰める（映像と長さを完全一致）
+    - concat フィルタでシーン順に [映像, 音声] を連結し、そのままエンコードする
+    """
+    segments: list[Any] = []
+    for image_path, audio_path, dur in zip(image_paths, audio_paths, durations):
+        segments.append(_fitted_image_input(image_path, profile, t=f"{dur:.3f}"))
+        segments.append(
+            ffmpeg.input(audio_path).audio
+            .filter("aformat", sample_rates="48000", channel_layouts="stereo")
+            .filter("apad")
+            .filter("atrim", duration=f"{dur:.3f}")
+            .filter("asetpts", "N/SR/TB")
         )
+    joined = ffmpeg.concat(*segments, v=1, a=1).node
+    return ffmpeg.output(joined[0], joined[1], str(out_path), **_encode_kwargs(profile)).overwrite_output()
 
-        if audio_dur is not None and audio_dur > 0:
-            out_kwargs["t"] = f"{audio_dur:.3f}"
-        else:
-            out_kwargs["shortest"] = True
 
-        (
-            ffmpeg
-            .output(v_in, a_in, str(out_path), **out_kwargs)
-            .overwrite_output()
-            .run(quiet=False)  # デバッグ時は False に
+def segment_encode_workers(count: int) -> int:
+    """
+    セグメントを並列エンコードする際のワーカー数。
+
+    SEGMENT_ENCODE_WORKERS（0 は利用可能な CPU 数の半分）を、セグメント数で頭打ちにした値。
+    libx264 は1本でも複数コアを使うため、既定では CPU 数より少ない本数に抑える。
+    """
+    configured = get_settings().segment_encode_workers
+    workers = configured if configured > 0 else _available_cpus() // 2
+    return max(1, min(workers, count))
+
+
+def segment_encode_threads(workers: int) -> int:
+    """
+    並列エンコード時に ffmpeg 1本あたりへ割り当てるスレッド数（0 は ffmpeg の既定）。
+
+    ワーカー数 × スレッド数が利用可能な CPU 数を超えないよう、CPU を均等に割り振る。
+    """
+    if workers <= 1:
+        return 0
+    return max(1, _available_cpus() // workers)
+
+
+def _report_ffmpeg_error(e: Any) -> None:
+    """捕捉していた ffmpeg の標準エラー出力を表示する（並列エンコードの失敗時用）。"""
+    stderr = getattr(e, "stderr", None)
+    if stderr:
+        sys.stderr.write(stderr.decode("utf-8", errors="replace"))
+        sys.stderr.flush()
+
+
+def _available_cpus() -> int:
+    # 日本語コメント: コンテナの CPU 割り当て（affinity）を優先し、取れなければ論理 CPU 数
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _single_pass_enabled(count: int) -> bool:
+    return count > 1 and get_settings().single_pass_render
+
+
+def _compose_single_pass(
+    images: list[bytes], audios: list[bytes], profile: RenderProfile
+) -> dict[str, str]:
+    """
+    全シーンの画像・音声から中間ファイルなしで最終 MP4 を1回のエンコードで作る。
+
+    音声長が取得できないシーンがある場合は ValueError（呼び出し側でセグメント方式へ切り替える）。
+    """
+    out_path = _new_output_path("story")
+    created_temp_paths: list[str] = []
+    try:
+        image_paths, audio_paths = _write_scene_temps(images, audios, created_temp_paths)
+        durations = [_audio_duration_sec(a, p) for a, p in zip(audios, audio_paths)]
+        _single_pass_stream(
+            image_paths, audio_paths, _require_durations(durations), out_path, profile
+        ).run(quiet=False)
+
+        if env_truthy("PYTEST", "0"):
+            log("[_compose_single_pass] durations=", durations)
+            log("[_compose_single_pass] video_path=", str(out_path))
+        return _video_result(out_path)
+    finally:
+        _remove_paths(created_temp_paths)
+
+
+async def _compose_single_pass_async(
+    images: list[bytes], audios: list[bytes], profile: RenderProfile
+) -> dict[str, str]:
+    """`_compose_single_pass` の非同期版。"""
+    out_path = _new_output_path("story")
+    created_temp_paths: list[str] = []
+    try:
+        image_paths, audio_paths = _write_scene_temps(images, audios, created_temp_paths)
+        durations = list(
+            await asyncio.gather(*(_audio_duration_sec_async(a, p) for a, p in zip(audios, audio_paths)))
+        )
+        await run_ffmpeg_async(
+            _single_pass_stream(image_paths, audio_paths, _require_durations(durations), out_path, profile)
         )
 
         if env_truthy("PYTEST", "0"):
-            url = out_path.resolve().as_uri()
-            log("[_compose_single_scene_video] audio_dur=", audio_dur)
-            log("[_compose_single_scene_video] video_path=", str(out_path))
-            return {
-                "video_gcs": "",
-                "video_url": url,
-                "video_path": str(out_path),
-            }
-        else:
-            return {
-                "video_gcs": "",
-                "video_url": str(out_path),
-                "video_path": str(out_path),
-            }
+            log("[_compose_single_pass_async] durations=", durations)
+            log("[_compose_single_pass_async] video_path=", str(out_path))
+        return _video_result(out_path)
     finally:
-        for p in created_temp_paths:
-            try:
-                os.remove(p)
-            except Exception:
-                pass
+        _remove_paths(created_temp_paths)
+
+
+def _write_scene_temps(
+    images: list[bytes], audios: list[bytes], created: list[str]
+) -> tuple[list[str], list[str]]:
+    """シーンごとの画像/音声を一時ファイル化する（作成したパスは `created` に追記）。"""
+    image_paths: list[str] = []
+    audio_paths: list[str] = []
+    for img, aud in zip(images, audios):
+        image_paths.append(_write_temp(img, prefix="img_", suffix=".png"))
+        created.append(image_paths[-1])
+        audio_paths.append(_write_temp(aud, prefix="aud_", suffix=".mp3"))
+        created.append(audio_paths[-1])
+    return image_paths, audio_paths
+
+
+def _require_durations(durations: list[float | None]) -> list[float]:
+    if any(d is None or d <= 0 for d in durations):
+        raise ValueError(f"audio duration unavailable: {durations}")
+    return [cast(float, d) for d in durations]
+
+
+def _new_output_path(prefix: str) -> Path:
+    """最終出力ディレクトリ配下に一意な MP4 パスを作る。"""
+    out_dir = _final_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # 日本語コメント: 並行エンコード時の衝突を避けるため一意なサフィックスを付与
+    return out_dir / f"{prefix}_{int(time.time())}_{uuid.uuid4().hex[:8]}.mp4"
+
+
+def _write_temp(data: bytes, prefix: str, suffix: str) -> str:
+    """バイト列を一時ファイルへ書き出してパスを返す（削除は呼び出し側）。"""
+    with tempfile.NamedTemporaryFile(prefix=prefix, suffix=suffix, delete=False) as tmp:
+        tmp.write(data)
+    return tmp.name
 
 
-def compose_scene_video(media: SceneMedia) -> Dict[str, str]:
+def _remove_paths(paths: list[str]) -> None:
+    for p in paths:
+        try:
+            os.remove(p)
+        except Exception:
+            pass
+
+
+def _video_result(out_path: Path) -> dict[str, str]:
+    """出力動画情報の辞書を返す。テスト時は file:// URL を返す。"""
+    if env_truthy("PYTEST", "0"):
+        url = out_path.resolve().as_uri()
+        return {
+            "video_gcs": "",
+            "video_url": url,
+            "video_path": str(out_path),
+        }
+    return {
+        "video_gcs": "",
+        "video_url": str(out_path),
+        "video_path": str(out_path),
+    }
+
+
+def compose_scene_video(media: SceneMedia) -> dict[str, str]:
     """
-    複数の画像・音声の組を受け取り、各ペアから単一シーン動画を作成した後、
-    それらを1本のMP4に連結して返す。
+    複数の画像・音声の組を受け取り、1本のMP4にして返す。
+
+    - 既定（SINGLE_PASS_RENDER=1）は全シーンを filter_complex で一括エンコード（中間ファイルなし）
+    - 無効時や一括レンダーに失敗した場合は、各ペアから単一シーン動画を作成した後に連結する
 
     Params:
         media: `image` と `audio` に各バイト列のリストを格納したデータクラス
@@ -168,14 +547,34 @@ def compose_scene_video(media: SceneMedia) -> Dict[str, str]:
     Returns:
         連結後の単一動画の出力情報（video_path, video_url など）
     """
-    # 日本語コメント: 入力ペアごとに中間動画を作成
-    segment_paths: list[str] = []
-    first_result: Dict[str, str] | None = None
-    for img, aud in zip(media.image, media.audio):
-        seg = _compose_single_scene_video(img, aud)
-        if first_result is None:
-            first_result = seg
-        segment_paths.append(seg["video_path"])
+    # 日本語コメント: 複数シーンは1回の ffmpeg 実行で直接レンダー（失敗時は従来のセグメント方式）
+    # 日本語コメント: 全シーンで同じ解像度にするため、画像サイズ依存のプロファイルは先頭画像で確定する
+    profile = _media_profile(media)
+    if _single_pass_enabled(min(len(media.image), len(media.audio))):
+        try:
+            return _compose_single_pass(media.image, media.audio, profile)
+        except (ffmpeg.Error, ValueError) as e:
+            log("[compose_scene_video] single-pass fallback:", str(e))
+
+    # 日本語コメント: 入力ペアごとに中間動画を作成（CPU 数に応じて並列、結果はシーン順）
+    pairs = list(zip(media.image, media.audio))
+    workers = segment_encode_workers(len(pairs))
+    if workers > 1:
+        threads = segment_encode_threads(workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scene-encode") as pool:
+            segments = list(
+                pool.map(
+                    _compose_single_scene_video,
+                    media.image,
+                    media.audio,
+                    itertools.repeat(profile),
+                    itertools.repeat(threads),
+                )
+            )
+    else:
+        segments = [_compose_single_scene_video(img, aud, profile) for img, aud in pairs]
+    segment_paths = [seg["video_path"] for seg in segments]
+    first_result = segments[0] if segments else None
 
     # 日本語コメント: シーンが1つだけならそのまま返す
     if len(segment_paths) == 1:
@@ -186,7 +585,136 @@ def compose_scene_video(media: SceneMedia) -> Dict[str, str]:
     return concat_videos(segment_paths)
 
 
-def concat_videos(video_paths: list[str]) -> Dict[str, str]:
+async def compose_scene_video_async(media: SceneMedia) -> dict[str, str]:
+    """
+    `compose_scene_video` の非同期版。
+
+    各セグメントを asyncio サブプロセスで並列にエンコードし（イベントループはブロックしない）、
+    シーン順に連結した動画情報を返す。
+    """
+    profile = _media_profile(media)
+    if _single_pass_enabled(min(len(media.image), len(media.audio))):
+        try:
+            return await _compose_single_pass_async(media.image, media.audio, profile)
+        except (ffmpeg.Error, ValueError) as e:
+            log("[compose_scene_video_async] single-pass fallback:", str(e))
+
+    # 日本語コメント: 同時に走らせる ffmpeg は CPU 数に見合う本数・スレッド数に抑え、結果はシーン順に並べる
+    workers = segment_encode_workers(min(len(media.image), len(media.audio)))
+    threads = segment_encode_threads(workers)
+    limit = asyncio.Semaphore(workers)
+
+    async def _encode(img: bytes, aud: bytes) -> dict[str, str]:
+        async with limit:
+            return await _compose_single_scene_video_async(img, aud, profile, threads)
+
+    segments: list[dict[str, str]] = list(
+        await asyncio.gather(*(_encode(img, aud) for img, aud in zip(media.image, media.audio)))
+    )
+    if not segments:
+        raise ValueError("no scene media to compose")
+    if len(segments) == 1:
+        return segments[0]
+    return await concat_videos_async([seg["video_path"] for seg in segments])
+
+
+class StreamingSceneComposer:
+    """
+    シーンが揃った順にセグメント動画をエンコードし、最後に連結するパイプライン。
+
+    生成（ネットワーク待ち）とエンコード（CPU）を重ねるため、`submit` は
+    エンコードをバックグラウンドのワーカーへ渡して即座に戻る。
+    `finish` は全セグメントの完了を待ち、シーン番号順に連結した結果を返す。
+
+    例:
+        composer = StreamingSceneComposer()
+        composer.submit(1, image1, audio1)
+        composer.submit(2, image2, audio2)
+        video = composer.finish()
+    """
+
+    def __init__(self, max_workers: int = 1, profile: RenderProfile | str | None = None) -> None:
+        self._profile = render_profile(profile)
+        self._frame: RenderProfile | None = None
+        self._frame_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="scene-encode"
+        )
+        self._segments: dict[int, Future[dict[str, str]]] = {}
+
+    def submit(self, index: int, image: bytes, audio: bytes) -> None:
+        """シーン番号 `index` のセグメントをエンコード待ちに登録する。"""
+        if index in self._segments:
+            raise ValueError(f"scene {index} already submitted")
+        # 日本語コメント: 連結できるよう、解像度は最初に届いたシーンの画像で確定して全セグメントで共有する
+        with self._frame_lock:
+            if self._frame is None:
+                self._frame = _resolve_frame(self._profile, image)
+            frame = self._frame
+        self._segments[index] = self._pool.submit(_compose_single_scene_video, image, audio, frame)
+
+    def finish(self) -> dict[str, str]:
+        """全セグメントのエンコード完了を待ち、連結した動画情報を返す。"""
+        try:
+            if not self._segments:
+                raise ValueError("no scene segments submitted")
+            results = [self._segments[i].result() for i in sorted(self._segments)]
+        finally:
+            self._pool.shutdown(wait=True)
+
+        # 日本語コメント: シーンが1つだけならそのまま返す
+        if len(results) == 1:
+            return results[0]
+        return concat_videos([r["video_path"] for r in results])
+
+    def abort(self) -> None:
+        """未着手のエンコードを取り消してワーカーを停止する（生成失敗時用）。"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncStreamingSceneComposer:
+    """
+    `StreamingSceneComposer` の asyncio 版。
+
+    `submit` はエンコードを asyncio タスクとして起動して即座に戻る。
+    エンコードはロックで1本ずつ直列化し、`finish` でシーン番号順に連結する。
+    """
+
+    def __init__(self, profile: RenderProfile | str | None = None) -> None:
+        self._profile = render_profile(profile)
+        self._frame: RenderProfile | None = None
+        self._lock = asyncio.Lock()
+        self._segments: dict[int, asyncio.Task[dict[str, str]]] = {}
+
+    def submit(self, index: int, image: bytes, audio: bytes) -> None:
+        """シーン番号 `index` のセグメントをエンコード待ちに登録する（ループ内から呼ぶ）。"""
+        if index in self._segments:
+            raise ValueError(f"scene {index} already submitted")
+        if self._frame is None:
+            self._frame = _resolve_frame(self._profile, image)
+        self._segments[index] = asyncio.ensure_future(self._encode(image, audio, self._frame))
+
+    async def _encode(self, image: bytes, audio: bytes, frame: RenderProfile) -> dict[str, str]:
+        async with self._lock:
+            return await _compose_single_scene_video_async(image, audio, frame)
+
+    async def finish(self) -> dict[str, str]:
+        """全セグメントのエンコード完了を待ち、連結した動画情報を返す。"""
+        if not self._segments:
+            raise ValueError("no scene segments submitted")
+        results = [await self._segments[i] for i in sorted(self._segments)]
+        if len(results) == 1:
+            return results[0]
+        return await concat_videos_async([r["video_path"] for r in results])
+
+    async def abort(self) -> None:
+        """未完了のエンコードを取り消す（生成失敗時用）。"""
+        for t in self._segments.values():
+            t.cancel()
+        await asyncio.gather(*self._segments.values(), return_exceptions=True)
+
+
+def concat_videos(video_paths: list[str]) -> dict[str, str]:
     """
     複数の動画ファイル（同一コーデック/パラメータ前提）を1本に連結する。
 
@@ -195,43 +723,46 @@ def concat_videos(video_paths: list[str]) -> Dict[str, str]:
     Returns:
         連結後の動画情報（video_path, video_url など）
     """
-    out_dir = _final_dir()
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / f"concat_{int(time.time())}.mp4"
+    out_path = _new_output_path("concat")
+    list_path = _write_concat_list(video_paths)
+    try:
+        _concat_stream(list_path, out_path).run(quiet=False)
 
-    # 入力リストファイルを作成
-    list_file = tempfile.NamedTemporaryFile(prefix="concat_", suffix=".txt", mode="w", delete=False)
+        if env_truthy("PYTEST", "0"):
+            log("[concat_videos] video_path=", str(out_path))
+        return _video_result(out_path)
+    finally:
+        _remove_paths([list_path])
+
+
+async def concat_videos_async(video_paths: list[str]) -> dict[str, str]:
+    """`concat_videos` の非同期版。"""
+    out_path = _new_output_path("concat")
+    list_path = _write_concat_list(video_paths)
     try:
+        await run_ffmpeg_async(_concat_stream(list_path, out_path))
+
+        if env_truthy("PYTEST", "0"):
+            log("[concat_videos_async] video_path=", str(out_path))
+        return _video_result(out_path)
+    finally:
+        _remove_paths([list_path])
+
+
+def _write_concat_list(video_paths: list[str]) -> str:
+    """concat demuxer 用の入力リストファイルを作成してパスを返す。"""
+    list_file = tempfile.NamedTemporaryFile(prefix="concat_", suffix=".txt", mode="w", delete=False)
+    with list_file:
         for p in video_paths:
             # -safe 0 を使うので絶対パスやスペースにも対応
             list_file.write(f"file '{Path(p).resolve()}'\n")
-        list_file.flush()
-        list_file.close()
-
-        (
-            ffmpeg
-            .input(list_file.name, f="concat", safe=0)
-            .output(str(out_path), c="copy", movflags="+faststart")
-            .overwrite_output()
-            .run(quiet=False)
-        )
+    return list_file.name
 
-        if env_truthy("PYTEST", "0"):
-            url = out_path.resolve().as_uri()
-            log("[concat_videos] video_path=", str(out_path))
-            return {
-                "video_gcs": "",
-                "video_url": url,
-                "video_path": str(out_path),
-            }
-        else:
-            return {
-                "video_gcs": "",
-                "video_url": str(out_path),
-                "video_path": str(out_path),
-            }
-    finally:
-        try:
-            os.remove(list_file.name)
-        except Exception:
-            pass
+
+def _concat_stream(list_path: str, out_path: Path) -> Any:
+    return (
+        ffmpeg
+        .input(list_path, f="concat", safe=0)
+        .output(str(out_path), c="copy", movflags="+faststart")
+        .overwrite_output()
+    )
@@ -0,0 +1,127 @@
+"""
+プロバイダ別の長寿命クライアントのレジストリ。
+
+OpenAI（LLM/TTS）と OpenRouter（画像）ごとに、keep-alive の HTTP コネクションプールを
+1つずつ共有する。呼び出しのたびに `OpenAI()` を作ると毎回 TLS ハンドシェイクから
+やり直しになるため、サービス層は必ずここからクライアントを取得する。
+
+リトライは app/utils/resilience.py の共通方針で行うため、SDK 組み込みのリトライは無効化する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, cast
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from app.config.settings import get_settings
+
+
+def _http2_available() -> bool:
+    """HTTP/2 を有効化できるか（設定で許可され、h2 がインストール済み）。"""
+    return get_settings().http2_enabled and importlib.util.find_spec("h2") is not None
+
+
+def _limits() -> httpx.Limits:
+    s = get_settings()
+    return httpx.Limits(
+        max_connections=s.http_max_connections,
+        max_keepalive_connections=s.http_max_keepalive_connections,
+        keepalive_expiry=s.http_keepalive_expiry_sec,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    s = get_settings()
+    return httpx.Timeout(s.http_timeout_sec, connect=s.http_connect_timeout_sec)
+
+
+# 日本語コメント: SDK の `http_client` 型注釈は httpx2 だが、実行時は httpx のクライアントも受け付けるため Any として渡す
+def _http_client() -> Any:
+    """共有の同期 HTTP クライアント。"""
+    return cast(
+        Any,
+        httpx.Client(limits=_limits(), timeout=_timeout(), http2=_http2_available()),
+    )
+
+
+def _async_http_client() -> Any:
+    """共有の非同期 HTTP クライアント（`_http_client` の非同期版）。"""
+    return cast(
+        Any,
+        httpx.AsyncClient(
+            limits=_limits(), timeout=_timeout(), http2=_http2_available()
+        ),
+    )
+
+
+def _openai_credentials() -> tuple[str, str]:
+    s = get_settings()
+    return s.openai_api_key or os.getenv("OPENAI_API_KEY", ""), s.openai_base_url
+
+
+def _openrouter_credentials() -> tuple[str, str]:
+    s = get_settings()
+    return s.app_openrouter_api_key, s.app_openrouter_base_url
+
+
+@lru_cache(maxsize=1)
+def openai_client() -> OpenAI:
+    """OpenAI（LLM/TTS）用の共有クライアント。"""
+    api_key, base_url = _openai_credentials()
+    return OpenAI(
+        api_key=api_key, base_url=base_url, http_client=_http_client(), max_retries=0
+    )
+
+
+@lru_cache(maxsize=1)
+def openrouter_client() -> OpenAI:
+    """OpenRouter（画像生成）用の共有クライアント。"""
+    api_key, base_url = _openrouter_credentials()
+    return OpenAI(
+        api_key=api_key, base_url=base_url, http_client=_http_client(), max_retries=0
+    )
+
+
+# 日本語コメント: 非同期クライアントのコネクションはイベントループに紐づくため、ループ単位で保持する
+_async_lock = threading.Lock()
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, AsyncOpenAI]
+] = weakref.WeakKeyDictionary()
+
+
+def _async_client(provider: str) -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        per_loop = _async_clients.setdefault(loop, {})
+        client = per_loop.get(provider)
+        if client is None:
+            if provider == "openrouter":
+                api_key, base_url = _openrouter_credentials()
+            else:
+                api_key, base_url = _openai_credentials()
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=_async_http_client(),
+                max_retries=0,
+            )
+            per_loop[provider] = client
+    return client
+
+
+def openai_async_client() -> AsyncOpenAI:
+    """OpenAI（LLM/TTS）用の共有非同期クライアント（実行中のイベントループ単位）。"""
+    return _async_client("openai")
+
+
+def openrouter_async_client() -> AsyncOpenAI:
+    """OpenRouter（画像生成）用の共有非同期クライアント（実行中のイベントループ単位）。"""
+    return _async_client("openrouter")
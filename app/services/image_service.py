@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
-from typing import Optional, Any, cast, Dict, List
+from functools import lru_cache
+from typing import Optional, Any, cast
 from urllib import request
 
-from openai import OpenAI
+from openai.types.chat import ChatCompletion
 
 from app.config.settings import get_settings
+from app.services.clients import openrouter_async_client, openrouter_client
+from app.utils.adaptive import adaptive_slot, adaptive_slot_async
+from app.utils.disk_cache import DiskCache
+from app.utils.env import cache_root
+from app.utils.hedging import hedger
+from app.utils.images import DataUrlCache
 from app.utils.log import log
+from app.utils.rate_limit import rate_limiter
+from app.utils.resilience import TransientError, call_with_retry, call_with_retry_async
 
 
 def generate_image(
@@ -16,6 +26,7 @@ def generate_image(
     size: str | None = None,
     base_images: list[bytes] | None = None,
     scene_images: list[bytes] | None = None,
+    anchor_image: bytes | None = None,
 ) -> bytes:
     """
     画像を生成してPNGのバイト列を返す（OpenRouter 経由の画像モデル）。
@@ -25,11 +36,156 @@ def generate_image(
         size: 画像サイズ（例: "1024x576", "1024x1024"）。未指定時は "1024x576"。
         base_images: 全シーン共通の参照画像（最大5枚）。
         scene_images: 直近シーンの参照画像（最大5枚）。
-            いずれも PNG バイト列で、Chat Completions の画像入力として data URL 化して送信。
+        anchor_image: アンカー一貫性モードのキャラクター/スタイル参照シート（直近シーンではない）。
+            いずれも画像のバイト列（PNG/JPEG/WebP）で、形式に応じた MIME の data URL として送信。
     戻り値:
         PNG のバイト列。
     """
 
+    # 日本語コメント: キャッシュ無効時は参照画像のハッシュ計算自体を行わない
+    cache = _image_cache()
+    cache_key = ""
+    if cache is not None:
+        cache_key = _image_cache_key(prompt, size, base_images, scene_images, anchor_image)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    request_kwargs = _build_image_request(prompt, size, base_images, scene_images, anchor_image)
+
+    # オンライン実行（OpenAI SDK を使用して OpenRouter 経由で呼び出し）
+    # 日本語コメント: 共有クライアントでコネクションプールを再利用
+    client = openrouter_client()
+
+    limiter = rate_limiter("openrouter", str(request_kwargs["model"]))
+
+    def _call() -> bytes:
+        limiter.acquire()
+        with adaptive_slot("image"):
+            resp = cast(ChatCompletion, client.chat.completions.create(**request_kwargs))
+        b = _extract_image_bytes_from_response(_completion_to_dict(resp))
+        if not b:
+            # 日本語コメント: 画像が含まれない応答は一過性とみなしてリトライ対象にする
+            raise TransientError("No image bytes found in OpenRouter response")
+        return b
+
+    # 日本語コメント: ヘッジ有効時は、遅い試行に同じリクエストを追加で送り先に返った方を使う
+    attempt = (lambda: hedger("image").call(_call)) if get_settings().image_hedging else _call
+
+    try:
+        b = call_with_retry("openrouter", attempt)
+    except Exception as e:  # ネットワーク遮断や予期しない例外
+        # 明示的に失敗させ、テストで原因が見えるようにする
+        log("[generate_image] openai client error:", str(e))
+        raise
+    if cache is not None:
+        cache.put(cache_key, b)
+    return b
+
+
+async def generate_image_async(
+    prompt: str,
+    size: str | None = None,
+    base_images: list[bytes] | None = None,
+    scene_images: list[bytes] | None = None,
+    anchor_image: bytes | None = None,
+) -> bytes:
+    """`generate_image` の非同期版（AsyncOpenAI 経由で OpenRouter を呼び出す）。"""
+    # 日本語コメント: キャッシュ無効時は参照画像のハッシュ計算自体を行わない
+    cache = _image_cache()
+    cache_key = ""
+    if cache is not None:
+        cache_key = _image_cache_key(prompt, size, base_images, scene_images, anchor_image)
+        # 日本語コメント: キャッシュはディスク I/O のため、イベントループを止めないようスレッドで読み書きする
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+    request_kwargs = _build_image_request(prompt, size, base_images, scene_images, anchor_image)
+
+    client = openrouter_async_client()
+
+    limiter = rate_limiter("openrouter", str(request_kwargs["model"]))
+
+    async def _call() -> bytes:
+        await limiter.acquire_async()
+        async with adaptive_slot_async("image"):
+            resp = cast(ChatCompletion, await client.chat.completions.create(**request_kwargs))
+        # 日本語コメント: URL 形式の応答では追加の HTTP 取得が走るためスレッドへ逃がす
+        b = await asyncio.to_thread(
+            _extract_image_bytes_from_response, _completion_to_dict(resp)
+        )
+        if not b:
+            raise TransientError("No image bytes found in OpenRouter response")
+        return b
+
+    attempt_async = (lambda: hedger("image").call_async(_call)) if get_settings().image_hedging else _call
+
+    try:
+        b = await call_with_retry_async("openrouter", attempt_async)
+    except Exception as e:
+        log("[generate_image_async] openai client error:", str(e))
+        raise
+    if cache is not None:
+        await asyncio.to_thread(cache.put, cache_key, b)
+    return b
+
+
+@lru_cache(maxsize=1)
+def _data_url_cache() -> DataUrlCache:
+    """参照画像の data URL キャッシュ（プロセス内で共有、DATA_URL_CACHE_MB が上限）。"""
+    return DataUrlCache(get_settings().data_url_cache_mb * 1024 * 1024)
+
+
+def data_url_cache_stats() -> dict[str, int]:
+    """参照画像の data URL キャッシュのヒット/ミス等を返す。"""
+    return _data_url_cache().stats()
+
+
+@lru_cache(maxsize=1)
+def _image_cache() -> DiskCache | None:
+    """画像キャッシュ（IMAGE_CACHE=1 のときのみ有効）。プロセス内で共有する。"""
+    s = get_settings()
+    if not s.image_cache_enabled:
+        return None
+    return DiskCache(cache_root() / "images", s.image_cache_max_mb * 1024 * 1024)
+
+
+def image_cache_stats() -> dict[str, int]:
+    """画像キャッシュのヒット/ミス等を返す（無効時は空の辞書）。"""
+    cache = _image_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _image_cache_key(
+    prompt: str,
+    size: str | None,
+    base_images: list[bytes] | None,
+    scene_images: list[bytes] | None,
+    anchor_image: bytes | None = None,
+) -> str:
+    """モデル・プロンプト・サイズ・参照画像のバイト列からキャッシュキーを作る。"""
+    s = get_settings()
+    w, h = _parse_wh(size, "1024x576")
+    parts: list[str | bytes] = [s.model_image, prompt, f"{w}x{h}"]
+    # 日本語コメント: base/scene の区別も出力に影響するため区切りを入れる
+    parts.append("base")
+    parts.extend(bytes(b) for b in base_images or [])
+    parts.append("scene")
+    parts.extend(bytes(b) for b in scene_images or [])
+    if anchor_image is not None:
+        parts.extend(["anchor", bytes(anchor_image)])
+    return DiskCache.make_key(*parts)
+
+
+def _build_image_request(
+    prompt: str,
+    size: str | None,
+    base_images: list[bytes] | None,
+    scene_images: list[bytes] | None,
+    anchor_image: bytes | None = None,
+) -> dict[str, Any]:
+    """画像生成の chat.completions.create 引数を組み立てる（同期/非同期で共通）。"""
     s = get_settings()
     # サイズ指定があればプロンプト末尾にフラグ形式で付加
     w, h = _parse_wh(size, "1024x576")
@@ -43,6 +199,13 @@ def generate_image(
             # 日本語訳: 基本参照画像と一貫性のあるキャラクターのアイデンティティ、衣装、全体的なビジュアルスタイルを維持する。
             "Maintain character identity, costumes, and overarching visual style consistent with the base reference images."
         )
+    if anchor_image is not None:
+        combined_images.append(anchor_image)
+        guidance_parts.append(
+            # 日本語訳: キャラクター/スタイル参照シートのキャラクターデザイン・衣装・配色・画風に厳密に従う。参照シートの並べた配置や無地の背景は再現せず、このシーンの新しい構図を作成する。
+            "Follow the character and style reference sheet exactly for character designs, outfits, color palette, and rendering style, "
+            "but do not reproduce its side-by-side layout or plain background; compose this scene as a new illustration."
+        )
     if scene_images:
         combined_images.extend(scene_images)
         guidance_parts.append(
@@ -50,64 +213,47 @@ def generate_image(
             "Ensure continuity with the most recent scene references but craft a new composition with varied pose, camera angle, background, and lighting."
         )
 
-    if combined_images:
-        prompt_with_size += " " + " ".join(guidance_parts)
+    if not combined_images:
+        return {
+            "model": s.model_image,
+            "messages": [{"role": "user", "content": prompt_with_size}],
+        }
 
-    # 日本語コメント: 参照画像を最大5枚まで組み立て
+    prompt_with_size += " " + " ".join(guidance_parts)
+
+    # 日本語コメント: 参照画像を最大5枚まで組み立て（同じ内容の画像は1枚にまとめる）
     content_items: list[dict[str, Any]] = [{"type": "text", "text": prompt_with_size}]
-    if combined_images:
-        refs: list[bytes] = list(combined_images)[-5:]
-        for im in refs:
-            try:
-                b64 = base64.b64encode(bytes(im)).decode("ascii")
-                content_items.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{b64}"},
-                })
-            except Exception:
-                # 個別の添付失敗はスキップ（全体は継続）
-                continue
+    encoder = _data_url_cache()
+    unique: dict[bytes, bytes] = {}
+    for im in combined_images:
+        try:
+            data = bytes(im)
+        except Exception:
+            # 個別の添付失敗はスキップ（全体は継続）
+            continue
+        unique.setdefault(DataUrlCache.digest(data), data)
+    for digest, data in list(unique.items())[-5:]:
+        content_items.append({
+            "type": "image_url",
+            # 日本語コメント: シーンをまたいで同じ参照画像を何度も base64 化しないよう共有キャッシュを使う
+            "image_url": {"url": encoder.data_url(data, digest)},
+        })
 
-    # オンライン実行（OpenAI SDK を使用して OpenRouter 経由で呼び出し）
-    try:
-        client = OpenAI(
-            api_key=s.app_openrouter_api_key,
-            base_url=s.app_openrouter_base_url,
-        )
-        # 非ストリームで取得し、辞書化してから画像を探す
-        # 日本語コメント: 参照画像がある場合は content を配列形式で送る
-        if combined_images:
-            # Pyright 型回避: content を配列形式にする
-            messages_any: Any = [{"role": "user", "content": content_items}]
-            resp = client.chat.completions.create(
-                model=s.model_image,
-                messages=cast(Any, messages_any),
-            )
-        else:
-            resp = client.chat.completions.create(
-                model=s.model_image,
-                messages=[{"role": "user", "content": prompt_with_size}],
-            )
-        # 型付きオブジェクト → dict
-        obj: Dict[str, Any]
-        if hasattr(resp, "model_dump"):
-            obj = cast(Dict[str, Any], resp.model_dump())  # type: ignore[assignment]
-        else:  # 予備
-            try:
-                obj = cast(Dict[str, Any], json.loads(resp.json()))  # type: ignore[attr-defined]
-            except Exception:
-                obj = cast(Dict[str, Any], json.loads(getattr(resp, "to_json", lambda: "{}")()))
-
-        b = _extract_image_bytes_from_response(obj)
-        if b:
-            return b
-    except Exception as e:  # ネットワーク遮断や予期しない例外
-        # 明示的に失敗させ、テストで原因が見えるようにする
-        log("[generate_image] openai client error:", str(e))
-        raise
+    # 日本語コメント: 参照画像がある場合は content を配列形式で送る
+    # Pyright 型回避: content を配列形式にする
+    messages_any: Any = [{"role": "user", "content": content_items}]
+    return {"model": s.model_image, "messages": cast(Any, messages_any)}
 
-    # 画像が取得できなかった場合はエラー
-    raise RuntimeError("No image bytes found in OpenRouter response")
+
+def _completion_to_dict(resp: Any) -> dict[str, Any]:
+    """型付きレスポンスオブジェクトを辞書化する。"""
+    if hasattr(resp, "model_dump"):
+        return cast(dict[str, Any], resp.model_dump())
+    # 予備
+    try:
+        return cast(dict[str, Any], json.loads(resp.json()))
+    except Exception:
+        return cast(dict[str, Any], json.loads(getattr(resp, "to_json", lambda: "{}")()))
 
 
 def _parse_wh(size: Optional[str], default_size: Optional[str]) -> tuple[int, int]:
@@ -121,25 +267,25 @@ def _parse_wh(size: Optional[str], default_size: Optional[str]) -> tuple[int, in
     return 1024, 1024
 
 
-def _fetch_bytes(url: str, headers: Dict[str, str] | None = None) -> bytes:
+def _fetch_bytes(url: str, headers: dict[str, str] | None = None) -> bytes:
     req = request.Request(url, headers=headers or {}, method="GET")
     with request.urlopen(req) as r:
         return r.read()
 
 
-def _extract_image_bytes_from_response(obj: Dict[str, Any]) -> Optional[bytes]:
+def _extract_image_bytes_from_response(obj: dict[str, Any]) -> Optional[bytes]:
     # いくつかの候補パスを試す
     try:
         # chat.completions 形式
-        choices: List[Dict[str, Any]] = cast(List[Dict[str, Any]], obj.get("choices") or [])
+        choices: list[dict[str, Any]] = cast(list[dict[str, Any]], obj.get("choices") or [])
         if choices:
-            message: Dict[str, Any] = cast(Dict[str, Any], choices[0].get("message") or {})
+            message: dict[str, Any] = cast(dict[str, Any], choices[0].get("message") or {})
             if message:
-                images: List[Dict[str, Any]] = cast(
-                    List[Dict[str, Any]], message.get("images") or [])
+                images: list[dict[str, Any]] = cast(
+                    list[dict[str, Any]], message.get("images") or [])
                 for im in images:
                     b64_val: Optional[str] = None
-                    inner_image: Dict[str, Any] = cast(Dict[str, Any], im.get("image") or {})
+                    inner_image: dict[str, Any] = cast(dict[str, Any], im.get("image") or {})
                     b64_raw: Optional[str] = cast(Optional[str], im.get(
                         "b64_json") or inner_image.get("b64_json"))
                     if isinstance(b64_raw, str):
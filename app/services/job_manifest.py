@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from app.services.llm_service import SceneSpec
+from app.utils.env import outputs_root
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 日本語コメント: ジョブIDはそのままディレクトリ名になるため、パス区切り等を含まない文字列に限定
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
+# 日本語コメント: タスク種別ごとのアセットのファイル名（シーンごとのディレクトリ配下）
+_ASSET_FILES = {"image": "image.png", "tts": "narration.mp3"}
+_TEXT_FIELDS = {"prompt": "prompt", "voice": "voice_script"}
+
+
+def new_job_id() -> str:
+    """新しいジョブIDを返す（例: job-20250101-120000-1a2b3c4d）。"""
+    return f"job-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def job_dir(job_id: str) -> Path:
+    """ジョブの出力ディレクトリ（`outputs_root()/<job_id>`）を返す。"""
+    if not _JOB_ID_RE.match(job_id):
+        raise ValueError(f"invalid job id: {job_id!r}")
+    return outputs_root() / job_id
+
+
+class JobManifest:
+    """
+    物語生成ジョブのチェックポイント（`outputs_root()/<job_id>/manifest.json`）。
+
+    - ジョブ開始時の参照画像の指定（アップロード画像・ローカルパス・URL）を記録し、計画前に失敗しても再開できる
+    - 計画結果（シーン仕様・全体スタイル・参照画像）と、タスクグラフの完了結果を記録する
+    - 画像/音声は `scenes/0001/image.png` などのファイルに保存し、マニフェストには相対パスのみ持つ
+    - `preloaded()` は完了済みタスクの結果を返し、`TaskGraph.run(preloaded=...)` に渡して再開に使う
+    - 書き込みは一時ファイル + `os.replace` でアトミックに行う（途中で落ちても壊れない）
+    """
+
+    def __init__(self, job_id: str, data: dict[str, Any]) -> None:
+        self.job_id = job_id
+        self.dir = job_dir(job_id)
+        self.data = data
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, job_id: str, story: str, params: dict[str, Any]) -> JobManifest:
+        """新しいジョブのマニフェストを作って保存する。"""
+        now = time.time()
+        job = cls(
+            job_id,
+            {
+                "version": MANIFEST_VERSION,
+                "job_id": job_id,
+                "status": "running",
+                "created_at": now,
+                "updated_at": now,
+                "story": story,
+                "params": dict(params),
+                "reference_inputs": None,
+                "style": None,
+                "scene_specs": None,
+                "references": [],
+                "anchor": None,
+                "scenes": {},
+                "result": None,
+                "error": None,
+            },
+        )
+        job.dir.mkdir(parents=True, exist_ok=True)
+        with job._lock:
+            job._save_locked()
+        return job
+
+    @classmethod
+    def load(cls, job_id: str) -> JobManifest:
+        """保存済みのマニフェストを読み込む。存在しない場合は FileNotFoundError。"""
+        path = job_dir(job_id) / MANIFEST_FILENAME
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"unsupported manifest version: {data.get('version')!r}")
+        return cls(job_id, data)
+
+    @property
+    def story(self) -> str:
+        return str(self.data["story"])
+
+    @property
+    def params(self) -> dict[str, Any]:
+        return dict(self.data["params"])
+
+    def save_reference_inputs(
+        self,
+        uploads: Sequence[bytes],
+        local_images: Sequence[str],
+        http_images: Sequence[str],
+    ) -> None:
+        """ジョブ開始時の参照画像の指定を記録する（アップロード画像はファイルとして保存）。"""
+        rels: list[str] = []
+        for n, data in enumerate(uploads):
+            rel = f"inputs/{n:02d}.bin"
+            self._write_asset(rel, bytes(data))
+            rels.append(rel)
+        with self._lock:
+            self.data["reference_inputs"] = {
+                "uploads": rels,
+                "local_images": [str(p) for p in local_images],
+                "http_images": [str(u) for u in http_images],
+            }
+            self._save_locked()
+
+    def reference_inputs(self) -> tuple[list[bytes], list[str], list[str]]:
+        """記録済みの参照画像の指定 (アップロード画像, ローカルパス, URL)。未記録なら空。"""
+        inputs: dict[str, Any] = self.data.get("reference_inputs") or {}
+        uploads = [
+            data
+            for rel in inputs.get("uploads", [])
+            if (data := self._read_asset(rel)) is not None
+        ]
+        return (
+            uploads,
+            list(inputs.get("local_images", [])),
+            list(inputs.get("http_images", [])),
+        )
+
+    def plan(self) -> tuple[list[bytes], list[SceneSpec], str] | None:
+        """記録済みの計画結果 (参照画像, シーン仕様, 全体スタイル)。未記録なら None。"""
+        specs = self.data.get("scene_specs")
+        if not specs:
+            return None
+        refs = [
+            (self.dir / rel).read_bytes() for rel in self.data.get("references", [])
+        ]
+        return refs, list(specs), str(self.data.get("style") or "")
+
+    def save_plan(
+        self, reference_images: list[bytes], scene_specs: list[SceneSpec], style: str
+    ) -> None:
+        """計画フェーズの結果を記録する（参照画像はファイルとして保存）。"""
+        rels: list[str] = []
+        for n, data in enumerate(reference_images):
+            rel = f"references/{n:02d}.bin"
+            self._write_asset(rel, data)
+            rels.append(rel)
+        with self._lock:
+            self.data["references"] = rels
+            self.data["scene_specs"] = list(scene_specs)
+            self.data["style"] = style
+            self._save_locked()
+
+    def record(self, key: str, value: Any) -> None:
+        """タスクグラフの完了結果を記録する（`TaskGraph.run(on_result=...)` 用）。
+
+        対象は anchor / prompt:{i} / image:{i} / voice:{i} / tts:{i}。それ以外のキーは無視する。
+        """
+        kind, _, idx = key.partition(":")
+        if kind == "anchor" and isinstance(value, bytes):
+            self._write_asset("anchor.png", value)
+            with self._lock:
+                self.data["anchor"] = "anchor.png"
+                self._save_locked()
+            return
+        if not idx.isdigit():
+            return
+        if kind in _ASSET_FILES and isinstance(value, bytes):
+            rel = f"scenes/{int(idx):04d}/{_ASSET_FILES[kind]}"
+            self._write_asset(rel, value)
+            field, stored = kind, rel
+        elif kind in _TEXT_FIELDS and isinstance(value, str):
+            field, stored = _TEXT_FIELDS[kind], value
+        else:
+            return
+        with self._lock:
+            self.data["scenes"].setdefault(idx, {})[field] = stored
+            self._save_locked()
+
+    def preloaded(self) -> dict[str, Any]:
+        """完了済みタスクの結果（タスクキー → 値）。ファイルが欠けているアセットは含めない。"""
+        with self._lock:
+            anchor = self.data.get("anchor")
+            scenes = {k: dict(v) for k, v in self.data.get("scenes", {}).items()}
+            n = len(self.data.get("scene_specs") or [])
+        out: dict[str, Any] = {}
+        if anchor:
+            data = self._read_asset(anchor)
+            if data is not None:
+                out["anchor"] = data
+        for idx, scene in scenes.items():
+            for kind, field in _TEXT_FIELDS.items():
+                if isinstance(scene.get(field), str):
+                    out[f"{kind}:{idx}"] = scene[field]
+            for kind in _ASSET_FILES:
+                rel = scene.get(kind)
+                data = self._read_asset(rel) if rel else None
+                if data is not None:
+                    out[f"{kind}:{idx}"] = data
+        # 日本語コメント: 全シーン分そろっていれば、まとめ生成タスク（LLM_BATCH）も再実行しない
+        for batch_key, kind in (("prompts", "prompt"), ("voices", "voice")):
+            keys = [f"{kind}:{i}" for i in range(1, n + 1)]
+            if n and all(k in out for k in keys):
+                out[batch_key] = [out[k] for k in keys]
+        return out
+
+    def complete(self, result: dict[str, str]) -> None:
+        with self._lock:
+            self.data["status"] = "completed"
+            self.data["result"] = dict(result)
+            self.data["error"] = None
+            self._save_locked()
+
+    def fail(self, error: BaseException) -> None:
+        with self._lock:
+            self.data["status"] = "failed"
+            self.data["error"] = f"{type(error).__name__}: {error}"
+            self._save_locked()
+
+    def _read_asset(self, rel: str) -> bytes | None:
+        try:
+            return (self.dir / rel).read_bytes()
+        except OSError:
+            return None
+
+    def _write_asset(self, rel: str, data: bytes) -> None:
+        _atomic_write(self.dir / rel, data)
+
+    def _save_locked(self) -> None:
+        self.data["updated_at"] = time.time()
+        raw = json.dumps(self.data, ensure_ascii=False, indent=2)
+        _atomic_write(self.dir / MANIFEST_FILENAME, raw.encode("utf-8"))
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp_", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except Exception:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
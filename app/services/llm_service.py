@@ -1,26 +1,47 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import json
 import re
-from typing import List, TypedDict, Any, cast
+from collections.abc import Awaitable, Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TypedDict, Any, TypeVar, cast
 
-import os
 from app.config.settings import get_settings
-from app.utils.env import env_truthy
+from app.services.clients import openai_async_client, openai_client
+from app.utils.env import cache_root, env_truthy
 from app.utils.log import log
+from app.utils.memo import MemoStore, memo_bypassed
+from app.utils.rate_limit import estimate_request_tokens, rate_limiter
+from app.utils.resilience import call_with_retry, call_with_retry_async
+from openai import AsyncOpenAI, OpenAI
 from openai.types.chat import (
+    ChatCompletion,
     ChatCompletionToolParam,
 )
 from prompts import (
+    plan_story_system,
     split_scenes_system,
     image_prompt_system,
     return_scenes_tool,
     return_scenes_tool_choice,
+    return_image_prompts_tool,
+    return_image_prompts_tool_choice,
+    return_voice_scripts_tool,
+    return_voice_scripts_tool_choice,
     style_hint_system,
     voice_script_system,
 )
 
 
+T = TypeVar("T")
+
+# 日本語コメント: スタイルヒントを決められなかった場合の保守的な既定値（絵本風）
+DEFAULT_STYLE_HINT = "絵本風、明るい色彩、やさしい雰囲気"
+
+
 class SceneSpec(TypedDict):
     """シーン仕様（本文 + 各種ヒント）。"""
 
@@ -31,7 +52,113 @@ class SceneSpec(TypedDict):
     sfx_hint: str
 
 
-def split_scenes(text: str, max_scenes: int = 5) -> List[SceneSpec]:
+@lru_cache(maxsize=1)
+def _llm_memo() -> MemoStore:
+    """LLM 応答のメモ化ストア（プロセス内 LRU + CACHE_DIR/llm）。"""
+    s = get_settings()
+    return MemoStore(
+        cache_root() / "llm",
+        max_entries=s.llm_cache_max_entries,
+        max_disk_bytes=s.llm_cache_max_mb * 1024 * 1024,
+    )
+
+
+def _memo_enabled() -> bool:
+    return get_settings().llm_cache_enabled and not memo_bypassed()
+
+
+def _memoized(request_kwargs: dict[str, Any], compute: Callable[[], T]) -> T:
+    """
+    LLM ヘルパーの結果をメモ化する。
+
+    キーはリクエスト内容（モデル・システムプロンプト・ユーザーメッセージ・温度・ツール定義）。
+    `compute` が例外を送出した場合は何も保存しない（呼び出し側のフォールバックに任せる）。
+    保存自体の失敗はログに残すだけで、計算済みの結果はそのまま返す。
+    LLM_CACHE=0 または `memo_bypass()` 内では常に `compute` を呼ぶ。
+    """
+    if not _memo_enabled():
+        return compute()
+    memo = _llm_memo()
+    key = MemoStore.make_key(request_kwargs)
+    hit = memo.get(key)
+    if hit is not None:
+        return cast(T, hit)
+    value = compute()
+    _memo_put(memo, key, value)
+    return value
+
+
+async def _memoized_async(
+    request_kwargs: dict[str, Any], compute: Callable[[], Awaitable[T]]
+) -> T:
+    """`_memoized` の非同期版（メモの読み書きはディスク I/O のためスレッドで行う）。"""
+    if not _memo_enabled():
+        return await compute()
+    memo = _llm_memo()
+    key = MemoStore.make_key(request_kwargs)
+    hit = await asyncio.to_thread(memo.get, key)
+    if hit is not None:
+        return cast(T, hit)
+    value = await compute()
+    await asyncio.to_thread(_memo_put, memo, key, value)
+    return value
+
+
+def _memo_put(memo: MemoStore, key: str, value: Any) -> None:
+    """メモへ保存する。失敗しても（ディスク書き込み不可など）結果は捨てずにログのみ残す。"""
+    try:
+        memo.put(key, value)
+    except Exception as e:  # noqa: BLE001
+        log("[llm_memo] put failed:", str(e))
+
+
+def _complete(client: OpenAI, req: dict[str, Any]) -> ChatCompletion:
+    """Chat Completions を共通のリトライ/サーキットブレーカー方針で呼び出す。
+
+    各試行の前にモデル単位のレートリミッタで枠を確保する（足りなければ待つ）。
+    """
+    limiter = rate_limiter("openai", str(req.get("model", "")))
+    tokens = estimate_request_tokens(req)
+
+    def _call() -> ChatCompletion:
+        limiter.acquire(tokens)
+        # 日本語コメント: stream を指定しないため、応答は常に ChatCompletion
+        return cast(ChatCompletion, client.chat.completions.create(**req))
+
+    return call_with_retry("openai", _call)
+
+
+async def _complete_async(client: AsyncOpenAI, req: dict[str, Any]) -> ChatCompletion:
+    """`_complete` の非同期版。"""
+    limiter = rate_limiter("openai", str(req.get("model", "")))
+    tokens = estimate_request_tokens(req)
+
+    async def _call() -> ChatCompletion:
+        await limiter.acquire_async(tokens)
+        return cast(ChatCompletion, await client.chat.completions.create(**req))
+
+    return await call_with_retry_async("openai", _call)
+
+
+def _run_parallel(calls: Sequence[Callable[[], T]], name: str) -> list[T]:
+    """
+    一括呼び出しのフォールバックで、シーンごとの呼び出しを並行実行して順に返す。
+
+    シーン数ぶん直列に待たないよう、呼び出し元のコンテキスト（memo_bypass 等）ごと
+    スレッドで実行する。同時実行数は STORY_MAX_WORKERS まで。
+    """
+    workers = max(1, min(len(calls), get_settings().story_max_workers))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, call) for call in calls]
+        return [f.result() for f in futures]
+
+
+def llm_cache_stats() -> dict[str, int]:
+    """LLM メモ化のヒット/ミス等を返す。"""
+    return _llm_memo().stats()
+
+
+def split_scenes(text: str, max_scenes: int = 5) -> list[SceneSpec]:
     """
     LLMを用いて物語テキストを最大N個のシーンへ分割する。
 
@@ -45,16 +172,41 @@ def split_scenes(text: str, max_scenes: int = 5) -> List[SceneSpec]:
         - voice_hint: 推奨ナレーション（話者/トーン/テンポ/言語等）
         - sfx_hint: 推奨効果音（現状は参照のみ; 実生成には未使用）
     """
-    s = get_settings()
-    # OpenAI クライアントは関数内で生成（将来ライブラリ変更に備え局所化）
-    from openai import OpenAI
+    # OpenAI クライアントは共有レジストリから取得（コネクションプールを再利用）
+    client = openai_client()
 
-    s = get_settings()
-    client = OpenAI(
-        api_key=s.openai_api_key or os.getenv("OPENAI_API_KEY", ""),
-        base_url=s.openai_base_url
-    )
+    system, user = _split_scenes_messages(text, max_scenes)
+    try:
+        req = _split_scenes_request(system, user)
+        return _memoized(
+            req, lambda: _parse_split_scenes_response(_complete(client, req), text, system, user)
+        )
+    except Exception as e:  # noqa: BLE001
+        log("[split_scenes] fallback:", str(e))
+        return _ensure_scene_specs([text], text)
 
+
+async def split_scenes_async(text: str, max_scenes: int = 5) -> list[SceneSpec]:
+    """`split_scenes` の非同期版（AsyncOpenAI を使用）。"""
+    client = openai_async_client()
+
+    system, user = _split_scenes_messages(text, max_scenes)
+    try:
+        req = _split_scenes_request(system, user)
+
+        async def _call() -> Any:
+            return _parse_split_scenes_response(await _complete_async(client, req), text, system, user)
+
+        return await _memoized_async(req, _call)
+    except Exception as e:  # noqa: BLE001
+        log("[split_scenes_async] fallback:", str(e))
+        return _ensure_scene_specs([text], text)
+
+
+def _split_scenes_messages(
+    text: str, max_scenes: int, extra_instructions: str = ""
+) -> tuple[str, str]:
+    """シーン分割用の (system, user) メッセージを組み立てる。"""
     system = split_scenes_system()
     user = (
         f"以下の日本語テキストを、自然なまとまりで最大{max_scenes}個に分割してください。"
@@ -64,51 +216,158 @@ def split_scenes(text: str, max_scenes: int = 5) -> List[SceneSpec]:
         "特に重要: すべての voice_script を先頭から順に連結しても、不自然な繰り返し（例:『私は〜です。私は〜です。』の連続）にならないように、"
         "前の内容を前提とした代名詞や接続表現を使って、文脈が自然につながるように書いてください。"
         "無理にシーンを区切って、句点ですぐに終わるようにしないでください。"
-        "返答は用意された関数を必ず呼び出してください。\n\n"
+        + extra_instructions
+        + "返答は用意された関数を必ず呼び出してください。\n\n"
         f"テキスト:\n{text}"
     )
+    return system, user
+
 
+def _split_scenes_request(system: str, user: str) -> dict[str, Any]:
+    """シーン分割の chat.completions.create 引数を返す（同期/非同期で共通）。"""
+    s = get_settings()
     tools: list[ChatCompletionToolParam] = [return_scenes_tool()]
+    return {
+        "model": s.model_llm,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        "temperature": 0.2,
+        "tools": tools,
+        "tool_choice": return_scenes_tool_choice(),
+    }
+
+
+def _parse_split_scenes_response(resp: ChatCompletion, text: str, system: str, user: str) -> list[SceneSpec]:
+    """シーン分割のレスポンス（tool call またはテキストJSON）を SceneSpec 配列へ変換する。"""
+    choice = resp.choices[0]
+    tool_calls = choice.message.tool_calls or []
+    scenes_raw: list[Any]
+    if tool_calls:
+        tc0 = tool_calls[0]
+        # Be defensive across OpenAI SDK versions: prefer duck-typing.
+        func = getattr(tc0, "function", None)
+        args_str = getattr(func, "arguments", None) or "{}"
+        if env_truthy("PYTEST", "0"):
+            log("[split_scenes/tools] system=\n", system)
+            log("[split_scenes/tools] user=\n", user)
+            log("[split_scenes/tools] args=\n", args_str)
+        data = json.loads(args_str)
+        scenes_raw = data.get("scenes", [])
+    else:
+        # フォールバック: 通常のテキストをJSONとして解釈
+        content = choice.message.content or "[]"
+        if env_truthy("PYTEST", "0"):
+            log("[split_scenes/fallback] raw=\n", content)
+        scenes_raw = json.loads(content)
 
+    # 日本語コメント: 有効なシーンが無い応答は例外にし、既定シーンへのフォールバックをメモ化しない
+    if not _has_scene_items(scenes_raw):
+        raise ValueError("split_scenes returned no scenes")
+    return _ensure_scene_specs(scenes_raw, text)
+
+
+def plan_story(text: str, max_scenes: int = 5) -> tuple[list[SceneSpec], str]:
+    """
+    シーン分割と全体スタイルの決定を1回の LLM 呼び出しで行う（融合プランニング）。
+
+    `return_scenes_tool(include_style_hint=True)` により、シーン配列とスタイルヒントを
+    同じツール呼び出しで受け取る。物語本文の入力トークンと待ち時間が1回分で済む。
+
+    Params:
+        text: 物語テキスト（日本語）
+        max_scenes: 分割するシーンの最大数
+    Returns:
+        (シーン仕様の配列, スタイルヒント)
+    備考:
+        融合呼び出しが失敗した場合は `split_scenes` + `decide_style_hint` の2回呼び出しに戻る。
+        スタイルヒントだけ欠けた場合は `decide_style_hint` のみ追加で呼ぶ。
+    """
+    client = openai_client()
+    system, user = _plan_story_messages(text, max_scenes)
     try:
-        resp = client.chat.completions.create(
-            model=s.model_llm,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            temperature=0.2,
-            tools=tools,
-            tool_choice=return_scenes_tool_choice(),
+        req = _tool_request(
+            system, user, 0.2, return_scenes_tool(include_style_hint=True), return_scenes_tool_choice()
         )
+        planned: dict[str, Any] = _memoized(
+            req,
+            lambda: _parse_plan_story_response(_complete(client, req), text, system, user),
+        )
+    except Exception as e:  # noqa: BLE001
+        log("[plan_story] fallback to split_scenes + decide_style_hint:", str(e))
+        return split_scenes(text, max_scenes=max_scenes), decide_style_hint(text)
 
-        choice = resp.choices[0]
-        tool_calls = choice.message.tool_calls or []
-        scenes_raw: list[Any]
-        if tool_calls:
-            tc0 = tool_calls[0]
-            # Be defensive across OpenAI SDK versions: prefer duck-typing.
-            func = getattr(tc0, "function", None)
-            args_str = getattr(func, "arguments", None) or "{}"
-            if env_truthy("PYTEST", "0"):
-                log("[split_scenes/tools] system=\n", system)
-                log("[split_scenes/tools] user=\n", user)
-                log("[split_scenes/tools] args=\n", args_str)
-            data = json.loads(args_str)
-            scenes_raw = data.get("scenes", [])
-        else:
-            # フォールバック: 通常のテキストをJSONとして解釈
-            content = choice.message.content or "[]"
-            if env_truthy("PYTEST", "0"):
-                log("[split_scenes/fallback] raw=\n", content)
-            scenes_raw = json.loads(content)
-
-        return _ensure_scene_specs(scenes_raw, text)
-    except Exception:
-        return _ensure_scene_specs([text], text)
+    scenes = _ensure_scene_specs(planned["scenes"], text)
+    style = str(planned.get("style_hint") or "") or decide_style_hint(text)
+    return scenes, style
+
+
+async def plan_story_async(text: str, max_scenes: int = 5) -> tuple[list[SceneSpec], str]:
+    """`plan_story` の非同期版（フォールバック時は2つの呼び出しを並行実行）。"""
+    client = openai_async_client()
+    system, user = _plan_story_messages(text, max_scenes)
+    try:
+        req = _tool_request(
+            system, user, 0.2, return_scenes_tool(include_style_hint=True), return_scenes_tool_choice()
+        )
+
+        async def _call() -> Any:
+            return _parse_plan_story_response(
+                await _complete_async(client, req), text, system, user
+            )
+
+        planned: dict[str, Any] = await _memoized_async(req, _call)
+    except Exception as e:  # noqa: BLE001
+        log("[plan_story_async] fallback to split_scenes + decide_style_hint:", str(e))
+        scenes_fb, style_fb = await asyncio.gather(
+            split_scenes_async(text, max_scenes=max_scenes), decide_style_hint_async(text)
+        )
+        return scenes_fb, style_fb
+
+    scenes = _ensure_scene_specs(planned["scenes"], text)
+    style = str(planned.get("style_hint") or "") or await decide_style_hint_async(text)
+    return scenes, style
+
+
+def _plan_story_messages(text: str, max_scenes: int) -> tuple[str, str]:
+    _, user = _split_scenes_messages(
+        text,
+        max_scenes,
+        extra_instructions=(
+            "あわせて、作品全体に最適なビジュアルスタイル指示を style_hint に1行で入れてください"
+            "（日本語、読点で区切られた短い語句列、10〜40文字程度）。"
+        ),
+    )
+    return plan_story_system(), user
+
+
+def _parse_plan_story_response(resp: ChatCompletion, text: str, system: str, user: str) -> dict[str, Any]:
+    """融合プランニングの tool call を {"scenes": [...], "style_hint": str} に変換する。"""
+    data = _tool_arguments(resp)
+    if env_truthy("PYTEST", "0"):
+        log("[plan_story] system=\n", system)
+        log("[plan_story] user=\n", user)
+        log("[plan_story] args=\n", data)
+    scenes_raw = data.get("scenes")
+    if not _has_scene_items(scenes_raw):
+        raise ValueError("plan_story returned no scenes")
+    style_lines = str(data.get("style_hint") or "").strip().splitlines()
+    style = style_lines[0].strip("\"' ") if style_lines else ""
+    return {"scenes": _ensure_scene_specs(cast(list[Any], scenes_raw), text), "style_hint": style}
+
+
+def _has_scene_items(scenes_raw: Any) -> bool:
+    """モデル応答に `_ensure_scene_specs` が採用できるシーン（空でない文字列または dict）があるか。"""
+    if not isinstance(scenes_raw, list):
+        return False
+    return any(
+        isinstance(item, dict) or (isinstance(item, str) and item.strip())
+        for item in cast(list[Any], scenes_raw)
+    )
 
 
-def _ensure_scene_specs(scenes_raw: list[Any], original_text: str) -> List[SceneSpec]:
+def _ensure_scene_specs(scenes_raw: list[Any], original_text: str) -> list[SceneSpec]:
     """返却データを厳密な SceneSpec 配列へ正規化する。"""
     if not isinstance(scenes_raw, list) or not scenes_raw:
         return [
@@ -180,36 +439,226 @@ def _ensure_scene_specs(scenes_raw: list[Any], original_text: str) -> List[Scene
 
 def build_image_prompt(scene_text: str, style_hint: str | None = None) -> str:
     """画像生成用の短い英語プロンプトを構築する。"""
-    s = get_settings()
-    # OpenAI クライアントは関数内で生成（将来ライブラリ変更に備え局所化）
-    from openai import OpenAI
+    # OpenAI クライアントは共有レジストリから取得（コネクションプールを再利用）
+    client = openai_client()
+    system, user = _image_prompt_messages(scene_text, style_hint)
+    try:
+        req = _chat_request(system, user, 0.4)
+        return _memoized(
+            req, lambda: _parse_image_prompt_response(_complete(client, req), system, user)
+        )
+    except Exception as e:  # noqa: BLE001
+        log("[build_image_prompt] fallback:", str(e))
+        # fallback: simple concatenation in English-ish
+        return f"Picture book style, soft colors: {scene_text}"
 
-    s = get_settings()
-    client = OpenAI(
-        api_key=s.openai_api_key or os.getenv("OPENAI_API_KEY", ""),
-        base_url=s.openai_base_url,
+
+async def build_image_prompt_async(scene_text: str, style_hint: str | None = None) -> str:
+    """`build_image_prompt` の非同期版。"""
+    client = openai_async_client()
+    system, user = _image_prompt_messages(scene_text, style_hint)
+    try:
+        req = _chat_request(system, user, 0.4)
+
+        async def _call() -> Any:
+            return _parse_image_prompt_response(await _complete_async(client, req), system, user)
+
+        return await _memoized_async(req, _call)
+    except Exception as e:  # noqa: BLE001
+        log("[build_image_prompt_async] fallback:", str(e))
+        return f"Picture book style, soft colors: {scene_text}"
+
+
+def scene_style_hint(
+    spec: SceneSpec, style_global: str, idx: int, follow_previous: bool = True
+) -> str:
+    """シーン固有の画像ヒントを全体スタイルに補助的に付与する（idx は1始まり）。
+
+    follow_previous=False（アンカー一貫性モード）では、前のシーンを参照しないため
+    「前のシーンと同一の〜」の指示を付けない。
+    """
+    # スタイルはストーリーに応じて可変（ビジネス説明/絵本/アニメ等）
+    style_hint = style_global
+    if spec.get("image_hint"):
+        style_hint = f"{style_global}、{spec['image_hint']}"
+    if follow_previous and idx > 1:
+        style_hint = f"{style_hint}、前のシーンと同一のキャラクターデザイン・配色・トーンを維持"
+    return style_hint
+
+
+def build_image_prompts_batch(
+    scenes: Sequence[SceneSpec], style_hint: str | None = None, follow_previous: bool = True
+) -> list[str]:
+    """
+    全シーンの英語画像プロンプトを1回の LLM 呼び出し（ツール呼び出し）でまとめて生成する。
+
+    Params:
+        scenes: シーン仕様の配列
+        style_hint: 全体のスタイル指示（各シーンの image_hint は補助として添える）
+        follow_previous: フォールバック時、2シーン目以降に前のシーンとの一貫性指示を付けるか
+                         （`scene_style_hint` に渡す）
+    Returns:
+        シーン順の画像プロンプト配列（件数は scenes と同じ）
+    備考:
+        一括呼び出しが失敗した場合、または件数が揃わない場合は
+        `build_image_prompt` をシーンごとに並行して呼び出してフォールバックする
+        （同時実行数は STORY_MAX_WORKERS まで）。
+    """
+    if not scenes:
+        return []
+    client = openai_client()
+    system, user = _image_prompts_batch_messages(scenes, style_hint)
+    try:
+        req = _tool_request(
+            system, user, 0.4, return_image_prompts_tool(), return_image_prompts_tool_choice()
+        )
+        return _memoized(
+            req,
+            lambda: _parse_image_prompts_batch_response(
+                _complete(client, req), len(scenes), system, user
+            ),
+        )
+    except Exception as e:  # noqa: BLE001
+        log("[build_image_prompts_batch] fallback to per-scene calls:", str(e))
+        style = style_hint or ""
+
+        def _one(i: int, sp: SceneSpec) -> Callable[[], str]:
+            hint = scene_style_hint(sp, style, i, follow_previous=follow_previous)
+            return lambda: build_image_prompt(sp["text"], style_hint=hint)
+
+        return _run_parallel([_one(i, sp) for i, sp in enumerate(scenes, start=1)], "image-prompt")
+
+
+async def build_image_prompts_batch_async(
+    scenes: Sequence[SceneSpec], style_hint: str | None = None, follow_previous: bool = True
+) -> list[str]:
+    """`build_image_prompts_batch` の非同期版（フォールバック時はシーンごとに並行実行）。"""
+    if not scenes:
+        return []
+    client = openai_async_client()
+    system, user = _image_prompts_batch_messages(scenes, style_hint)
+    try:
+        req = _tool_request(
+            system, user, 0.4, return_image_prompts_tool(), return_image_prompts_tool_choice()
+        )
+
+        async def _call() -> Any:
+            return _parse_image_prompts_batch_response(
+                await _complete_async(client, req), len(scenes), system, user
+            )
+
+        return await _memoized_async(req, _call)
+    except Exception as e:  # noqa: BLE001
+        log("[build_image_prompts_batch_async] fallback to per-scene calls:", str(e))
+        style = style_hint or ""
+        return list(
+            await asyncio.gather(
+                *(
+                    build_image_prompt_async(
+                        sp["text"],
+                        style_hint=scene_style_hint(sp, style, i, follow_previous=follow_previous),
+                    )
+                    for i, sp in enumerate(scenes, start=1)
+                )
+            )
+        )
+
+
+def _image_prompts_batch_messages(
+    scenes: Sequence[SceneSpec], style_hint: str | None
+) -> tuple[str, str]:
+    style = style_hint or "絵本風, 明るい色彩, やさしい雰囲気"
+    system = image_prompt_system()
+    lines: list[str] = []
+    for i, sp in enumerate(scenes, start=1):
+        lines.append(f"[{i}] シーン:\n{sp['text']}")
+        if sp.get("image_hint"):
+            lines.append(f"[{i}] 画像ヒント: {sp['image_hint']}")
+    user = (
+        f"以下の{len(scenes)}個のシーンそれぞれについて、英語の画像プロンプトを作ってください。"
+        "全シーンで同一のキャラクターデザイン・配色・トーンを維持するよう、各プロンプトに明記してください。"
+        "返答は用意された関数を必ず呼び出し、すべてのシーン番号を1回ずつ含めてください。\n\n"
+        f"スタイル指示: {style}\n\n" + "\n\n".join(lines)
     )
+    return system, user
+
+
+def _parse_image_prompts_batch_response(resp: ChatCompletion, count: int, system: str, user: str) -> list[str]:
+    """一括画像プロンプトの tool call を検証してシーン順の配列にする。件数不足は例外。"""
+    data = _tool_arguments(resp)
+    if env_truthy("PYTEST", "0"):
+        log("[build_image_prompts_batch] system=\n", system)
+        log("[build_image_prompts_batch] user=\n", user)
+        log("[build_image_prompts_batch] args=\n", data)
+    by_index: dict[int, str] = {}
+    for item in cast(list[Any], data.get("prompts") or []):
+        if not isinstance(item, dict):
+            continue
+        item_dict = cast(dict[str, Any], item)
+        try:
+            idx = int(item_dict.get("index", 0))
+        except (TypeError, ValueError):
+            continue
+        prompt = str(item_dict.get("prompt", "")).strip()
+        if 1 <= idx <= count and prompt:
+            by_index[idx] = prompt
+    if len(by_index) != count:
+        raise ValueError(f"expected {count} image prompts, got {len(by_index)}")
+    return [by_index[i] for i in range(1, count + 1)]
+
+
+def _tool_request(
+    system: str,
+    user: str,
+    temperature: float,
+    tool: ChatCompletionToolParam,
+    tool_choice: Any,
+) -> dict[str, Any]:
+    """ツール呼び出しを強制する chat.completions.create 引数を返す（同期/非同期で共通）。"""
+    req = _chat_request(system, user, temperature)
+    req["tools"] = [tool]
+    req["tool_choice"] = tool_choice
+    return req
+
+
+def _tool_arguments(resp: ChatCompletion) -> dict[str, Any]:
+    """先頭の tool call の arguments(JSON) を辞書で返す。tool call がなければ例外。"""
+    tool_calls = resp.choices[0].message.tool_calls or []
+    if not tool_calls:
+        raise ValueError("no tool call in response")
+    # Be defensive across OpenAI SDK versions: prefer duck-typing.
+    func = getattr(tool_calls[0], "function", None)
+    args_str = getattr(func, "arguments", None) or "{}"
+    return cast(dict[str, Any], json.loads(args_str))
+
+
+def _chat_request(system: str, user: str, temperature: float) -> dict[str, Any]:
+    """ツールを使わない chat.completions.create 引数を返す（同期/非同期で共通）。"""
+    s = get_settings()
+    return {
+        "model": s.model_llm,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        "temperature": temperature,
+    }
+
+
+def _image_prompt_messages(scene_text: str, style_hint: str | None) -> tuple[str, str]:
     style = style_hint or "絵本風, 明るい色彩, やさしい雰囲気"
     system = image_prompt_system()
     user = f"シーン:\n{scene_text}\n\nスタイル指示: {style}\n\n英語で画像プロンプトを作って"
-    try:
-        resp = client.chat.completions.create(
-            model=s.model_llm,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            temperature=0.4,
-        )
-        content = (resp.choices[0].message.content or "").strip()
-        if env_truthy("PYTEST", "0"):
-            log("[build_image_prompt] system=\n", system)
-            log("[build_image_prompt] user=\n", user)
-            log("[build_image_prompt] result=\n", content)
-        return content
-    except Exception:
-        # fallback: simple concatenation in English-ish
-        return f"Picture book style, soft colors: {scene_text}"
+    return system, user
+
+
+def _parse_image_prompt_response(resp: ChatCompletion, system: str, user: str) -> str:
+    content = (resp.choices[0].message.content or "").strip()
+    if env_truthy("PYTEST", "0"):
+        log("[build_image_prompt] system=\n", system)
+        log("[build_image_prompt] user=\n", user)
+        log("[build_image_prompt] result=\n", content)
+    return content
 
 
 def decide_style_hint(story_text: str) -> str:
@@ -221,40 +670,56 @@ def decide_style_hint(story_text: str) -> str:
     Returns:
         スタイルヒント文字列（例: "絵本風、明るい色彩、やさしい雰囲気"）
     """
-    s = get_settings()
-    # OpenAI クライアントは関数内で生成
-    from openai import OpenAI
+    # OpenAI クライアントは共有レジストリから取得
+    client = openai_client()
 
-    client = OpenAI(
-        api_key=s.openai_api_key or os.getenv("OPENAI_API_KEY", ""),
-        base_url=s.openai_base_url,
-    )
+    system, user = _style_hint_messages(story_text)
+    try:
+        req = _chat_request(system, user, 0.2)
+        return _memoized(
+            req, lambda: _parse_style_hint_response(_complete(client, req), system, user)
+        )
+    except Exception as e:  # noqa: BLE001
+        log("[decide_style_hint] fallback:", str(e))
+        # 失敗時は保守的な既定値（絵本風）
+        return DEFAULT_STYLE_HINT
+
+
+async def decide_style_hint_async(story_text: str) -> str:
+    """`decide_style_hint` の非同期版。"""
+    client = openai_async_client()
+
+    system, user = _style_hint_messages(story_text)
+    try:
+        req = _chat_request(system, user, 0.2)
 
+        async def _call() -> Any:
+            return _parse_style_hint_response(await _complete_async(client, req), system, user)
+
+        return await _memoized_async(req, _call)
+    except Exception as e:  # noqa: BLE001
+        log("[decide_style_hint_async] fallback:", str(e))
+        return DEFAULT_STYLE_HINT
+
+
+def _style_hint_messages(story_text: str) -> tuple[str, str]:
     system = style_hint_system()
     user = (
         "次の内容を読み、最適なビジュアルスタイル指示を1行だけ返してください。"
         "日本語、読点で区切られた短い語句列で、10〜40文字程度に収めてください。\n\n"
         f"本文:\n{story_text}"
     )
-    try:
-        resp = client.chat.completions.create(
-            model=s.model_llm,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            temperature=0.2,
-        )
-        content = (resp.choices[0].message.content or "").strip()
-        if env_truthy("PYTEST", "0"):
-            log("[decide_style_hint] system=\n", system)
-            log("[decide_style_hint] user=\n", user)
-            log("[decide_style_hint] result=\n", content)
-        # 余計な改行や引用符を削る
-        return content.splitlines()[0].strip("\"' ")
-    except Exception:
-        # 失敗時は保守的な既定値（絵本風）
-        return "絵本風、明るい色彩、やさしい雰囲気"
+    return system, user
+
+
+def _parse_style_hint_response(resp: ChatCompletion, system: str, user: str) -> str:
+    content = (resp.choices[0].message.content or "").strip()
+    if env_truthy("PYTEST", "0"):
+        log("[decide_style_hint] system=\n", system)
+        log("[decide_style_hint] user=\n", user)
+        log("[decide_style_hint] result=\n", content)
+    # 余計な改行や引用符を削る
+    return content.splitlines()[0].strip("\"' ")
 
 
 def build_voice_script(scene_text: str, voice_hint: str | None = None) -> str:
@@ -267,14 +732,171 @@ def build_voice_script(scene_text: str, voice_hint: str | None = None) -> str:
     Returns:
         読み上げ用の短いセリフ（1〜3文程度）
     """
-    s = get_settings()
-    from openai import OpenAI
+    client = openai_client()
 
-    client = OpenAI(
-        api_key=s.openai_api_key or os.getenv("OPENAI_API_KEY", ""),
-        base_url=s.openai_base_url,
+    system, user = _voice_script_messages(scene_text, voice_hint)
+    try:
+        req = _chat_request(system, user, 0.3)
+        return _memoized(
+            req, lambda: _parse_voice_script_response(_complete(client, req), system, user)
+        )
+    except Exception as e:  # noqa: BLE001
+        log("[build_voice_script] fallback:", str(e))
+        # フォールバック: シーン本文をそのまま使う
+        return _sanitize_voice_script(scene_text)
+
+
+async def build_voice_script_async(scene_text: str, voice_hint: str | None = None) -> str:
+    """`build_voice_script` の非同期版。"""
+    client = openai_async_client()
+
+    system, user = _voice_script_messages(scene_text, voice_hint)
+    try:
+        req = _chat_request(system, user, 0.3)
+
+        async def _call() -> Any:
+            return _parse_voice_script_response(await _complete_async(client, req), system, user)
+
+        return await _memoized_async(req, _call)
+    except Exception as e:  # noqa: BLE001
+        log("[build_voice_script_async] fallback:", str(e))
+        return _sanitize_voice_script(scene_text)
+
+
+def build_voice_scripts_batch(scenes: Sequence[SceneSpec]) -> list[str]:
+    """
+    voice_script が空のシーンについて、セリフを1回の LLM 呼び出しでまとめて生成する。
+
+    Params:
+        scenes: シーン仕様の配列（voice_script が既にあるシーンは文脈としてのみ使う）
+    Returns:
+        シーン順のセリフ配列（既存の voice_script はそのまま、生成分は `_sanitize_voice_script` 済み）
+    備考:
+        全シーンを一度に渡すため、連結して読んだときの繋がり（代名詞・接続表現）を保ちやすい。
+        一括呼び出しが失敗した場合は `build_voice_script` をシーンごとに並行して呼び出す
+        （同時実行数は STORY_MAX_WORKERS まで）。
+    """
+    missing = _missing_voice_indices(scenes)
+    if not missing:
+        return [sp["voice_script"] for sp in scenes]
+    client = openai_client()
+    system, user = _voice_scripts_batch_messages(scenes, missing)
+    try:
+        req = _tool_request(
+            system, user, 0.3, return_voice_scripts_tool(), return_voice_scripts_tool_choice()
+        )
+        generated: dict[str, str] = _memoized(
+            req,
+            lambda: _parse_voice_scripts_batch_response(
+                _complete(client, req), missing, system, user
+            ),
+        )
+    except Exception as e:  # noqa: BLE001
+        log("[build_voice_scripts_batch] fallback to per-scene calls:", str(e))
+
+        def _one(i: int) -> Callable[[], str]:
+            sp = scenes[i - 1]
+            return lambda: build_voice_script(sp["text"], sp.get("voice_hint") or None)
+
+        scripts = _run_parallel([_one(i) for i in missing], "voice-script")
+        generated = {str(i): script for i, script in zip(missing, scripts)}
+    return _merge_voice_scripts(scenes, generated)
+
+
+async def build_voice_scripts_batch_async(scenes: Sequence[SceneSpec]) -> list[str]:
+    """`build_voice_scripts_batch` の非同期版（フォールバック時はシーンごとに並行実行）。"""
+    missing = _missing_voice_indices(scenes)
+    if not missing:
+        return [sp["voice_script"] for sp in scenes]
+    client = openai_async_client()
+    system, user = _voice_scripts_batch_messages(scenes, missing)
+    try:
+        req = _tool_request(
+            system, user, 0.3, return_voice_scripts_tool(), return_voice_scripts_tool_choice()
+        )
+
+        async def _call() -> Any:
+            return _parse_voice_scripts_batch_response(
+                await _complete_async(client, req), missing, system, user
+            )
+
+        generated: dict[str, str] = await _memoized_async(req, _call)
+    except Exception as e:  # noqa: BLE001
+        log("[build_voice_scripts_batch_async] fallback to per-scene calls:", str(e))
+        scripts = await asyncio.gather(
+            *(
+                build_voice_script_async(scenes[i - 1]["text"], scenes[i - 1].get("voice_hint") or None)
+                for i in missing
+            )
+        )
+        generated = {str(i): sc for i, sc in zip(missing, scripts)}
+    return _merge_voice_scripts(scenes, generated)
+
+
+def _missing_voice_indices(scenes: Sequence[SceneSpec]) -> list[int]:
+    return [i for i, sp in enumerate(scenes, start=1) if not (sp.get("voice_script") or "").strip()]
+
+
+def _merge_voice_scripts(scenes: Sequence[SceneSpec], generated: dict[str, str]) -> list[str]:
+    """既存の voice_script と生成分をシーン順に並べる（生成分のキーは JSON 互換の文字列番号）。"""
+    return [
+        generated.get(str(i)) or sp.get("voice_script") or ""
+        for i, sp in enumerate(scenes, start=1)
+    ]
+
+
+def _voice_scripts_batch_messages(
+    scenes: Sequence[SceneSpec], missing: list[int]
+) -> tuple[str, str]:
+    system = voice_script_system()
+    lines: list[str] = []
+    for i, sp in enumerate(scenes, start=1):
+        lines.append(f"[{i}] シーン:\n{sp['text']}")
+        hint = (sp.get("voice_hint") or "").strip()
+        if hint:
+            lines.append(f"[{i}] 音声スタイル指示: {hint}")
+        if sp.get("voice_script"):
+            lines.append(f"[{i}] 既存のセリフ（変更しない）: {sp['voice_script']}")
+    targets = ", ".join(str(i) for i in missing)
+    user = (
+        f"以下は物語の全{len(scenes)}シーンです。シーン番号 {targets} について、"
+        "TTS向けに『話すべきセリフ/ナレーションのみ』を短く作成してください（各1〜2文）。"
+        "背景説明・心情解説・カメラ指示・効果音指示、引用符や括弧、ラベルは含めないでください。"
+        "すべてのセリフを先頭から順に連結して読んだときに、不自然な繰り返しがなく自然につながるよう、"
+        "前後のシーン（既存のセリフを含む）を踏まえて代名詞や接続表現を使ってください。"
+        "返答は用意された関数を必ず呼び出してください。\n\n" + "\n\n".join(lines)
     )
+    return system, user
+
+
+def _parse_voice_scripts_batch_response(
+    resp: ChatCompletion, missing: list[int], system: str, user: str
+) -> dict[str, str]:
+    """一括セリフの tool call を検証し、シーン番号(文字列) → セリフ の辞書にする。不足は例外。"""
+    data = _tool_arguments(resp)
+    if env_truthy("PYTEST", "0"):
+        log("[build_voice_scripts_batch] system=\n", system)
+        log("[build_voice_scripts_batch] user=\n", user)
+        log("[build_voice_scripts_batch] args=\n", data)
+    wanted = set(missing)
+    result: dict[str, str] = {}
+    for item in cast(list[Any], data.get("scripts") or []):
+        if not isinstance(item, dict):
+            continue
+        item_dict = cast(dict[str, Any], item)
+        try:
+            idx = int(item_dict.get("index", 0))
+        except (TypeError, ValueError):
+            continue
+        script = _sanitize_voice_script(str(item_dict.get("voice_script", "")))
+        if idx in wanted and script:
+            result[str(idx)] = script
+    if len(result) != len(wanted):
+        raise ValueError(f"expected {len(wanted)} voice scripts, got {len(result)}")
+    return result
+
 
+def _voice_script_messages(scene_text: str, voice_hint: str | None) -> tuple[str, str]:
     system = voice_script_system()
     hint = (voice_hint or "").strip() or "ナレーション: 丁寧でわかりやすく、ゆっくりめ"
     user = (
@@ -285,24 +907,16 @@ def build_voice_script(scene_text: str, voice_hint: str | None = None) -> str:
         + scene_text
         + "\n\n音声スタイル指示: " + hint + "\n\n出力は読み上げやすい日本語の短い文（1〜2文）だけを返してください。"
     )
-    try:
-        resp = client.chat.completions.create(
-            model=s.model_llm,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            temperature=0.3,
-        )
-        content = (resp.choices[0].message.content or "").strip()
-        if env_truthy("PYTEST", "0"):
-            log("[build_voice_script] system=\n", system)
-            log("[build_voice_script] user=\n", user)
-            log("[build_voice_script] result=\n", content)
-        return _sanitize_voice_script(content)
-    except Exception:
-        # フォールバック: シーン本文をそのまま使う
-        return _sanitize_voice_script(scene_text)
+    return system, user
+
+
+def _parse_voice_script_response(resp: ChatCompletion, system: str, user: str) -> str:
+    content = (resp.choices[0].message.content or "").strip()
+    if env_truthy("PYTEST", "0"):
+        log("[build_voice_script] system=\n", system)
+        log("[build_voice_script] user=\n", user)
+        log("[build_voice_script] result=\n", content)
+    return _sanitize_voice_script(content)
 
 
 def _sanitize_voice_script(text: str) -> str:
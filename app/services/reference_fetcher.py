@@ -0,0 +1,161 @@
+"""
+HTTP 参照画像の取得（並列・サイズ上限付き・条件付きリクエスト対応のディスクキャッシュ）。
+
+- 複数 URL を共有の httpx クライアント（keep-alive）で並列に取得する
+- レスポンスはストリームで読み、`REF_HTTP_MAX_MB` を超えた時点で打ち切る
+- Content-Type が image/* でない（かつ中身も画像でない）応答は捨てる
+- 取得結果を ETag / Last-Modified とともに保存し、次回は If-None-Match / If-Modified-Since で再検証する。
+  Cache-Control: max-age の間は再検証もしない
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any
+
+import httpx
+
+from app.config.settings import get_settings
+from app.utils.disk_cache import DiskCache
+from app.utils.env import cache_root
+from app.utils.images import image_mime
+from app.utils.log import log
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class ReferenceFetchError(RuntimeError):
+    """参照画像として使えない応答（サイズ超過・画像以外など）。"""
+
+
+@lru_cache(maxsize=1)
+def _http_client() -> httpx.Client:
+    """参照画像取得用の共有 HTTP クライアント（コネクションを再利用）。"""
+    s = get_settings()
+    return httpx.Client(
+        timeout=httpx.Timeout(s.ref_http_timeout_sec),
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=s.ref_http_max_concurrency * 2),
+    )
+
+
+@lru_cache(maxsize=1)
+def _ref_cache() -> DiskCache | None:
+    """取得済み参照画像のディスクキャッシュ（REF_HTTP_CACHE=1 のときのみ有効）。"""
+    s = get_settings()
+    if not s.ref_http_cache_enabled:
+        return None
+    return DiskCache(cache_root() / "http_refs", s.ref_http_cache_max_mb * 1024 * 1024)
+
+
+def fetch_reference_images(urls: Sequence[str]) -> list[bytes]:
+    """
+    URL 群から参照画像を並列に取得し、入力順に返す（取得できなかった URL は除外）。
+
+    Params:
+        urls: 画像の URL（http/https）
+    Returns:
+        画像バイト列の配列
+    """
+    targets = [u for u in urls if isinstance(u, str) and u]
+    if not targets:
+        return []
+    workers = max(1, min(get_settings().ref_http_max_concurrency, len(targets)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_fetch_or_none, targets))
+    return [r for r in results if r is not None]
+
+
+def _fetch_or_none(url: str) -> bytes | None:
+    try:
+        return fetch_reference_image(url)
+    except Exception as e:  # noqa: BLE001 - 取得できない参照画像は理由を問わずスキップする
+        log("[reference_fetcher] skip", url, ":", str(e))
+        return None
+
+
+def fetch_reference_image(url: str) -> bytes:
+    """1つの URL を取得する（キャッシュがあれば再検証して使い回す）。失敗時は例外。"""
+    cache = _ref_cache()
+    body_key = DiskCache.make_key("body", url)
+    meta_key = DiskCache.make_key("meta", url)
+    meta: dict[str, Any] = {}
+    cached: bytes | None = None
+    if cache is not None:
+        raw_meta = cache.get(meta_key)
+        if raw_meta is not None:
+            meta = json.loads(raw_meta.decode("utf-8"))
+            cached = cache.get(body_key)
+    if cached is not None and time.time() < float(meta.get("fresh_until", 0)):
+        return cached
+
+    headers: dict[str, str] = {}
+    if cached is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = str(meta["etag"])
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = str(meta["last_modified"])
+
+    max_bytes = get_settings().ref_http_max_bytes
+    with _http_client().stream("GET", url, headers=headers) as resp:
+        if resp.status_code == 304 and cached is not None:
+            data = cached
+        else:
+            resp.raise_for_status()
+            data = _read_limited(resp, max_bytes)
+            _validate_image(resp.headers.get("content-type", ""), data)
+        new_meta: dict[str, Any] = {
+            "etag": resp.headers.get("etag") or meta.get("etag"),
+            "last_modified": resp.headers.get("last-modified")
+            or meta.get("last_modified"),
+            "fresh_until": time.time()
+            + _max_age(resp.headers.get("cache-control", "")),
+            "no_store": "no-store" in resp.headers.get("cache-control", "").lower(),
+        }
+
+    if cache is not None and not new_meta["no_store"]:
+        if data is not cached:
+            cache.put(body_key, data)
+        cache.put(meta_key, json.dumps(new_meta).encode("utf-8"))
+    return data
+
+
+def _read_limited(resp: httpx.Response, max_bytes: int) -> bytes:
+    """最大 `max_bytes` までストリームで読み込む。超えたら ReferenceFetchError。"""
+    length = resp.headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise ReferenceFetchError(f"too large: {length} bytes > {max_bytes}")
+    chunks: list[bytes] = []
+    total = 0
+    for chunk in resp.iter_bytes():
+        total += len(chunk)
+        if total > max_bytes:
+            raise ReferenceFetchError(f"too large: more than {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _validate_image(content_type: str, data: bytes) -> None:
+    """Content-Type が image/* か、種類不明の応答でも中身が画像であることを確認する。"""
+    mime = content_type.split(";")[0].strip().lower()
+    if mime.startswith("image/"):
+        return
+    if (
+        mime in ("", "application/octet-stream", "binary/octet-stream")
+        and image_mime(data, "") != ""
+    ):
+        return
+    raise ReferenceFetchError(f"not an image: content-type={content_type!r}")
+
+
+def _max_age(cache_control: str) -> float:
+    """再検証なしで使ってよい秒数（Cache-Control: max-age。no-cache/no-store なら 0）。"""
+    if "no-cache" in cache_control.lower() or "no-store" in cache_control.lower():
+        return 0.0
+    m = _MAX_AGE_RE.search(cache_control)
+    return float(m.group(1)) if m else 0.0
@@ -1,24 +1,60 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import dataclasses
 import time
-from collections.abc import Sequence
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from collections.abc import Awaitable, Callable, Sequence
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple, List, Literal
-from urllib.request import Request, urlopen
+from typing import Any, Literal
 
 from app.config.settings import get_settings
 from app.services.llm_service import (
     split_scenes,
+    plan_story,
+    plan_story_async,
     build_image_prompt,
     decide_style_hint,
     build_voice_script,
+    split_scenes_async,
+    build_image_prompt_async,
+    build_image_prompts_batch,
+    build_image_prompts_batch_async,
+    build_voice_scripts_batch,
+    build_voice_scripts_batch_async,
+    scene_style_hint,
+    decide_style_hint_async,
+    build_voice_script_async,
+    DEFAULT_STYLE_HINT,
     SceneSpec,
 )
-from app.services.image_service import generate_image
-from app.services.tts_service import generate_tts
-from app.pipelines.compose_video import compose_scene_video, SceneMedia
+from app.services.job_manifest import (
+    MANIFEST_FILENAME,
+    JobManifest,
+    job_dir,
+    new_job_id,
+)
+from app.services.reference_fetcher import fetch_reference_images
+from app.services.image_service import generate_image, generate_image_async
+from app.services.tts_service import generate_tts, generate_tts_async
+from app.pipelines.compose_video import (
+    compose_scene_video,
+    compose_scene_video_async,
+    RenderProfile,
+    RenderProfileLiteral,
+    SceneMedia,
+    StreamingSceneComposer,
+    AsyncStreamingSceneComposer,
+    render_profile,
+)
 from app.utils.env import env_truthy, outputs_root
+from app.utils.images import normalize_reference_image
+from app.utils.log import log
+from app.utils.scheduler import AsyncTaskGraph, TaskGraph
+from prompts import anchor_image_prompt
 
 
 ImageAspectLiteral = Literal[
@@ -33,8 +69,8 @@ ImageAspectLiteral = Literal[
 ]
 
 
-# 日本語コメント: HTTP参照画像の取得に利用するタイムアウト（秒）
-DEFAULT_HTTP_TIMEOUT = 5.0
+# 日本語コメント: rolling は直近シーン画像を参照（逐次）、anchor は先頭のアンカー画像のみ参照（並列）
+ConsistencyModeLiteral = Literal["rolling", "anchor"]
 
 
 @dataclass(slots=True)
@@ -44,13 +80,31 @@ class StoryGenerationOptions:
     reference_images: Sequence[bytes] = ()
     local_images: Sequence[str] = ()
     http_images: Sequence[str] = ()
+    # 日本語コメント: シーン並列処理の同時実行数（未指定時は設定値 STORY_MAX_WORKERS）
+    max_workers: int | None = None
+    # 日本語コメント: シーン完成ごとにセグメントをエンコードするか（未指定時は設定値 STREAMING_COMPOSE）
+    streaming_compose: bool | None = None
+    # 日本語コメント: 画像プロンプト等を全シーン分まとめて1回の LLM 呼び出しで作るか（未指定時は設定値 LLM_BATCH）
+    batch_llm: bool | None = None
+    # 日本語コメント: シーン分割とスタイル決定を1回の LLM 呼び出しで行うか（未指定時は設定値 FUSED_PLANNING）
+    fused_planning: bool | None = None
+    # 日本語コメント: 画像の一貫性の取り方 "rolling" / "anchor"（未指定時は設定値 CONSISTENCY_MODE）
+    consistency_mode: ConsistencyModeLiteral | None = None
+    # 日本語コメント: 動画の出力プロファイル "preview" / "native" / "1080p" / "vertical"（未指定時は設定値 RENDER_PROFILE）
+    render_profile: RenderProfileLiteral | None = None
+    # 日本語コメント: プロファイルのフレームレート/映像ビットレート（例: "4000k"）を上書きする場合に指定
+    render_fps: int | None = None
+    render_bitrate: str | None = None
+    # 日本語コメント: チェックポイントのジョブID（指定時は JOB_CHECKPOINT に関わらず記録。未指定時は自動採番）
+    job_id: str | None = None
 
     def iter_reference_images(self) -> Sequence[bytes]:
         return self.reference_images
 
 
-def _collect_reference_images(options: StoryGenerationOptions) -> List[bytes]:
-    refs: List[bytes] = []
+def _collect_reference_images(options: StoryGenerationOptions) -> list[bytes]:
+    """アップロード/ローカルパス/URL の参照画像を集め、送信用に正規化して返す。"""
+    refs: list[bytes] = []
 
     for img in options.reference_images:
         try:
@@ -67,19 +121,273 @@ def _collect_reference_images(options: StoryGenerationOptions) -> List[bytes]:
             continue
         refs.append(data)
 
-    for url in options.http_images:
-        if not isinstance(url, str) or not url:
-            continue
-        try:
-            req = Request(url, method="GET")
-            with urlopen(req, timeout=DEFAULT_HTTP_TIMEOUT) as resp:
-                data = resp.read()
-        except Exception:
-            continue
-        if isinstance(data, bytes):
-            refs.append(data)
+    # 日本語コメント: URL 指定は並列に取得（サイズ上限・画像形式の確認・条件付きリクエストのキャッシュ付き）
+    refs.extend(fetch_reference_images(list(options.http_images)))
+
+    # 日本語コメント: 全シーンの画像リクエストに添付されるため、長辺の縮小と再圧縮で先に小さくしておく
+    return [normalize_reference_image(data) for data in refs]
+
+
+def _generate_scene_image(
+    prompt: str,
+    size: str,
+    base_images: list[bytes],
+    scene_images: list[bytes],
+    anchor_image: bytes | None = None,
+) -> bytes:
+    """シーン画像を生成する（リトライは image_service 内の共通方針で行う）。"""
+    # 日本語コメント: 参照画像（最大5枚）で一貫性を補助 + 指定の縦横比で生成
+    return generate_image(
+        prompt,
+        size=size,
+        base_images=base_images,
+        scene_images=scene_images,
+        anchor_image=anchor_image,
+    )
+
+
+def _generate_scene_audio(voice_text: str, voice: str) -> bytes:
+    """ナレーション音声を生成する（リトライは tts_service 内の共通方針で行う）。"""
+    return generate_tts(voice_text, voice=voice, fmt="mp3")
+
+
+def _build_scene_graph(
+    scene_specs: list[SceneSpec],
+    style_global: str,
+    image_size: str,
+    base_reference_images: list[bytes],
+    voice: str,
+    max_workers: int,
+    on_scene_ready: Callable[[int, bytes, bytes], None] | None = None,
+    batch_llm: bool = False,
+    anchor_mode: bool = False,
+) -> TaskGraph:
+    """
+    シーンごとのアセット生成タスクを依存関係付きで組み立てる。
+
+    タスク構成（i はシーン番号, 1 始まり）:
+        - prompt:{i}  画像プロンプト構築（依存なし。計画完了後すぐに全シーン分を開始）
+                      batch_llm 時は全シーン分を1回で作る prompts タスクから取り出す
+        - image:{i}   画像生成（prompt:{i} と直近5シーンの image に依存）
+                      anchor_mode 時は直近シーンではなく anchor のみに依存
+        - anchor      anchor_mode 時のみ。キャラクター/スタイルのアンカー画像を1枚生成
+        - voice:{i}   セリフ確定（voice_script がなければ LLM で生成。依存なし）
+                      batch_llm 時は不足分を1回で作る voices タスクから取り出す
+        - tts:{i}     音声生成（voice:{i} に依存）
+        - ready:{i}   `on_scene_ready` 指定時のみ。image:{i} と tts:{i} の完成を通知
+    画像チェーンは直近シーン画像を参照するため逐次になるが、
+    プロンプト構築・セリフ生成・TTS は画像チェーンと並行して進む。
+    anchor_mode ではアンカー画像の完成後、全シーンの画像生成が並列に走る。
+    """
+    graph = TaskGraph(max_workers=max_workers)
+    if anchor_mode:
+        anchor_prompt = anchor_image_prompt(
+            style_global, [sp["text"] for sp in scene_specs]
+        )
+
+        def _anchor_task() -> bytes:
+            return _generate_scene_image(
+                anchor_prompt,
+                size=image_size,
+                base_images=base_reference_images,
+                scene_images=[],
+            )
+
+        graph.add("anchor", _anchor_task)
+    if batch_llm:
+
+        def _prompts_task() -> list[str]:
+            return build_image_prompts_batch(
+                scene_specs, style_global, follow_previous=not anchor_mode
+            )
+
+        graph.add("prompts", _prompts_task)
+
+        def _voices_task() -> list[str]:
+            return build_voice_scripts_batch(scene_specs)
+
+        graph.add("voices", _voices_task)
+    for idx, spec in enumerate(scene_specs, start=1):
+        scene_text = spec["text"]
+        # 日本語コメント: anchor モードは前のシーンを参照しないため「前のシーンと同一」の指示を付けない
+        style_hint = scene_style_hint(
+            spec, style_global, idx, follow_previous=not anchor_mode
+        )
+        if batch_llm:
+
+            def _pick_prompt(ps: list[str], i: int = idx) -> str:
+                return ps[i - 1]
+
+            graph.add(f"prompt:{idx}", _pick_prompt, deps=["prompts"])
+        else:
+
+            def _prompt_task(t: str = scene_text, h: str = style_hint) -> str:
+                return build_image_prompt(t, style_hint=h)
+
+            graph.add(f"prompt:{idx}", _prompt_task)
+
+        prev_keys = _image_reference_keys(idx, anchor_mode)
+
+        def _image_task(prompt: str, *ref_images: bytes) -> bytes:
+            # 日本語コメント: anchor モードの参照はアンカー画像1枚（直近シーン画像としては渡さない）
+            return _generate_scene_image(
+                prompt,
+                size=image_size,
+                base_images=base_reference_images,
+                scene_images=[] if anchor_mode else list(ref_images),
+                anchor_image=ref_images[0] if anchor_mode else None,
+            )
+
+        graph.add(f"image:{idx}", _image_task, deps=[f"prompt:{idx}", *prev_keys])
+
+        # シーンで用意された実際のセリフを優先。なければヒントを用いてセリフを生成。
+        def _voice_task(sp: SceneSpec = spec) -> str:
+            return sp.get("voice_script") or build_voice_script(
+                sp["text"], sp.get("voice_hint") or None
+            )
+
+        if batch_llm:
+
+            def _pick_voice(vs: list[str], i: int = idx) -> str:
+                return vs[i - 1]
+
+            graph.add(f"voice:{idx}", _pick_voice, deps=["voices"])
+        else:
+            graph.add(f"voice:{idx}", _voice_task)
+
+        def _tts_task(text: str) -> bytes:
+            return _generate_scene_audio(text, voice)
+
+        graph.add(f"tts:{idx}", _tts_task, deps=[f"voice:{idx}"])
+        if on_scene_ready is not None:
+
+            def _ready_task(img: bytes, aud: bytes, i: int = idx) -> None:
+                on_scene_ready(i, img, aud)
+
+            graph.add(f"ready:{idx}", _ready_task, deps=[f"image:{idx}", f"tts:{idx}"])
+    return graph
+
+
+async def _generate_scene_image_async(
+    prompt: str,
+    size: str,
+    base_images: list[bytes],
+    scene_images: list[bytes],
+    anchor_image: bytes | None = None,
+) -> bytes:
+    """`_generate_scene_image` の非同期版。"""
+    return await generate_image_async(
+        prompt,
+        size=size,
+        base_images=base_images,
+        scene_images=scene_images,
+        anchor_image=anchor_image,
+    )
+
+
+async def _generate_scene_audio_async(voice_text: str, voice: str) -> bytes:
+    """`_generate_scene_audio` の非同期版。"""
+    return await generate_tts_async(voice_text, voice=voice, fmt="mp3")
+
+
+def _build_scene_graph_async(
+    scene_specs: list[SceneSpec],
+    style_global: str,
+    image_size: str,
+    base_reference_images: list[bytes],
+    voice: str,
+    max_workers: int,
+    on_scene_ready: Callable[[int, bytes, bytes], None] | None = None,
+    batch_llm: bool = False,
+    anchor_mode: bool = False,
+) -> AsyncTaskGraph:
+    """`_build_scene_graph` の非同期版（タスク構成は同じ）。"""
+    graph = AsyncTaskGraph(max_concurrency=max_workers)
+    if anchor_mode:
+        anchor_prompt = anchor_image_prompt(
+            style_global, [sp["text"] for sp in scene_specs]
+        )
+
+        async def _anchor_task() -> bytes:
+            return await _generate_scene_image_async(
+                anchor_prompt,
+                size=image_size,
+                base_images=base_reference_images,
+                scene_images=[],
+            )
 
-    return refs
+        graph.add("anchor", _anchor_task)
+    if batch_llm:
+
+        async def _prompts_task() -> list[str]:
+            return await build_image_prompts_batch_async(
+                scene_specs, style_global, follow_previous=not anchor_mode
+            )
+
+        graph.add("prompts", _prompts_task)
+
+        async def _voices_task() -> list[str]:
+            return await build_voice_scripts_batch_async(scene_specs)
+
+        graph.add("voices", _voices_task)
+    for idx, spec in enumerate(scene_specs, start=1):
+        scene_text = spec["text"]
+        # 日本語コメント: anchor モードは前のシーンを参照しないため「前のシーンと同一」の指示を付けない
+        style_hint = scene_style_hint(
+            spec, style_global, idx, follow_previous=not anchor_mode
+        )
+
+        if batch_llm:
+
+            async def _pick_prompt(ps: list[str], i: int = idx) -> str:
+                return ps[i - 1]
+
+            graph.add(f"prompt:{idx}", _pick_prompt, deps=["prompts"])
+        else:
+
+            async def _prompt_task(t: str = scene_text, h: str = style_hint) -> str:
+                return await build_image_prompt_async(t, style_hint=h)
+
+            graph.add(f"prompt:{idx}", _prompt_task)
+
+        prev_keys = _image_reference_keys(idx, anchor_mode)
+
+        async def _image_task(prompt: str, *ref_images: bytes) -> bytes:
+            return await _generate_scene_image_async(
+                prompt,
+                size=image_size,
+                base_images=base_reference_images,
+                scene_images=[] if anchor_mode else list(ref_images),
+                anchor_image=ref_images[0] if anchor_mode else None,
+            )
+
+        graph.add(f"image:{idx}", _image_task, deps=[f"prompt:{idx}", *prev_keys])
+
+        async def _voice_task(sp: SceneSpec = spec) -> str:
+            return sp.get("voice_script") or await build_voice_script_async(
+                sp["text"], sp.get("voice_hint") or None
+            )
+
+        if batch_llm:
+
+            async def _pick_voice(vs: list[str], i: int = idx) -> str:
+                return vs[i - 1]
+
+            graph.add(f"voice:{idx}", _pick_voice, deps=["voices"])
+        else:
+            graph.add(f"voice:{idx}", _voice_task)
+
+        async def _tts_task(text: str) -> bytes:
+            return await _generate_scene_audio_async(text, voice)
+
+        graph.add(f"tts:{idx}", _tts_task, deps=[f"voice:{idx}"])
+        if on_scene_ready is not None:
+
+            async def _ready_task(img: bytes, aud: bytes, i: int = idx) -> None:
+                on_scene_ready(i, img, aud)
+
+            graph.add(f"ready:{idx}", _ready_task, deps=[f"image:{idx}", f"tts:{idx}"])
+    return graph
 
 
 def generate_from_story(
@@ -87,7 +395,7 @@ def generate_from_story(
     max_scenes: int | None = None,
     image_size: ImageAspectLiteral = "1024x576",
     options: StoryGenerationOptions | None = None,
-) -> Tuple[str, str, str, str]:
+) -> tuple[str, str, str, str]:
     """
     物語テキストからシーンを分割し、各シーンごとに画像と音声を生成する。
     すべてのシーンを1本のMP4動画に連結し、そのURLを返す。
@@ -105,114 +413,519 @@ def generate_from_story(
     備考:
         - image_size 未指定時は "1024x576" を使用。voice は設定値を使用。
         - テスト時(PYTEST=1)のみ各シーンの画像・音声をローカル保存し、先頭シーンのURLを返す
+        - JOB_CHECKPOINT 有効時（または options.job_id 指定時）は `outputs_root()/<job_id>/manifest.json` に途中経過を記録する。
+          失敗した場合は `resume_story(job_id)` で未完了の部分だけを再生成できる
     """
     if not story:
         raise ValueError("story must be non-empty")
 
-    s = get_settings()
-    # 日本語コメント: デフォルトは 1024x576
-    eff_img_size = image_size
     opts = options or StoryGenerationOptions()
-    base_reference_images = _collect_reference_images(opts)
-
-    # シーン分割
     eff_max = max_scenes if max_scenes is not None else 9999
-    scene_specs = split_scenes(story, max_scenes=eff_max)
-    if not scene_specs:
-        scene_specs = [
-            SceneSpec(
-                text=story or "",
-                image_hint="",
-                voice_hint="",
-                voice_script="",
-                sfx_hint="",
-            )
-        ]
+    job = _start_job(story, eff_max, image_size, opts)
+    try:
+        # 参照画像の収集 + シーン分割 + スタイルヒント決定（並行実行）
+        base_reference_images, scene_specs, style_global = _plan_story(
+            story, eff_max, opts
+        )
+        if job is not None:
+            job.save_plan(base_reference_images, scene_specs, style_global)
+        return _render_story(
+            scene_specs, style_global, image_size, base_reference_images, opts, job
+        )
+    except Exception as exc:
+        _mark_job_failed(job, exc)
+        raise
+
+
+def resume_story(
+    job_id: str, options: StoryGenerationOptions | None = None
+) -> tuple[str, str, str, str]:
+    """
+    途中で失敗したジョブを、マニフェストに記録済みの結果を使って再開する。
 
+    Params:
+        job_id: `generate_from_story` が作成したジョブID（`outputs_root()/<job_id>`）
+        options: 並列数などの実行時オプション（参照画像・一貫性モードはマニフェストの値を使う）
+    Returns:
+        `generate_from_story` と同じ
+    備考:
+        完了済みの画像プロンプト/画像/セリフ/音声は再生成しない。完了済みジョブは保存済みの結果を返す。
+    """
+    job = JobManifest.load(job_id)
+    done = _completed_result(job)
+    if done is not None:
+        return done
+    opts = _resume_options(job, options)
+    try:
+        plan = job.plan()
+        if plan is None:
+            plan = _plan_story(job.story, job.params["max_scenes"], opts)
+            job.save_plan(*plan)
+        base_reference_images, scene_specs, style_global = plan
+        return _render_story(
+            scene_specs,
+            style_global,
+            job.params["image_size"],
+            base_reference_images,
+            opts,
+            job,
+        )
+    except Exception as exc:
+        _mark_job_failed(job, exc)
+        raise
+
+
+def _render_story(
+    scene_specs: list[SceneSpec],
+    style_global: str,
+    image_size: str,
+    base_reference_images: list[bytes],
+    opts: StoryGenerationOptions,
+    job: JobManifest | None,
+) -> tuple[str, str, str, str]:
+    """計画済みのシーンから画像/音声を生成し、1本の動画にまとめる。"""
+    s = get_settings()
     if env_truthy("PYTEST", "0"):
         print(scene_specs)
 
-    # 日本語コメント: 物語/説明文の内容に応じて、スタイルヒントを自動決定
-    style_global = decide_style_hint(story)
+    # 日本語コメント: 未知のプロファイル名は生成前に失敗させる
+    profile = _render_profile(opts)
 
-    # 各シーンのアセット生成（バイト列）
-    prompts: List[str] = []
-    images: List[bytes] = []
-    audios: List[bytes] = []
+    # 各シーンのアセット生成（依存関係付きで並列実行）
+    max_workers = opts.max_workers or s.story_max_workers
+    # 日本語コメント: ストリーミング時は完成したシーンから順にエンコーダへ渡す
+    composer = (
+        StreamingSceneComposer(profile=profile) if _streaming_enabled(opts) else None
+    )
+    graph = _build_scene_graph(
+        scene_specs,
+        style_global=style_global,
+        image_size=image_size,
+        base_reference_images=base_reference_images,
+        voice=s.tts_voice,
+        max_workers=max_workers,
+        on_scene_ready=composer.submit if composer is not None else None,
+        batch_llm=_batch_llm_enabled(opts),
+        anchor_mode=_anchor_mode_enabled(opts),
+    )
+    try:
+        # 日本語コメント: 再開時は記録済みの結果を使い、完了したタスクは都度マニフェストへ記録
+        results = graph.run(
+            preloaded=job.preloaded() if job is not None else None,
+            on_result=job.record if job is not None else None,
+        )
+    except Exception:
+        if composer is not None:
+            composer.abort()
+        raise
 
-    # テスト時のみ画像/音声を書き出してURLを返す
-    img_url = ""
-    aud_url = ""
+    prompts, images, audios = _collect_scene_results(results, len(scene_specs))
 
-    project = f"proj-{int(time.time())}"  # テスト用
-    for idx, spec in enumerate(scene_specs, start=1):
-        scene_text = spec["text"]
-        # 日本語コメント: 画像/音声生成
-        # スタイルはストーリーに応じて可変（ビジネス説明/絵本/アニメ等）
-        style_hint = style_global
-        # 日本語コメント: シーン固有の画像ヒントを補助的に付与
-        if spec.get("image_hint"):
-            style_hint = f"{style_global}、{spec['image_hint']}"
-        if idx > 1:
-            style_hint = f"{style_hint}、前のシーンと同一のキャラクターデザイン・配色・トーンを維持"
-        prompt = build_image_prompt(scene_text, style_hint=style_hint)
-
-        # 日本語コメント: 画像生成は最大3回までリトライ
-        image_bytes = b""
-        for attempt in range(1, 3 + 1):
-            try:
-                # 日本語コメント: 参照画像（最大5枚）で一貫性を補助 + 指定の縦横比で生成
-                image_bytes = generate_image(
-                    prompt,
-                    size=eff_img_size,
-                    base_images=base_reference_images,
-                    scene_images=images[-5:],
-                )
-                break
-            except Exception:  # ネットワークやAPIの一過性の失敗に対応
-                if attempt >= 3:
-                    raise
-                time.sleep(0.8)
-
-        # 日本語コメント: 音声生成は最大3回までリトライ
-        audio_bytes = b""
-        # シーンで用意された実際のセリフを優先。なければヒントを用いてセリフを生成。
-        voice_text = spec.get("voice_script") or build_voice_script(
-            scene_text, spec.get("voice_hint") or None
-        )
-        for attempt in range(1, 3 + 1):
-            try:
-                audio_bytes = generate_tts(voice_text, voice=s.tts_voice, fmt="mp3")
-                break
-            except Exception:
-                if attempt >= 3:
-                    raise
-                time.sleep(0.8)
-
-        prompts.append(prompt)
-        images.append(image_bytes)
-        audios.append(audio_bytes)
-
-        # 日本語コメント: テスト時のみ、各シーンの画像/音声を書き出してURLを作成
-        if env_truthy("PYTEST", "0"):
-            d = outputs_root() / project / "scenes" / f"{idx:04d}"
-            d.mkdir(parents=True, exist_ok=True)
-            img_path = d / "image.png"
-            aud_path = d / "narration.mp3"
-            img_path.write_bytes(image_bytes)
-            aud_path.write_bytes(audio_bytes)
-            if idx == 1:
-                img_url = img_path.resolve().as_uri()
-                aud_url = aud_path.resolve().as_uri()
+    # テスト時のみ画像/音声を書き出してURLを返す
+    img_url, aud_url = _write_test_outputs(images, audios)
 
     # 動画合成（全シーンを1本の動画に）
-    media = SceneMedia(image=images, audio=audios)
-    video = compose_scene_video(media)
+    if composer is not None:
+        # 日本語コメント: 残りのエンコード完了を待って連結のみ行う
+        video = composer.finish()
+    else:
+        media = SceneMedia(image=images, audio=audios, profile=profile)
+        video = compose_scene_video(media)
 
     # 出力（先頭シーンの情報と、連結後の動画URL）
+    return _finish_job(job, prompts, img_url, aud_url, video)
+
+
+async def generate_from_story_async(
+    story: str,
+    max_scenes: int | None = None,
+    image_size: ImageAspectLiteral = "1024x576",
+    options: StoryGenerationOptions | None = None,
+) -> tuple[str, str, str, str]:
+    """
+    `generate_from_story` の非同期版。
+
+    LLM/画像/TTS は AsyncOpenAI、ffmpeg は asyncio サブプロセスで実行するため、
+    1つのイベントループ（1スレッド）で複数の物語・シーンを並行処理できる。
+    Params/Returns は `generate_from_story` と同じ。
+    """
+    if not story:
+        raise ValueError("story must be non-empty")
+
+    opts = options or StoryGenerationOptions()
+    eff_max = max_scenes if max_scenes is not None else 9999
+    # 日本語コメント: マニフェストの読み書きはディスク I/O のため、イベントループを止めないようスレッドで行う
+    job = await asyncio.to_thread(_start_job, story, eff_max, image_size, opts)
+    try:
+        base_reference_images, scene_specs, style_global = await _plan_story_async(
+            story, eff_max, opts
+        )
+        if job is not None:
+            await asyncio.to_thread(
+                job.save_plan, base_reference_images, scene_specs, style_global
+            )
+        return await _render_story_async(
+            scene_specs, style_global, image_size, base_reference_images, opts, job
+        )
+    except Exception as exc:
+        await asyncio.to_thread(_mark_job_failed, job, exc)
+        raise
+
+
+async def resume_story_async(
+    job_id: str, options: StoryGenerationOptions | None = None
+) -> tuple[str, str, str, str]:
+    """`resume_story` の非同期版（マニフェストの読み書きはスレッドで行う）。"""
+    job = await asyncio.to_thread(JobManifest.load, job_id)
+    done = await asyncio.to_thread(_completed_result, job)
+    if done is not None:
+        return done
+    opts = await asyncio.to_thread(_resume_options, job, options)
+    try:
+        plan = await asyncio.to_thread(job.plan)
+        if plan is None:
+            plan = await _plan_story_async(job.story, job.params["max_scenes"], opts)
+            await asyncio.to_thread(job.save_plan, *plan)
+        base_reference_images, scene_specs, style_global = plan
+        return await _render_story_async(
+            scene_specs,
+            style_global,
+            job.params["image_size"],
+            base_reference_images,
+            opts,
+            job,
+        )
+    except Exception as exc:
+        await asyncio.to_thread(_mark_job_failed, job, exc)
+        raise
+
+
+async def _render_story_async(
+    scene_specs: list[SceneSpec],
+    style_global: str,
+    image_size: str,
+    base_reference_images: list[bytes],
+    opts: StoryGenerationOptions,
+    job: JobManifest | None,
+) -> tuple[str, str, str, str]:
+    """`_render_story` の非同期版。"""
+    s = get_settings()
+    if env_truthy("PYTEST", "0"):
+        print(scene_specs)
+
+    profile = _render_profile(opts)
+    max_workers = opts.max_workers or s.story_max_workers
+    composer = (
+        AsyncStreamingSceneComposer(profile=profile)
+        if _streaming_enabled(opts)
+        else None
+    )
+    graph = _build_scene_graph_async(
+        scene_specs,
+        style_global=style_global,
+        image_size=image_size,
+        base_reference_images=base_reference_images,
+        voice=s.tts_voice,
+        max_workers=max_workers,
+        on_scene_ready=composer.submit if composer is not None else None,
+        batch_llm=_batch_llm_enabled(opts),
+        anchor_mode=_anchor_mode_enabled(opts),
+    )
+    try:
+        results = await graph.run(
+            preloaded=await asyncio.to_thread(job.preloaded)
+            if job is not None
+            else None,
+            on_result=_async_recorder(job) if job is not None else None,
+        )
+    except BaseException:
+        if composer is not None:
+            await composer.abort()
+        raise
+
+    prompts, images, audios = _collect_scene_results(results, len(scene_specs))
+    img_url, aud_url = await asyncio.to_thread(_write_test_outputs, images, audios)
+
+    if composer is not None:
+        video = await composer.finish()
+    else:
+        video = await compose_scene_video_async(
+            SceneMedia(image=images, audio=audios, profile=profile)
+        )
+
+    return await asyncio.to_thread(_finish_job, job, prompts, img_url, aud_url, video)
+
+
+def _async_recorder(job: JobManifest) -> Callable[[str, Any], Awaitable[None]]:
+    """`AsyncTaskGraph.run(on_result=...)` 用。チェックポイントの書き込みをスレッドで行う。"""
+
+    async def _record(key: str, value: Any) -> None:
+        await asyncio.to_thread(job.record, key, value)
+
+    return _record
+
+
+def _start_job(
+    story: str, max_scenes: int, image_size: str, opts: StoryGenerationOptions
+) -> JobManifest | None:
+    """チェックポイント有効時、新しいジョブのマニフェストを作成する。"""
+    if opts.job_id is None and not get_settings().job_checkpoint:
+        return None
+    job_id = opts.job_id or new_job_id()
+    if (job_dir(job_id) / MANIFEST_FILENAME).exists():
+        raise FileExistsError(
+            f"job {job_id!r} already exists; use resume_story() to continue it"
+        )
+    params: dict[str, Any] = {
+        "max_scenes": max_scenes,
+        "image_size": image_size,
+        "consistency_mode": "anchor" if _anchor_mode_enabled(opts) else "rolling",
+    }
+    job = JobManifest.create(job_id, story, params)
+    # 日本語コメント: 計画フェーズ前に失敗しても、再開時に同じ参照画像で計画し直せるよう指定を残す
+    job.save_reference_inputs(
+        opts.reference_images, opts.local_images, opts.http_images
+    )
+    log(f"[story] job started: {job_id}")
+    return job
+
+
+def _resume_options(
+    job: JobManifest, options: StoryGenerationOptions | None
+) -> StoryGenerationOptions:
+    """再開時のオプション（参照画像の指定と一貫性モードはマニフェストの値に揃える）。"""
+    uploads, local_images, http_images = job.reference_inputs()
+    return dataclasses.replace(
+        options or StoryGenerationOptions(),
+        reference_images=uploads,
+        local_images=local_images,
+        http_images=http_images,
+        job_id=job.job_id,
+        consistency_mode=job.params.get("consistency_mode", "rolling"),
+    )
+
+
+def _completed_result(job: JobManifest) -> tuple[str, str, str, str] | None:
+    """完了済みで動画ファイルも残っているジョブなら、保存済みの結果を返す。"""
+    result = job.data.get("result")
+    if job.data.get("status") != "completed" or not result:
+        return None
+    if not Path(result.get("video_path", "")).exists():
+        return None
     return (
-        prompts[0] if prompts else "",
-        img_url,
-        aud_url,
-        video["video_url"],
+        result["prompt"],
+        result["image_url"],
+        result["audio_url"],
+        result["video_url"],
+    )
+
+
+def _finish_job(
+    job: JobManifest | None,
+    prompts: list[str],
+    img_url: str,
+    aud_url: str,
+    video: dict[str, str],
+) -> tuple[str, str, str, str]:
+    prompt = prompts[0] if prompts else ""
+    if job is not None:
+        job.complete(
+            {
+                "prompt": prompt,
+                "image_url": img_url,
+                "audio_url": aud_url,
+                "video_url": video["video_url"],
+                "video_path": video.get("video_path", ""),
+            }
+        )
+    return (prompt, img_url, aud_url, video["video_url"])
+
+
+def _mark_job_failed(job: JobManifest | None, exc: Exception) -> None:
+    if job is None:
+        return
+    job.fail(exc)
+    exc.add_note(f"job_id={job.job_id}（resume_story で途中から再開できます）")
+    log(f"[story] job failed: {job.job_id}: {exc}")
+
+
+def _plan_story(
+    story: str, max_scenes: int, opts: StoryGenerationOptions
+) -> tuple[list[bytes], list[SceneSpec], str]:
+    """
+    計画フェーズ: 参照画像の収集・シーン分割・全体スタイル決定を並行に行う。
+
+    3つの処理は互いに独立なので同時に走らせ、全体で1つの締め切り
+    （`PLANNING_TIMEOUT_SEC`）を設ける。融合モードではシーン分割とスタイル決定が
+    1回の LLM 呼び出し（`plan_story`）になる。
+
+    Returns:
+        (参照画像, シーン仕様, 全体スタイル)
+    備考:
+        締め切りに間に合わなかった参照画像の取得・スタイル決定は既定値（参照画像なし/既定スタイル）で代替する。
+        シーン分割（融合モードでは `plan_story`）が間に合わなかった場合は TimeoutError を送出する
+        （単一シーンの動画を黙って作らない）。
+    """
+    jobs: dict[str, Callable[[], Any]] = {
+        "refs": lambda: _collect_reference_images(opts)
+    }
+    if _fused_planning_enabled(opts):
+        jobs["plan"] = lambda: plan_story(story, max_scenes=max_scenes)
+    else:
+        jobs["scenes"] = lambda: split_scenes(story, max_scenes=max_scenes)
+        # 日本語コメント: 物語/説明文の内容に応じて、スタイルヒントを自動決定
+        jobs["style"] = lambda: decide_style_hint(story)
+
+    pool = ThreadPoolExecutor(max_workers=len(jobs))
+    futures: dict[str, Future[Any]] = {}
+    try:
+        futures = {
+            name: pool.submit(contextvars.copy_context().run, fn)
+            for name, fn in jobs.items()
+        }
+        done, _ = wait(futures.values(), timeout=get_settings().planning_timeout_sec)
+    finally:
+        # 日本語コメント: 締め切り超過分は取り消して待たない（実行中のスレッドは中断できないため結果を捨てる）
+        for fut in futures.values():
+            fut.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+    results = {name: fut.result() for name, fut in futures.items() if fut in done}
+    return _planning_outcome(story, results, timed_out=sorted(set(jobs) - set(results)))
+
+
+async def _plan_story_async(
+    story: str, max_scenes: int, opts: StoryGenerationOptions
+) -> tuple[list[bytes], list[SceneSpec], str]:
+    """`_plan_story` の非同期版。"""
+    # 日本語コメント: 参照画像の取得はブロッキングI/Oのためスレッドへ逃がす
+    jobs: dict[str, Any] = {"refs": asyncio.to_thread(_collect_reference_images, opts)}
+    if _fused_planning_enabled(opts):
+        jobs["plan"] = plan_story_async(story, max_scenes=max_scenes)
+    else:
+        jobs["scenes"] = split_scenes_async(story, max_scenes=max_scenes)
+        jobs["style"] = decide_style_hint_async(story)
+
+    tasks = {name: asyncio.ensure_future(coro) for name, coro in jobs.items()}
+    try:
+        done, pending = await asyncio.wait(
+            tasks.values(), timeout=get_settings().planning_timeout_sec
+        )
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    for task in pending:
+        task.cancel()
+    results = {name: task.result() for name, task in tasks.items() if task in done}
+    return _planning_outcome(story, results, timed_out=sorted(set(jobs) - set(results)))
+
+
+def _planning_outcome(
+    story: str, results: dict[str, Any], timed_out: list[str]
+) -> tuple[list[bytes], list[SceneSpec], str]:
+    """計画フェーズの結果をまとめる（未完了の参照画像/スタイルは既定値で代替、シーン分割は TimeoutError）。"""
+    missing_scenes = [name for name in ("plan", "scenes") if name in timed_out]
+    if missing_scenes:
+        raise TimeoutError(
+            f"planning deadline exceeded before scene split finished: {', '.join(missing_scenes)}"
+        )
+    if timed_out:
+        log(
+            f"[story] planning deadline exceeded, using defaults for: {', '.join(timed_out)}"
+        )
+    if "refs" in timed_out:
+        # 日本語コメント: 参照画像なしで生成を続けるため、本番（ログ無効時）でも気付けるよう警告を出す
+        warnings.warn(
+            "reference images were not loaded before PLANNING_TIMEOUT_SEC; generating without them",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+    refs: list[bytes] = results.get("refs") or []
+    scene_specs: list[SceneSpec]
+    style_global: str
+    if "plan" in results:
+        scene_specs, style_global = results["plan"]
+    else:
+        scene_specs = results.get("scenes") or []
+        style_global = results.get("style") or DEFAULT_STYLE_HINT
+    return refs, scene_specs or _fallback_scene_specs(story), style_global
+
+
+def _fallback_scene_specs(story: str) -> list[SceneSpec]:
+    """シーン分割が空だった場合の単一シーン。"""
+    return [
+        SceneSpec(
+            text=story or "",
+            image_hint="",
+            voice_hint="",
+            voice_script="",
+            sfx_hint="",
+        )
+    ]
+
+
+def _render_profile(opts: StoryGenerationOptions) -> RenderProfile:
+    return render_profile(
+        opts.render_profile, fps=opts.render_fps, video_bitrate=opts.render_bitrate
     )
+
+
+def _streaming_enabled(opts: StoryGenerationOptions) -> bool:
+    if opts.streaming_compose is not None:
+        return opts.streaming_compose
+    return get_settings().streaming_compose
+
+
+def _fused_planning_enabled(opts: StoryGenerationOptions) -> bool:
+    if opts.fused_planning is not None:
+        return opts.fused_planning
+    return get_settings().fused_planning
+
+
+def _batch_llm_enabled(opts: StoryGenerationOptions) -> bool:
+    if opts.batch_llm is not None:
+        return opts.batch_llm
+    return get_settings().llm_batch
+
+
+def _anchor_mode_enabled(opts: StoryGenerationOptions) -> bool:
+    mode = opts.consistency_mode or get_settings().consistency_mode
+    return mode.strip().lower() == "anchor"
+
+
+def _image_reference_keys(idx: int, anchor_mode: bool) -> list[str]:
+    """シーン画像が参照する画像タスクのキー（rolling: 直近5シーン / anchor: アンカーのみ）。"""
+    if anchor_mode:
+        return ["anchor"]
+    return [f"image:{j}" for j in range(max(1, idx - 5), idx)]
+
+
+def _collect_scene_results(
+    results: dict[str, Any], n: int
+) -> tuple[list[str], list[bytes], list[bytes]]:
+    """タスクグラフの結果からシーン順のプロンプト/画像/音声を取り出す。"""
+    prompts: list[str] = [results[f"prompt:{i}"] for i in range(1, n + 1)]
+    images: list[bytes] = [results[f"image:{i}"] for i in range(1, n + 1)]
+    audios: list[bytes] = [results[f"tts:{i}"] for i in range(1, n + 1)]
+    return prompts, images, audios
+
+
+def _write_test_outputs(images: list[bytes], audios: list[bytes]) -> tuple[str, str]:
+    """テスト時(PYTEST=1)のみ各シーンの画像/音声を書き出し、先頭シーンのURLを返す。"""
+    img_url = ""
+    aud_url = ""
+    if not env_truthy("PYTEST", "0"):
+        return img_url, aud_url
+
+    project = f"proj-{int(time.time())}"  # テスト用
+    for idx, (image_bytes, audio_bytes) in enumerate(zip(images, audios), start=1):
+        d = outputs_root() / project / "scenes" / f"{idx:04d}"
+        d.mkdir(parents=True, exist_ok=True)
+        img_path = d / "image.png"
+        aud_path = d / "narration.mp3"
+        img_path.write_bytes(image_bytes)
+        aud_path.write_bytes(audio_bytes)
+        if idx == 1:
+            img_url = img_path.resolve().as_uri()
+            aud_url = aud_path.resolve().as_uri()
+    return img_url, aud_url
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from functools import lru_cache
 from typing import Literal, Any
 from pathlib import Path
 import tempfile
-from openai import OpenAI
 
 from app.config.settings import get_settings
-from app.utils.env import env_truthy
+from app.services.clients import openai_async_client, openai_client
+from app.utils.adaptive import adaptive_slot, adaptive_slot_async
+from app.utils.disk_cache import DiskCache
+from app.utils.env import cache_root, env_truthy
+from app.utils.ffmpeg_async import run_ffmpeg_async
 from app.utils.log import log
+from app.utils.rate_limit import estimate_tokens, rate_limiter
+from app.utils.resilience import call_with_retry, call_with_retry_async
 import ffmpeg as _ffmpeg  # type: ignore
 
 ffmpeg: Any = _ffmpeg
@@ -30,24 +37,56 @@ def generate_tts(
         speed: 話速（"slow" | "middle" | "fast"）。既定は "middle"。
     Returns:
         音声バイト列
+    備考:
+        TTS_CACHE=1 のとき、話速調整後の最終音声をディスクにキャッシュし、
+        同一のテキスト/ボイス/モデル/形式/話速では API も ffmpeg も呼ばない。
     """
-
     s = get_settings()
-    client = OpenAI(
-        api_key=s.openai_api_key or os.getenv("OPENAI_API_KEY", ""),
-        base_url=s.openai_base_url,
-    )
     v = voice or s.tts_voice
+    cache = _tts_cache()
+    cache_key = _tts_cache_key(text, v, fmt, speed)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    data = _generate_tts_uncached(text, v, fmt, speed)
+    if cache is not None:
+        cache.put(cache_key, data)
+    return data
+
+
+def _generate_tts_uncached(
+    text: str,
+    voice: str,
+    fmt: Literal["mp3", "wav", "flac"],
+    speed: Literal["slow", "middle", "fast"],
+) -> bytes:
+    """TTS API 呼び出しと話速調整を行う（キャッシュなし）。"""
+    s = get_settings()
+    # 日本語コメント: 共有クライアントでコネクションプールを再利用
+    client = openai_client()
+    v = voice
 
     # 日本語コメント: まずは通常速度で音声ファイルを生成
+    limiter = rate_limiter("openai", s.model_tts)
     with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=True) as tmp:
-        with client.audio.speech.with_streaming_response.create(
-            model=s.model_tts,
-            voice=v,
-            input=text,
-            response_format=fmt,
-        ) as response:
-            response.stream_to_file(tmp.name)
+
+        def _download() -> None:
+            limiter.acquire(estimate_tokens(text))
+            # 日本語コメント: stream_to_file はファイルを先頭から書き直すため、リトライしても安全
+            with (
+                adaptive_slot("tts"),
+                client.audio.speech.with_streaming_response.create(
+                    model=s.model_tts,
+                    voice=v,
+                    input=text,
+                    response_format=fmt,
+                ) as response,
+            ):
+                response.stream_to_file(tmp.name)
+
+        call_with_retry("openai", _download)
         tmp.seek(0)
         if speed == "middle":
             # 日本語コメント: 中速はそのまま返す
@@ -57,33 +96,13 @@ def generate_tts(
             return tmp.read()
 
         # 日本語コメント: slow/fast の場合は ffmpeg の atempo で話速を調整
-        atempo_map: dict[str, float] = {
-            "slow": 0.85,
-            "middle": 1.0,
-            "fast": 1.25,
-        }
-        rate = atempo_map.get(speed, 1.0)
+        rate = _atempo_rate(speed)
 
         # 日本語コメント: 出力用一時ファイル（エンコードに使用）
         out_tmp = tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False)
         out_tmp.close()
         try:
-            # 日本語コメント: フォーマットに応じてコーデックを指定
-            acodec: str
-            if fmt == "mp3":
-                acodec = "libmp3lame"
-            elif fmt == "wav":
-                acodec = "pcm_s16le"
-            else:  # flac
-                acodec = "flac"
-
-            (
-                ffmpeg.input(tmp.name)
-                .filter("atempo", rate)
-                .output(out_tmp.name, acodec=acodec, ar="48000", ac="2")
-                .overwrite_output()
-                .run(quiet=True)
-            )
+            _atempo_stream(tmp.name, out_tmp.name, fmt, rate).run(quiet=True)
 
             data = Path(out_tmp.name).read_bytes()
             if env_truthy("PYTEST", "0"):
@@ -104,3 +123,133 @@ def generate_tts(
                 os.remove(out_tmp.name)
             except Exception:
                 pass
+
+
+async def generate_tts_async(
+    text: str,
+    voice: str | None = None,
+    fmt: Literal["mp3", "wav", "flac"] = "mp3",
+    speed: Literal["slow", "middle", "fast"] = "middle",
+) -> bytes:
+    """
+    `generate_tts` の非同期版（AsyncOpenAI + asyncio サブプロセスの ffmpeg）。
+
+    Params/Returns は `generate_tts` と同じ。
+    """
+    s = get_settings()
+    v = voice or s.tts_voice
+    cache = _tts_cache()
+    cache_key = _tts_cache_key(text, v, fmt, speed)
+    if cache is not None:
+        # 日本語コメント: キャッシュはディスク I/O のため、イベントループを止めないようスレッドで読み書きする
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+    data = await _generate_tts_uncached_async(text, v, fmt, speed)
+    if cache is not None:
+        await asyncio.to_thread(cache.put, cache_key, data)
+    return data
+
+
+async def _generate_tts_uncached_async(
+    text: str,
+    voice: str,
+    fmt: Literal["mp3", "wav", "flac"],
+    speed: Literal["slow", "middle", "fast"],
+) -> bytes:
+    s = get_settings()
+    client = openai_async_client()
+    v = voice
+
+    limiter = rate_limiter("openai", s.model_tts)
+
+    async def _download() -> bytes:
+        await limiter.acquire_async(estimate_tokens(text))
+        async with (
+            adaptive_slot_async("tts"),
+            client.audio.speech.with_streaming_response.create(
+                model=s.model_tts,
+                voice=v,
+                input=text,
+                response_format=fmt,
+            ) as response,
+        ):
+            return await response.read()
+
+    raw = await call_with_retry_async("openai", _download)
+
+    if env_truthy("PYTEST", "0"):
+        log("[generate_tts_async] voice=", v, ", fmt=", fmt, ", speed=", speed)
+        log("[generate_tts_async] text=\n", text)
+    if speed == "middle":
+        return raw
+
+    rate = _atempo_rate(speed)
+    paths: list[str] = []
+    try:
+        with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as in_tmp:
+            in_tmp.write(raw)
+        paths.append(in_tmp.name)
+        with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as out_tmp:
+            pass
+        paths.append(out_tmp.name)
+
+        await run_ffmpeg_async(_atempo_stream(in_tmp.name, out_tmp.name, fmt, rate))
+        return Path(out_tmp.name).read_bytes()
+    finally:
+        for p in paths:
+            try:
+                os.remove(p)
+            except Exception:
+                pass
+
+
+@lru_cache(maxsize=1)
+def _tts_cache() -> DiskCache | None:
+    """TTS 音声キャッシュ（TTS_CACHE=1 のときのみ有効）。プロセス内で共有する。"""
+    s = get_settings()
+    if not s.tts_cache_enabled:
+        return None
+    return DiskCache(cache_root() / "tts", s.tts_cache_max_mb * 1024 * 1024)
+
+
+def tts_cache_stats() -> dict[str, int]:
+    """TTS キャッシュのヒット/ミス等を返す（無効時は空の辞書）。"""
+    cache = _tts_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _tts_cache_key(text: str, voice: str, fmt: str, speed: str) -> str:
+    """テキスト・ボイス・モデル・形式・話速からキャッシュキーを作る。"""
+    s = get_settings()
+    return DiskCache.make_key(s.model_tts, voice, fmt, speed, text)
+
+
+def _atempo_rate(speed: str) -> float:
+    """話速指定を ffmpeg atempo の倍率へ変換する。"""
+    atempo_map: dict[str, float] = {
+        "slow": 0.85,
+        "middle": 1.0,
+        "fast": 1.25,
+    }
+    return atempo_map.get(speed, 1.0)
+
+
+def _atempo_stream(in_path: str, out_path: str, fmt: str, rate: float) -> Any:
+    """話速調整（atempo）を行う ffmpeg ストリームを組み立てる。"""
+    # 日本語コメント: フォーマットに応じてコーデックを指定
+    acodec: str
+    if fmt == "mp3":
+        acodec = "libmp3lame"
+    elif fmt == "wav":
+        acodec = "pcm_s16le"
+    else:  # flac
+        acodec = "flac"
+
+    return (
+        ffmpeg.input(in_path)
+        .filter("atempo", rate)
+        .output(out_path, acodec=acodec, ar="48000", ac="2")
+        .overwrite_output()
+    )
@@ -9,14 +9,17 @@ import gradio as gr
 from PIL import Image
 
 from app.config.settings import get_settings
+from app.pipelines.compose_video import RENDER_PROFILES
 from app.services.story_service import (
+    ConsistencyModeLiteral,
     ImageAspectLiteral,
+    RenderProfileLiteral,
     StoryGenerationOptions,
-    generate_from_story,
+    generate_from_story_async,
 )
 
 
-def _coerce_max_scenes(value: str | int | float | None) -> int | None:
+def _coerce_max_scenes(value: str | float | None) -> int | None:
     """UI入力から max_scenes の実値を決定するヘルパー。"""
     if value is None:
         return None
@@ -31,12 +34,25 @@ def _coerce_max_scenes(value: str | int | float | None) -> int | None:
         return None
 
 
+def _coerce_render_fps(value: str | float | None) -> int | None:
+    """UI入力からフレームレートを決定する（「プロファイル既定」や不正値は None）。"""
+    try:
+        fps = int(float(str(value)))
+    except (TypeError, ValueError):
+        return None
+    return fps if fps > 0 else None
+
+
+# 日本語コメント: data URL でそのまま送れる形式（それ以外は PNG に変換してから渡す）
+_PASSTHROUGH_FORMATS = frozenset({"PNG", "JPEG", "WEBP", "GIF"})
+
+
 def _load_reference_images(files: Sequence[object] | None) -> list[bytes]:
-    """Gradio ファイル入力から PNG バイト列を抽出する。"""
+    """Gradio ファイル入力から画像バイト列（PNG/JPEG/WebP/GIF。その他の形式は PNG に変換）を抽出する。"""
     if not files:
         return []
 
-    allowed_mime = {"image/png", "image/jpeg"}
+    allowed_mime = {"image/png", "image/jpeg", "image/webp", "image/gif"}
     result: list[bytes] = []
     for item in files:
         path_obj = getattr(item, "path", None)
@@ -59,9 +75,9 @@ def _load_reference_images(files: Sequence[object] | None) -> list[bytes]:
             continue
 
         if mime and mime not in allowed_mime:
-            # MIME が許容外の場合でも拡張子が jpeg/png なら許容
+            # MIME が許容外の場合でも拡張子が jpeg/png/webp/gif なら許容
             suffix = path.lower()
-            if not suffix.endswith((".jpg", ".jpeg", ".png")):
+            if not suffix.endswith((".jpg", ".jpeg", ".png", ".webp", ".gif")):
                 continue
 
         try:
@@ -71,11 +87,17 @@ def _load_reference_images(files: Sequence[object] | None) -> list[bytes]:
 
         try:
             with Image.open(BytesIO(data)) as img:
-                with BytesIO() as buf:
-                    img.convert("RGBA").save(buf, format="PNG")
-                    result.append(buf.getvalue())
+                if (img.format or "").upper() in _PASSTHROUGH_FORMATS:
+                    # 日本語コメント: 読み込めるかだけ確認し、縮小・再圧縮は story_service 側の正規化に任せる
+                    img.verify()
+                else:
+                    # 日本語コメント: 正規化が無効（REF_IMAGE_NORMALIZE=0）でも送れるよう PNG にする
+                    with BytesIO() as buf:
+                        img.convert("RGBA").save(buf, format="PNG")
+                        data = buf.getvalue()
         except Exception:
             continue
+        result.append(data)
 
     return result
 
@@ -87,23 +109,31 @@ def _split_multiline_text(value: str | None) -> tuple[str, ...]:
     return tuple(line for line in lines if line)
 
 
-def _generate_story(
+async def _generate_story(
     story: str,
-    max_scenes_value: str | int | float | None,
+    max_scenes_value: str | float | None,
     image_size: ImageAspectLiteral,
     reference_files: Sequence[object] | None,
     local_images_text: str | None,
     http_images_text: str | None,
+    consistency_mode: ConsistencyModeLiteral,
+    profile: RenderProfileLiteral,
+    render_fps_value: str | float | None,
+    render_bitrate: str | None,
 ) -> tuple[str, str, str, str]:
-    """Gradio コールバック用のラッパー。"""
+    """Gradio コールバック用のラッパー（非同期版パイプラインをイベントループ上で実行）。"""
     max_scenes = _coerce_max_scenes(max_scenes_value)
     refs = _load_reference_images(reference_files)
     options = StoryGenerationOptions(
         reference_images=tuple(refs),
         local_images=_split_multiline_text(local_images_text),
         http_images=_split_multiline_text(http_images_text),
+        consistency_mode=consistency_mode,
+        render_profile=profile,
+        render_fps=_coerce_render_fps(render_fps_value),
+        render_bitrate=(render_bitrate or "").strip() or None,
     )
-    return generate_from_story(
+    return await generate_from_story_async(
         story,
         max_scenes=max_scenes,
         image_size=image_size,
@@ -145,6 +175,33 @@ def build_ui() -> gr.Blocks:
                 label="画像サイズ",
             )
             gr.Textbox(value=s.tts_voice, label="TTSボイス")
+            # 日本語コメント: anchor は全シーンを並列生成できるが、シーン間のつながりは rolling の方が強い
+            consistency_mode = gr.Dropdown(
+                choices=["rolling", "anchor"],
+                value=s.consistency_mode
+                if s.consistency_mode in ("rolling", "anchor")
+                else "rolling",
+                label="一貫性モード",
+            )
+
+        with gr.Row():
+            # 日本語コメント: preview は下書き確認用（小さく低 fps で高速にエンコード）
+            render_profile = gr.Dropdown(
+                choices=list(RENDER_PROFILES),
+                value=s.render_profile
+                if s.render_profile in RENDER_PROFILES
+                else "1080p",
+                label="出力プロファイル",
+            )
+            render_fps = gr.Dropdown(
+                choices=["プロファイル既定", "2", "5", "15", "24", "30"],
+                value="プロファイル既定",
+                label="フレームレート",
+            )
+            render_bitrate = gr.Textbox(
+                label="映像ビットレート（任意）",
+                placeholder="例: 4000k（空欄はプロファイル既定）",
+            )
 
         reference_images = gr.File(
             label="参考画像（任意, 複数可）",
@@ -179,6 +236,10 @@ def build_ui() -> gr.Blocks:
                 reference_images,
                 local_images_text,
                 http_images_text,
+                consistency_mode,
+                render_profile,
+                render_fps,
+                render_bitrate,
             ],
             outputs=[prompt_out, image_url, audio_url, video_url],
         )
@@ -0,0 +1,201 @@
+"""
+観測したレイテンシとスロットリングに応じて同時実行数を調整するコントローラ（AIMD）。
+
+- 成功かつレイテンシが基準（最小観測値 × 許容倍率）以内なら、上限を加算的に増やす（1ウィンドウで +1）
+- 429 やサーキットオープンなどのスロットリングでは、上限を乗算的に下げる（既定で半分）
+- その他のエラーや遅い応答では上限を据え置く
+- 上限はステージ（"image" / "tts"）ごとにプロセス全体で共有し、`adaptive_limits()` で参照できる
+
+使い方:
+    with adaptive_slot("image"):
+        resp = client.chat.completions.create(...)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any
+
+from app.config.settings import get_settings
+from app.utils.log import log
+from app.utils.resilience import is_throttle
+
+
+class AdaptiveLimiter:
+    """AIMD で上限を調整するセマフォ。同期スレッドと asyncio の両方から使える。"""
+
+    def __init__(
+        self,
+        name: str,
+        initial: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 16,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        self.name = name
+        self.min_limit = max(1.0, float(min_limit))
+        self.max_limit = max(self.min_limit, float(max_limit))
+        self.decrease_factor = min(max(float(decrease_factor), 0.05), 0.95)
+        self.latency_tolerance = max(1.0, float(latency_tolerance))
+        self._limit = min(max(float(initial), self.min_limit), self.max_limit)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._async_waiters: list[
+            tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]
+        ] = []
+        self._baseline: float | None = None
+        self._ewma: float | None = None
+        self._last_decrease = 0.0
+        self.successes = 0
+        self.throttles = 0
+        self.errors = 0
+
+    @property
+    def limit(self) -> int:
+        with self._cond:
+            return int(self._limit)
+
+    def _can_enter_locked(self) -> bool:
+        return self._in_flight < int(self._limit)
+
+    def acquire(self) -> None:
+        """枠が空くまで待ってから1つ確保する。"""
+        with self._cond:
+            while not self._can_enter_locked():
+                self._cond.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self) -> None:
+        """`acquire` の非同期版（イベントループをブロックしない）。"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._can_enter_locked():
+                    self._in_flight += 1
+                    return
+                fut: asyncio.Future[None] = loop.create_future()
+                self._async_waiters.append((loop, fut))
+            await fut
+
+    def release(self, latency: float, exc: BaseException | None = None) -> None:
+        """枠を返し、結果（レイテンシと例外）に応じて上限を調整する。"""
+        with self._cond:
+            self._in_flight -= 1
+            self._observe_locked(latency, exc)
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, fut in waiters:
+            loop.call_soon_threadsafe(_wake, fut)
+
+    def _observe_locked(self, latency: float, exc: BaseException | None) -> None:
+        before = int(self._limit)
+        now = time.monotonic()
+        if exc is not None and is_throttle(exc):
+            self.throttles += 1
+            # 日本語コメント: 同じバーストで返ってきた 429 で何度も半減しないよう、直近の応答時間ぶんは1回に数える
+            if now - self._last_decrease >= max(1.0, self._ewma or 0.0):
+                self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+                self._last_decrease = now
+        elif exc is not None:
+            self.errors += 1
+        else:
+            self.successes += 1
+            self._ewma = (
+                latency if self._ewma is None else 0.8 * self._ewma + 0.2 * latency
+            )
+            # 日本語コメント: 基準は最小観測値。少しずつ引き上げて、恒常的な変化には追従する
+            self._baseline = (
+                latency
+                if self._baseline is None
+                else min(latency, self._baseline * 1.02)
+            )
+            if latency <= self._baseline * self.latency_tolerance:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+        if int(self._limit) != before:
+            log(f"[adaptive] {self.name} limit {before} -> {int(self._limit)}")
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "latency_ewma_sec": self._ewma,
+                "latency_baseline_sec": self._baseline,
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "errors": self.errors,
+            }
+
+
+def _wake(fut: asyncio.Future[None]) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+_limiters_lock = threading.Lock()
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def adaptive_limiter(stage: str) -> AdaptiveLimiter | None:
+    """ステージ名に対応する共有コントローラ。ADAPTIVE_CONCURRENCY=0 のときは None。"""
+    s = get_settings()
+    if not s.adaptive_concurrency:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(stage)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                stage,
+                initial=s.adaptive_initial_limit,
+                min_limit=s.adaptive_min_limit,
+                max_limit=s.adaptive_max_limit,
+                latency_tolerance=s.adaptive_latency_tolerance,
+            )
+            _limiters[stage] = limiter
+        return limiter
+
+
+def adaptive_limits() -> dict[str, dict[str, Any]]:
+    """ステージごとの現在の上限・実行中件数・レイテンシ等を返す（監視用）。"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.snapshot() for name, limiter in limiters.items()}
+
+
+@contextmanager
+def adaptive_slot(stage: str) -> Iterator[None]:
+    """ステージの枠を確保してブロックを実行し、結果をコントローラに返す。"""
+    limiter = adaptive_limiter(stage)
+    if limiter is None:
+        yield
+        return
+    limiter.acquire()
+    started = time.monotonic()
+    try:
+        yield
+    except BaseException as exc:
+        limiter.release(time.monotonic() - started, exc)
+        raise
+    limiter.release(time.monotonic() - started)
+
+
+@asynccontextmanager
+async def adaptive_slot_async(stage: str) -> AsyncIterator[None]:
+    """`adaptive_slot` の非同期版。"""
+    limiter = adaptive_limiter(stage)
+    if limiter is None:
+        yield
+        return
+    await limiter.acquire_async()
+    started = time.monotonic()
+    try:
+        yield
+    except BaseException as exc:
+        limiter.release(time.monotonic() - started, exc)
+        raise
+    limiter.release(time.monotonic() - started)
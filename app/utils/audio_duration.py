@@ -0,0 +1,229 @@
+"""
+音声バイト列の再生時間をプロセス内で求める（ffprobe を起動しない）。
+
+対応形式（`generate_tts` の出力形式 + AAC）:
+- WAV: fmt チャンクの byte_rate と data チャンクのサイズ
+- FLAC: STREAMINFO の総サンプル数とサンプリングレート
+- MP3: Xing/Info または VBRI ヘッダのフレーム数。なければ全フレームのヘッダを走査
+- AAC（ADTS）: 全フレームのヘッダを走査
+
+解析できない場合は None を返す（呼び出し側で ffprobe にフォールバックする）。
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Callable
+
+# 日本語コメント: MPEG オーディオのビットレート表（kbps）。キーは (MPEG1 か, レイヤー)
+_MP3_BITRATES: dict[tuple[bool, int], tuple[int, ...]] = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# 日本語コメント: バージョンビット → サンプリングレート（0: MPEG2.5, 2: MPEG2, 3: MPEG1）
+_MP3_SAMPLE_RATES: dict[int, tuple[int, int, int]] = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+# 日本語コメント: フレームヘッダの解析結果 (フレーム長, サンプル数, サンプリングレート)
+_Frame = tuple[int, int, int]
+
+_ADTS_SAMPLE_RATES = (
+    96000,
+    88200,
+    64000,
+    48000,
+    44100,
+    32000,
+    24000,
+    22050,
+    16000,
+    12000,
+    11025,
+    8000,
+    7350,
+)
+
+
+def audio_duration_sec(data: bytes) -> float | None:
+    """
+    音声バイト列の再生時間（秒、小数3桁）を返す。解析できなければ None。
+
+    Params:
+        data: MP3 / WAV / FLAC / AAC(ADTS) のバイト列
+    Returns:
+        再生時間（秒）または None
+    """
+    try:
+        if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+            dur = _wav_duration(data)
+        else:
+            start = _skip_id3v2(data)
+            if data[start : start + 4] == b"fLaC":
+                dur = _flac_duration(data, start + 4)
+            else:
+                dur = _mpeg_duration(data, start)
+    except (IndexError, struct.error, ZeroDivisionError):
+        return None
+    if dur is None or dur <= 0:
+        return None
+    return round(dur, 3)
+
+
+def _skip_id3v2(data: bytes) -> int:
+    """先頭の ID3v2 タグ（複数連続も可）を飛ばした位置を返す。"""
+    pos = 0
+    while data[pos : pos + 3] == b"ID3" and len(data) >= pos + 10:
+        size = 0
+        for b in data[pos + 6 : pos + 10]:
+            size = (size << 7) | (b & 0x7F)
+        footer = 10 if data[pos + 5] & 0x10 else 0
+        pos += 10 + size + footer
+    return pos
+
+
+def _wav_duration(data: bytes) -> float | None:
+    pos = 12
+    byte_rate = 0
+    while pos + 8 <= len(data):
+        chunk_id = data[pos : pos + 4]
+        (size,) = struct.unpack_from("<I", data, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            (byte_rate,) = struct.unpack_from("<I", data, body + 8)
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # 日本語コメント: ストリーミング出力ではサイズが未確定（0 / 0xFFFFFFFF）のことがあるため実データ長で補う
+            available = len(data) - body
+            if size == 0 or size > available:
+                size = available
+            return size / byte_rate
+        pos = body + size + (size & 1)
+    return None
+
+
+def _flac_duration(data: bytes, pos: int) -> float | None:
+    while pos + 4 <= len(data):
+        header = data[pos]
+        length = int.from_bytes(data[pos + 1 : pos + 4], "big")
+        if header & 0x7F == 0:  # STREAMINFO
+            (packed,) = struct.unpack_from(">Q", data, pos + 4 + 10)
+            sample_rate = packed >> 44
+            total_samples = packed & 0xFFFFFFFFF
+            if not sample_rate or not total_samples:
+                return None
+            return total_samples / sample_rate
+        if header & 0x80:
+            break
+        pos += 4 + length
+    return None
+
+
+def _mpeg_duration(data: bytes, start: int) -> float | None:
+    """MP3（Xing/Info/VBRI または全フレーム走査）と AAC(ADTS) の再生時間。"""
+    pos = _find_sync(data, start)
+    if pos is None:
+        return None
+    if _adts_frame(data, pos) is not None:
+        return _walk_frames(data, pos, _adts_frame)
+
+    info = _mp3_frame(data, pos)
+    assert info is not None
+    _, samples, sample_rate = info
+    frames = _mp3_vbr_frames(data, pos)
+    if frames:
+        return frames * samples / sample_rate
+    return _walk_frames(data, pos, _mp3_frame)
+
+
+def _find_sync(data: bytes, start: int) -> int | None:
+    """最初の有効なフレーム位置（次のフレームも有効なヘッダであるもの）を探す。"""
+    pos = data.find(b"\xff", start)
+    while 0 <= pos < len(data) - 4:
+        for parse in (_adts_frame, _mp3_frame):
+            frame = parse(data, pos)
+            if frame is None:
+                continue
+            nxt = pos + frame[0]
+            if nxt >= len(data) or parse(data, nxt) is not None:
+                return pos
+        pos = data.find(b"\xff", pos + 1)
+    return None
+
+
+def _walk_frames(
+    data: bytes, pos: int, parse: Callable[[bytes, int], _Frame | None]
+) -> float | None:
+    """フレームヘッダを先頭から辿り、サンプル数の合計から再生時間を求める。"""
+    seconds = 0.0
+    while pos + 4 <= len(data):
+        frame = parse(data, pos)
+        if frame is None:
+            # 日本語コメント: 末尾のタグ（ID3v1 / APE）以外で途切れる場合は壊れたデータとみなす
+            if data[pos : pos + 3] == b"TAG" or data[pos : pos + 8] == b"APETAGEX":
+                break
+            return None
+        length, samples, sample_rate = frame
+        seconds += samples / sample_rate
+        pos += length
+    return seconds or None
+
+
+def _mp3_frame(data: bytes, pos: int) -> _Frame | None:
+    """MP3 フレームヘッダを解析して (フレーム長, サンプル数, サンプリングレート) を返す。"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2 = data[pos + 1], data[pos + 2]
+    version = (b1 >> 3) & 0x3
+    layer = 4 - ((b1 >> 1) & 0x3)
+    bitrate_idx = b2 >> 4
+    sr_idx = (b2 >> 2) & 0x3
+    if version == 1 or layer == 4 or bitrate_idx in (0, 15) or sr_idx == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_idx] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sr_idx]
+    padding = (b2 >> 1) & 0x1
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    samples = 1152 if layer == 2 or mpeg1 else 576
+    return samples // 8 * bitrate // sample_rate + padding, samples, sample_rate
+
+
+def _mp3_vbr_frames(data: bytes, pos: int) -> int | None:
+    """先頭フレームの Xing/Info または VBRI ヘッダからフレーム総数を読む。"""
+    mpeg1 = (data[pos + 1] >> 3) & 0x3 == 3
+    mono = data[pos + 3] >> 6 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    if data[xing : xing + 4] in (b"Xing", b"Info"):
+        (flags,) = struct.unpack_from(">I", data, xing + 4)
+        if flags & 0x1:
+            (frames,) = struct.unpack_from(">I", data, xing + 8)
+            return frames
+        return None
+    vbri = pos + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI":
+        (frames,) = struct.unpack_from(">I", data, vbri + 14)
+        return frames
+    return None
+
+
+def _adts_frame(data: bytes, pos: int) -> _Frame | None:
+    """AAC の ADTS ヘッダを解析して (フレーム長, サンプル数, サンプリングレート) を返す。"""
+    if pos + 7 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xF6 != 0xF0:
+        return None
+    sr_idx = (data[pos + 2] >> 2) & 0xF
+    if sr_idx >= len(_ADTS_SAMPLE_RATES):
+        return None
+    length = ((data[pos + 3] & 0x3) << 11) | (data[pos + 4] << 3) | (data[pos + 5] >> 5)
+    if length < 7:
+        return None
+    blocks = (data[pos + 6] & 0x3) + 1
+    return length, 1024 * blocks, _ADTS_SAMPLE_RATES[sr_idx]
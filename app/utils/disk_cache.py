@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+
+class DiskCache:
+    """
+    コンテンツアドレス方式のディスクキャッシュ（サイズ上限付き LRU）。
+
+    - キーは `make_key` で作る SHA-256 の16進文字列を想定
+    - 値はバイト列。書き込みは一時ファイル + `os.replace` でアトミックに行う
+    - 読み出し時に mtime を更新し、合計サイズが `max_bytes` を超えたら古い順に削除
+    - ヒット/ミス/追い出し回数をプロセス内で数える（`stats()`）
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._total_bytes = sum(p.stat().st_size for p in self._entries())
+
+    @staticmethod
+    def make_key(*parts: str | bytes) -> str:
+        """文字列/バイト列の並びから衝突しにくいキーを作る（各要素は長さ付きで連結）。"""
+        h = hashlib.sha256()
+        for part in parts:
+            b = part.encode("utf-8") if isinstance(part, str) else bytes(part)
+            h.update(len(b).to_bytes(8, "big"))
+            h.update(b)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _entries(self) -> list[Path]:
+        return [
+            p
+            for p in self.root.glob("*/*")
+            if p.is_file() and not p.name.startswith(".")
+        ]
+
+    def get(self, key: str) -> bytes | None:
+        """キャッシュ済みの値を返す。なければ None。"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # 日本語コメント: LRU 判定用にアクセス時刻として mtime を更新
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """値を保存し、必要なら古いエントリを追い出す。上限を超える単一値は保存しない。"""
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp_", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_name, path)
+        except Exception:
+            try:
+                os.remove(tmp_name)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._total_bytes += len(data) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort(key=lambda e: e[0])
+        total = sum(e[1] for e in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self) -> dict[str, int]:
+        """ヒット/ミス/追い出し回数と現在の使用量を返す。"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self._total_bytes,
+            }
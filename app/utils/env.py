@@ -25,3 +25,15 @@ def outputs_root() -> Path:
     p = Path("./outputs").resolve()
     p.mkdir(parents=True, exist_ok=True)
     return p
+
+
+def cache_root() -> Path:
+    """Return base directory for persistent caches.
+
+    - `CACHE_DIR` if set.
+    - Otherwise `<outputs_root>/.cache`.
+    """
+    custom = os.getenv("CACHE_DIR", "").strip()
+    p = Path(custom).expanduser().resolve() if custom else outputs_root() / ".cache"
+    p.mkdir(parents=True, exist_ok=True)
+    return p
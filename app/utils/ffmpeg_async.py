@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, cast
+
+import ffmpeg as _ffmpeg  # type: ignore
+
+ffmpeg: Any = _ffmpeg
+
+
+async def run_ffmpeg_async(stream: Any, cmd: str = "ffmpeg") -> None:
+    """
+    ffmpeg-python のストリームを asyncio サブプロセスで実行する。
+
+    `stream.run()` と異なりイベントループをブロックしない。
+    失敗時は同期版と同じく `ffmpeg.Error` を送出する。
+    """
+    args: list[str] = stream.compile(cmd=cmd)
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await _communicate(proc)
+    if proc.returncode != 0:
+        raise ffmpeg.Error(cmd, out, err)
+
+
+async def probe_async(path: str, cmd: str = "ffprobe") -> dict[str, Any]:
+    """`ffmpeg.probe` の非同期版。ffprobe の JSON 出力を辞書で返す。"""
+    args = [cmd, "-show_format", "-show_streams", "-of", "json", path]
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await _communicate(proc)
+    if proc.returncode != 0:
+        raise ffmpeg.Error(cmd, out, err)
+    return cast(dict[str, Any], json.loads(out.decode("utf-8")))
+
+
+async def _communicate(proc: asyncio.subprocess.Process) -> tuple[bytes, bytes]:
+    """
+    子プロセスの終了を待って標準出力/標準エラーを返す。
+
+    待機中にキャンセルされた場合は子プロセスを kill して回収してから CancelledError を再送出する
+    （ffmpeg が孤児として走り続け、エンコードや一時ファイルの書き込みを続けないようにする）。
+    """
+    try:
+        return await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        raise
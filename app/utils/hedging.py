@@ -0,0 +1,231 @@
+"""
+裾の長いレイテンシを抑えるヘッジリクエスト。
+
+- 直近の応答時間の指定パーセンタイル（既定 p95）を超えても返らない呼び出しには、同じリクエストを追加で送る
+- 先に成功した方の結果を使い、残りは捨てる（非同期版はキャンセル、同期版はスレッドの完了を待たない）
+- 追加リクエストは 1 呼び出しあたり `max_extra` 件まで、かつ累計で全呼び出し数の `budget_ratio` 倍までに抑える
+- 観測数が `min_samples` に満たない間はヘッジしない
+- 追加リクエストがどれだけ勝ったかは `hedge_stats()` で参照できる
+
+使い方:
+    b = hedger("image").call(lambda: _call())
+    b = await hedger("image").call_async(lambda: _call_async())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, TypeVar
+
+from app.config.settings import get_settings
+
+T = TypeVar("T")
+
+
+class Hedger:
+    """レイテンシ分布を学習し、遅い呼び出しにだけ追加リクエストを送るヘッジ制御。"""
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 95.0,
+        min_samples: int = 10,
+        max_extra: int = 1,
+        budget_ratio: float = 0.1,
+        window: int = 200,
+    ) -> None:
+        self.name = name
+        self.percentile = min(100.0, max(0.0, float(percentile)))
+        self.min_samples = max(1, int(min_samples))
+        self.max_extra = max(0, int(max_extra))
+        self.budget_ratio = max(0.0, float(budget_ratio))
+        self._latencies: deque[float] = deque(maxlen=max(self.min_samples, int(window)))
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged_calls = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> float | None:
+        """追加リクエストを送るまでの待ち時間（秒）。観測不足なら None（ヘッジしない）。"""
+        with self._lock:
+            if self.max_extra == 0 or len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        rank = max(1, math.ceil(self.percentile / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+    def _observe(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(max(0.0, latency))
+
+    def _take_hedge(self, first: bool) -> bool:
+        """予算内なら追加リクエスト1件分を確保する。"""
+        with self._lock:
+            if self.hedges_sent + 1 > self.budget_ratio * self.calls:
+                return False
+            self.hedges_sent += 1
+            if first:
+                self.hedged_calls += 1
+            return True
+
+    def _finish(self, winner: int) -> None:
+        if winner > 0:
+            with self._lock:
+                self.hedge_wins += 1
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """`fn` を呼び出し、遅ければ別スレッドで追加の `fn` を送って先に成功した結果を返す。"""
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay()
+        if delay is None:
+            started = time.monotonic()
+            result = fn()
+            self._observe(time.monotonic() - started)
+            return result
+
+        pool = ThreadPoolExecutor(
+            max_workers=1 + self.max_extra, thread_name_prefix=f"hedge-{self.name}"
+        )
+        started_at: dict[Future[T], float] = {}
+        order: dict[Future[T], int] = {}
+
+        def _submit() -> Future[T]:
+            ctx = contextvars.copy_context()
+            fut = pool.submit(ctx.run, fn)
+            started_at[fut] = time.monotonic()
+            order[fut] = len(order)
+            return fut
+
+        first_exc: BaseException | None = None
+        try:
+            pending = {_submit()}
+            while pending:
+                can_hedge = len(order) <= self.max_extra
+                done, pending = wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    if self._take_hedge(first=len(order) == 1):
+                        pending.add(_submit())
+                    else:
+                        delay = None
+                    continue
+                for fut in sorted(done, key=order.__getitem__):
+                    exc = fut.exception()
+                    if exc is None:
+                        self._observe(time.monotonic() - started_at[fut])
+                        self._finish(order[fut])
+                        return fut.result()
+                    first_exc = first_exc or exc
+            assert first_exc is not None
+            raise first_exc
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """`call` の非同期版（`fn` は呼ぶたびに新しい awaitable を返すこと）。負けた側はキャンセルする。"""
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay()
+        if delay is None:
+            started = time.monotonic()
+            result = await fn()
+            self._observe(time.monotonic() - started)
+            return result
+
+        started_at: dict[asyncio.Task[T], float] = {}
+        order: dict[asyncio.Task[T], int] = {}
+
+        async def _run() -> T:
+            return await fn()
+
+        def _submit() -> asyncio.Task[T]:
+            task = asyncio.ensure_future(_run())
+            started_at[task] = time.monotonic()
+            order[task] = len(order)
+            return task
+
+        first_exc: BaseException | None = None
+        try:
+            pending = {_submit()}
+            while pending:
+                can_hedge = len(order) <= self.max_extra
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    if self._take_hedge(first=len(order) == 1):
+                        pending.add(_submit())
+                    else:
+                        delay = None
+                    continue
+                for task in sorted(done, key=order.__getitem__):
+                    exc = task.exception()
+                    if exc is None:
+                        self._observe(time.monotonic() - started_at[task])
+                        self._finish(order[task])
+                        return task.result()
+                    first_exc = first_exc or exc
+            assert first_exc is not None
+            raise first_exc
+        finally:
+            for task in order:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> dict[str, Any]:
+        """呼び出し数・ヘッジ数・ヘッジ勝利数と現在の待ち時間を返す（監視用）。"""
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged_calls": self.hedged_calls,
+                "hedges_sent": self.hedges_sent,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": self.hedge_wins / self.hedges_sent
+                if self.hedges_sent
+                else 0.0,
+                "hedge_delay_sec": delay,
+                "samples": len(self._latencies),
+            }
+
+
+_hedgers_lock = threading.Lock()
+_hedgers: dict[str, Hedger] = {}
+
+
+def hedger(stage: str) -> Hedger:
+    """ステージ名に対応するプロセス共有のヘッジ制御を返す。"""
+    with _hedgers_lock:
+        h = _hedgers.get(stage)
+        if h is None:
+            s = get_settings()
+            h = Hedger(
+                stage,
+                percentile=s.hedge_percentile,
+                min_samples=s.hedge_min_samples,
+                max_extra=s.hedge_max_extra,
+                budget_ratio=s.hedge_budget_ratio,
+            )
+            _hedgers[stage] = h
+        return h
+
+
+def hedge_stats() -> dict[str, dict[str, Any]]:
+    """ステージごとのヘッジ統計（ヘッジ数・勝利数・勝率など）を返す。"""
+    with _hedgers_lock:
+        hedgers = dict(_hedgers)
+    return {name: h.snapshot() for name, h in hedgers.items()}
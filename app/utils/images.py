@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import cast
+
+from PIL import Image, ImageOps
+
+from app.config.settings import get_settings
+
+# 日本語コメント: 先頭バイトでの形式判定（data URL の MIME 用）
+_MAGIC: tuple[tuple[bytes, str], ...] = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+_PIL_FORMATS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+
+
+def image_mime(data: bytes, default: str = "image/png") -> str:
+    """画像バイト列の MIME タイプを先頭バイトから判定する（不明なら default）。"""
+    head = bytes(data[:16])
+    for magic, mime in _MAGIC:
+        if head.startswith(magic):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    # 日本語コメント: BMP は2バイトの署名だけだと誤判定しやすいため、予約領域（常に0）も確認する
+    if head[:2] == b"BM" and head[6:10] == b"\x00\x00\x00\x00":
+        return "image/bmp"
+    return default
+
+
+def _has_transparency(img: Image.Image) -> bool:
+    if img.mode in ("RGBA", "LA", "PA"):
+        alpha = img.getchannel("A")
+        # 日本語コメント: 単一チャンネルの getextrema は (最小, 最大) を返す
+        lo = cast(tuple[int, int], alpha.getextrema())[0]
+        return lo < 255
+    return img.mode == "P" and "transparency" in img.info
+
+
+def normalize_reference_image(
+    data: bytes,
+    max_edge: int | None = None,
+    fmt: str | None = None,
+    quality: int | None = None,
+) -> bytes:
+    """
+    参照画像をアップロード向けに正規化する（長辺の上限・不要なアルファの除去・効率のよい形式）。
+
+    Params:
+        data: 元の画像バイト列（PNG/JPEG/WebP など Pillow が読める形式）
+        max_edge: 長辺の上限ピクセル（未指定時は REF_IMAGE_MAX_EDGE）
+        fmt: "auto" / "jpeg" / "png" / "webp"（未指定時は REF_IMAGE_FORMAT）。
+            auto は透過がなければ JPEG、あれば PNG
+        quality: JPEG/WebP の品質（未指定時は REF_IMAGE_QUALITY）
+    Returns:
+        正規化後のバイト列
+    備考:
+        - 縮小不要かつ元の形式が出力形式と同じなら元のバイト列をそのまま返す（再圧縮で劣化させない）
+        - 読み込めない画像は元のバイト列を返す
+    """
+    s = get_settings()
+    if not s.ref_image_normalize:
+        return data
+    max_edge = max_edge or s.ref_image_max_edge
+    fmt = (fmt or s.ref_image_format).strip().lower()
+    quality = quality or s.ref_image_quality
+
+    try:
+        with Image.open(BytesIO(data)) as opened:
+            src_format = (opened.format or "").upper()
+            # 日本語コメント: EXIF の回転情報を画素に反映（再エンコードで EXIF が落ちるため）
+            img = ImageOps.exif_transpose(opened)
+            img.load()
+    except Exception:  # noqa: BLE001 - 読み込めない画像は理由を問わず元のまま使う
+        return data
+
+    transparent = _has_transparency(img)
+    if fmt == "auto" or fmt not in _PIL_FORMATS:
+        fmt = "png" if transparent else "jpeg"
+    if fmt == "jpeg" and transparent:
+        # 日本語コメント: JPEG は透過を持てないため、透過がある場合は PNG にする
+        fmt = "png"
+    target = _PIL_FORMATS[fmt]
+
+    needs_resize = max(img.size) > max_edge
+    if (
+        not needs_resize
+        and src_format == target
+        and (transparent or "A" not in img.mode)
+    ):
+        return data
+
+    if needs_resize:
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    if transparent:
+        img = img.convert("RGBA")
+    else:
+        img = img.convert("RGB")
+
+    with BytesIO() as buf:
+        if target == "JPEG":
+            img.save(
+                buf, format="JPEG", quality=quality, optimize=True, progressive=True
+            )
+        elif target == "WEBP":
+            img.save(buf, format="WEBP", quality=quality, method=4)
+        else:
+            img.save(buf, format="PNG", optimize=True)
+        out = buf.getvalue()
+
+    # 日本語コメント: 縮小していないのに元より大きくなる場合は元のまま使う
+    if not needs_resize and len(out) >= len(data):
+        return data
+    return out
+
+
+class DataUrlCache:
+    """
+    画像バイト列 → base64 data URL の変換結果を再利用するキャッシュ。
+
+    - キーは内容のハッシュ（同じ画像は何枚添付されても1回だけエンコードする）
+    - 保持する data URL の合計文字数が `max_chars` を超えたら古い順に捨てる（LRU）
+    """
+
+    def __init__(self, max_chars: int) -> None:
+        self.max_chars = max(0, int(max_chars))
+        self._entries: OrderedDict[bytes, str] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def data_url(self, data: bytes, digest: bytes | None = None) -> str:
+        """`data` の data URL を返す（MIME は内容から判定）。"""
+        key = digest or self.digest(data)
+        with self._lock:
+            url = self._entries.get(key)
+            if url is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return url
+            self.misses += 1
+        url = f"data:{image_mime(data)};base64,{base64.b64encode(data).decode('ascii')}"
+        if len(url) > self.max_chars:
+            return url
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = url
+                self._chars += len(url)
+                while self._chars > self.max_chars:
+                    _, old = self._entries.popitem(last=False)
+                    self._chars -= len(old)
+        return url
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "chars": self._chars,
+            }
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from app.utils.disk_cache import DiskCache
+
+# 日本語コメント: スレッド/タスク単位でメモ化を一時的に無効化するためのフラグ
+_bypass: ContextVar[bool] = ContextVar("memo_bypass", default=False)
+
+
+@contextmanager
+def memo_bypass() -> Iterator[None]:
+    """このブロック内ではメモ化を読み書きとも行わない。
+
+    例:
+        with memo_bypass():
+            split_scenes(story)  # 必ず LLM を呼ぶ
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def memo_bypassed() -> bool:
+    return _bypass.get()
+
+
+class MemoStore:
+    """
+    JSON 化可能な値のメモ化ストア（プロセス内 LRU + ディスク）。
+
+    - まずプロセス内の LRU（最大 `max_entries` 件）を参照し、なければディスクを参照
+    - 値は JSON 文字列で保持し、取得のたびに新しいオブジェクトを返す（呼び出し側の変更が波及しない）
+    """
+
+    def __init__(
+        self, root: Path, max_entries: int = 256, max_disk_bytes: int = 64 * 1024 * 1024
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = DiskCache(root, max_disk_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(payload: Any) -> str:
+        """リクエスト内容（JSON 化可能な値）からキーを作る。"""
+        return DiskCache.make_key(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        )
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            raw = self._memory.get(key)
+            if raw is not None:
+                self._memory.move_to_end(key)
+        if raw is None:
+            data = self._disk.get(key)
+            if data is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            raw = data.decode("utf-8")
+            self._remember(key, raw)
+        with self._lock:
+            self.hits += 1
+        return json.loads(raw)
+
+    def put(self, key: str, value: Any) -> None:
+        raw = json.dumps(value, ensure_ascii=False)
+        self._remember(key, raw)
+        self._disk.put(key, raw.encode("utf-8"))
+
+    def _remember(self, key: str, raw: str) -> None:
+        with self._lock:
+            self._memory[key] = raw
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk.stats()["bytes"],
+            }
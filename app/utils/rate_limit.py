@@ -0,0 +1,180 @@
+"""
+プロバイダ/モデル単位のプロセス共有レートリミッタ（トークンバケット）。
+
+- リクエスト数/分（rpm）とトークン数/分（tpm）の2つのバケットを持つ
+- 予算は RATE_LIMITS（JSON）で設定する。キーは "<provider>:<model>" または "<provider>"
+  例: {"openai:gpt-4o-mini": {"rpm": 500, "tpm": 200000}, "openrouter": {"rpm": 60}}
+- 予算を超える場合は失敗させずに、空きができるまで待つ（同期/非同期どちらからも利用可）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from functools import lru_cache
+from typing import Any, cast
+
+from app.config.settings import get_settings
+
+
+class TokenBucket:
+    """1分あたり `rate_per_min` だけ補充されるトークンバケット（容量も同じ値）。"""
+
+    def __init__(self, rate_per_min: float) -> None:
+        self.capacity = float(rate_per_min)
+        self.refill_per_sec = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """`amount` を予約し、使えるようになるまでの待ち秒数を返す。
+
+        残量が足りない場合は前借り（負の残量）として予約するため、呼び出し順に公平に待つ。
+        容量を超える量は容量に切り詰める（永久に待たないように）。
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.refill_per_sec,
+            )
+            self._updated = now
+            self._tokens -= min(float(amount), self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_sec
+
+
+class RateLimiter:
+    """rpm/tpm の予算を守るように呼び出しを待たせる。予算未設定の項目は無制限。"""
+
+    def __init__(
+        self, name: str, rpm: float | None = None, tpm: float | None = None
+    ) -> None:
+        self.name = name
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited_sec = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        delay = 0.0
+        if self._requests is not None:
+            delay = max(delay, self._requests.reserve(1))
+        if self._tokens is not None and tokens > 0:
+            delay = max(delay, self._tokens.reserve(tokens))
+        if delay > 0:
+            with self._lock:
+                self.waits += 1
+                self.waited_sec += delay
+        return delay
+
+    def acquire(self, tokens: int = 0) -> None:
+        """1リクエスト分（と `tokens` トークン分）の枠を確保する。必要なら待つ。"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            _sleep(delay)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """`acquire` の非同期版（イベントループをブロックしない）。"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {"waits": self.waits, "waited_sec": self.waited_sec}
+
+
+def _sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def estimate_tokens(text: str) -> int:
+    """tpm 予算用のおおまかなトークン数（UTF-8 で約3バイト/トークン。日本語はほぼ1文字1トークン）。"""
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def estimate_request_tokens(request_kwargs: dict[str, Any]) -> int:
+    """Chat Completions のリクエストから入力 + 出力上限のトークン数を見積もる。"""
+    total = 0
+    messages = cast(list[Any], request_kwargs.get("messages") or [])
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        content = cast(dict[str, Any], message).get("content")
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+        elif isinstance(content, list):
+            for part in cast(list[Any], content):
+                if not isinstance(part, dict):
+                    continue
+                text = cast(dict[str, Any], part).get("text")
+                if isinstance(text, str):
+                    total += estimate_tokens(text)
+    for key in ("tools", "response_format"):
+        if request_kwargs.get(key):
+            total += estimate_tokens(
+                json.dumps(request_kwargs[key], ensure_ascii=False, default=str)
+            )
+    max_out = request_kwargs.get("max_tokens") or request_kwargs.get(
+        "max_completion_tokens"
+    )
+    return total + (int(max_out) if isinstance(max_out, int) else 0)
+
+
+@lru_cache(maxsize=1)
+def _budgets() -> dict[str, dict[str, float]]:
+    raw = get_settings().rate_limits.strip()
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"RATE_LIMITS must be a JSON object: {e}") from e
+    if not isinstance(data, dict):
+        raise TypeError("RATE_LIMITS must be a JSON object")
+    budgets: dict[str, dict[str, float]] = {}
+    for key, value in cast(dict[str, Any], data).items():
+        if not isinstance(value, dict):
+            raise TypeError(
+                f'RATE_LIMITS[{key!r}] must be an object like {{"rpm": 60}}'
+            )
+        limits = cast(dict[str, Any], value)
+        budgets[str(key)] = {
+            k: float(v) for k, v in limits.items() if k in ("rpm", "tpm") and v
+        }
+    return budgets
+
+
+_limiters_lock = threading.Lock()
+_limiters: dict[str, RateLimiter] = {}
+
+
+def rate_limiter(provider: str, model: str) -> RateLimiter:
+    """プロバイダ/モデルに対応するプロセス共有のレートリミッタを返す。
+
+    予算は "<provider>:<model>" を優先し、なければ "<provider>" を使う（プロバイダ全体で共有）。
+    """
+    budgets = _budgets()
+    name = f"{provider}:{model}"
+    if name not in budgets:
+        name = provider
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            budget = budgets.get(name, {})
+            limiter = RateLimiter(name, rpm=budget.get("rpm"), tpm=budget.get("tpm"))
+            _limiters[name] = limiter
+        return limiter
+
+
+def rate_limiter_stats() -> dict[str, dict[str, float]]:
+    """作成済みのレートリミッタごとの待ち回数/合計待ち秒数を返す。"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
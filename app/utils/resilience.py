@@ -0,0 +1,276 @@
+"""
+プロバイダ API 呼び出しの共通リトライ/サーキットブレーカー方針。
+
+- 指数バックオフ + ジッター（tenacity）。Retry-After / retry-after-ms ヘッダがあればそれ以上待つ
+- 一過性の失敗（429/5xx/接続断/タイムアウト等）のみリトライし、4xx などは即座に送出する
+- プロバイダ単位のサーキットブレーカー。連続失敗が閾値を超えたら一定時間は呼び出さずに失敗させる
+  （429 は混雑であって障害ではないため、Retry-After とバックオフに任せて開閉の判定には数えない）
+
+使い方:
+    resp = call_with_retry("openai", lambda: client.chat.completions.create(**req))
+    resp = await call_with_retry_async("openrouter", lambda: aclient.chat.completions.create(**req))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+from urllib.error import URLError
+
+import httpx
+import openai
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+)
+from tenacity.wait import wait_base
+
+from app.config.settings import get_settings
+from app.utils.log import log
+
+T = TypeVar("T")
+
+# 日本語コメント: リトライ対象とする HTTP ステータス（それ以外の 4xx は入力側の問題として即失敗）
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429})
+
+
+class TransientError(RuntimeError):
+    """一過性と分かっている失敗（例: 応答に画像が含まれなかった）。リトライ対象になる。"""
+
+
+class CircuitOpenError(RuntimeError):
+    """サーキットブレーカーが開いているため呼び出しを行わなかった。"""
+
+    def __init__(self, provider: str, retry_in: float) -> None:
+        super().__init__(f"circuit open for {provider!r}; retry in {retry_in:.1f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """リトライすべき一過性の失敗かどうかを判定する。"""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS or exc.status_code >= 500
+    if isinstance(
+        exc, (openai.APIConnectionError, httpx.TransportError, TransientError)
+    ):
+        return True
+    return isinstance(exc, (ConnectionError, TimeoutError, URLError))
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """プロバイダ側の混雑（429 やサーキットオープン）による失敗かどうか。"""
+    if isinstance(exc, CircuitOpenError):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code == 429
+
+
+def retry_after_seconds(exc: BaseException | None) -> float | None:
+    """例外に付随する応答の Retry-After（秒）を返す。なければ None。"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return max(0.0, float(ms) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _BackoffWait(wait_base):
+    """指数バックオフ（フルジッター）。Retry-After があればその秒数以上待つ。"""
+
+    def __init__(self, base: float, cap: float, retry_after_cap: float) -> None:
+        self.base = base
+        self.cap = cap
+        self.retry_after_cap = retry_after_cap
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        exp = min(self.cap, self.base * (2 ** (retry_state.attempt_number - 1)))
+        delay = random.uniform(0, exp)
+        outcome = retry_state.outcome
+        hinted = retry_after_seconds(
+            outcome.exception() if outcome is not None else None
+        )
+        if hinted is not None:
+            delay = max(delay, min(hinted, self.retry_after_cap))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    プロバイダ単位のサーキットブレーカー（closed → open → half_open → closed）。
+
+    - 一過性の失敗が `failure_threshold` 回連続すると open になり、`reset_timeout` 秒は即座に失敗させる
+    - 経過後は half_open として1件だけ試行を通し、成功すれば closed、失敗すれば再び open
+    - 429（混雑）は成功とも失敗とも数えない。試行がキャンセルされた場合は `release()` で枠だけ戻す
+    """
+
+    def __init__(
+        self, provider: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ) -> None:
+        self.provider = provider
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        """呼び出し可否を判定する。不可なら CircuitOpenError。"""
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            assert self._opened_at is not None
+            retry_in = max(
+                0.0, self.reset_timeout - (time.monotonic() - self._opened_at)
+            )
+        raise CircuitOpenError(self.provider, retry_in)
+
+    def record(self, exc: BaseException | None) -> None:
+        """呼び出し結果を記録する。一過性でない失敗（4xx 等）はプロバイダ健全として扱う。"""
+        with self._lock:
+            self._probing = False
+            if exc is None or not is_retryable(exc):
+                self._failures = 0
+                self._opened_at = None
+                return
+            if is_throttle(exc):
+                # 日本語コメント: 429 の連発でブレーカーが開き、ジョブ内の全タスクが即失敗するのを防ぐ
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    log(f"[resilience] circuit opened for {self.provider}")
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """結果を記録せずに half_open の試行枠だけを戻す（キャンセル等で結果が得られなかった場合）。"""
+        with self._lock:
+            self._probing = False
+
+
+_breakers_lock = threading.Lock()
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(provider: str) -> CircuitBreaker:
+    """プロバイダ名に対応するプロセス共有のサーキットブレーカーを返す。"""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            s = get_settings()
+            breaker = CircuitBreaker(
+                provider, s.circuit_failure_threshold, s.circuit_reset_sec
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def _sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def _sleep_async(seconds: float) -> None:
+    await asyncio.sleep(seconds)
+
+
+def _retry_kwargs(provider: str) -> dict[str, Any]:
+    s = get_settings()
+
+    def _before_sleep(state: RetryCallState) -> None:
+        exc = state.outcome.exception() if state.outcome is not None else None
+        wait = state.next_action.sleep if state.next_action is not None else 0.0
+        log(
+            f"[resilience] {provider} attempt {state.attempt_number} failed ({exc!r}); retry in {wait:.2f}s"
+        )
+
+    return {
+        "stop": stop_after_attempt(max(1, s.retry_max_attempts)),
+        "wait": _BackoffWait(
+            s.retry_base_delay_sec, s.retry_max_delay_sec, s.retry_after_max_sec
+        ),
+        "retry": retry_if_exception(is_retryable),
+        "before_sleep": _before_sleep,
+        "reraise": True,
+    }
+
+
+def call_with_retry(provider: str, fn: Callable[[], T]) -> T:
+    """`fn` を共通方針（リトライ + サーキットブレーカー）で呼び出す。"""
+    breaker = circuit_breaker(provider)
+    for attempt in Retrying(sleep=_sleep, **_retry_kwargs(provider)):
+        with attempt:
+            breaker.before_call()
+            try:
+                result = fn()
+            except Exception as exc:
+                breaker.record(exc)
+                raise
+            except BaseException:
+                # 日本語コメント: キャンセル（CancelledError 等）は成功とも失敗とも数えず、試行枠だけ戻す
+                breaker.release()
+                raise
+            breaker.record(None)
+            return result
+    raise RuntimeError("unreachable")
+
+
+async def call_with_retry_async(provider: str, fn: Callable[[], Awaitable[T]]) -> T:
+    """`call_with_retry` の非同期版（`fn` は呼ぶたびに新しい awaitable を返すこと）。"""
+    breaker = circuit_breaker(provider)
+    async for attempt in AsyncRetrying(sleep=_sleep_async, **_retry_kwargs(provider)):
+        with attempt:
+            breaker.before_call()
+            try:
+                result = await fn()
+            except Exception as exc:
+                breaker.record(exc)
+                raise
+            except BaseException:
+                # 日本語コメント: キャンセル（CancelledError 等）は成功とも失敗とも数えず、試行枠だけ戻す
+                breaker.release()
+                raise
+            breaker.record(None)
+            return result
+    raise RuntimeError("unreachable")
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class _Task:
+    key: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...] = field(default_factory=tuple)
+
+
+class TaskGraph:
+    """
+    依存関係付きのタスクを、上限付きのワーカープールで並列実行する簡易スケジューラ。
+
+    - 各タスクは依存タスクがすべて完了した時点で投入される
+    - タスク関数には依存タスクの結果が `deps` の順に位置引数で渡される
+    - いずれかのタスクが失敗した場合、未着手タスクは投入せずに最初の例外を送出する
+    - `run(preloaded=...)` で結果が既知のタスクは実行せずにその値を使う（途中再開用）
+    - `run(on_result=...)` は各タスクの完了時に呼び出し元スレッドで呼ばれる（チェックポイント用）
+
+    例:
+        g = TaskGraph(max_workers=4)
+        g.add("a", lambda: 1)
+        g.add("b", lambda a: a + 1, deps=["a"])
+        results = g.run()  # {"a": 1, "b": 2}
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self._tasks: dict[str, _Task] = {}
+
+    def add(self, key: str, fn: Callable[..., Any], deps: Sequence[str] = ()) -> str:
+        """タスクを登録してキーを返す。依存先は登録済みである必要がある。"""
+        if key in self._tasks:
+            raise ValueError(f"duplicate task key: {key}")
+        for d in deps:
+            if d not in self._tasks:
+                raise ValueError(f"unknown dependency {d!r} for task {key!r}")
+        self._tasks[key] = _Task(key=key, fn=fn, deps=tuple(deps))
+        return key
+
+    def run(
+        self,
+        preloaded: Mapping[str, Any] | None = None,
+        on_result: Callable[[str, Any], None] | None = None,
+    ) -> dict[str, Any]:
+        """全タスクを実行し、キー → 結果 の辞書を返す。"""
+        results: dict[str, Any] = {
+            k: v for k, v in (preloaded or {}).items() if k in self._tasks
+        }
+        pending: dict[str, _Task] = {
+            k: t for k, t in self._tasks.items() if k not in results
+        }
+        running: dict[Future[Any], str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            error: BaseException | None = None
+            while pending or running:
+                if error is None:
+                    # 日本語コメント: 依存が満たされたタスクを登録順に投入
+                    for key, task in list(pending.items()):
+                        if all(d in results for d in task.deps):
+                            args = [results[d] for d in task.deps]
+                            running[pool.submit(task.fn, *args)] = key
+                            del pending[key]
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    key = running.pop(fut)
+                    exc = fut.exception()
+                    if exc is not None:
+                        if error is None:
+                            error = exc
+                        continue
+                    results[key] = fut.result()
+                    if on_result is not None:
+                        on_result(key, results[key])
+            if error is not None:
+                raise error
+        return results
+
+
+class AsyncTaskGraph:
+    """
+    `TaskGraph` の asyncio 版。タスク関数はコルーチン関数で、
+    同時実行数はセマフォで `max_concurrency` に制限する。
+
+    依存待ちの間はセマフォを保持しないため、上限が小さくてもデッドロックしない。
+    いずれかのタスクが失敗した場合は残りのタスクをキャンセルし、最初の例外を送出する。
+    """
+
+    def __init__(self, max_concurrency: int = 4) -> None:
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._tasks: dict[str, _Task] = {}
+
+    def add(
+        self, key: str, fn: Callable[..., Awaitable[Any]], deps: Sequence[str] = ()
+    ) -> str:
+        """タスクを登録してキーを返す。依存先は登録済みである必要がある。"""
+        if key in self._tasks:
+            raise ValueError(f"duplicate task key: {key}")
+        for d in deps:
+            if d not in self._tasks:
+                raise ValueError(f"unknown dependency {d!r} for task {key!r}")
+        self._tasks[key] = _Task(key=key, fn=fn, deps=tuple(deps))
+        return key
+
+    async def run(
+        self,
+        preloaded: Mapping[str, Any] | None = None,
+        on_result: Callable[[str, Any], Awaitable[None]] | None = None,
+    ) -> dict[str, Any]:
+        """
+        全タスクを実行し、キー → 結果 の辞書を返す（引数は `TaskGraph.run` と同じ）。
+
+        `on_result` はコルーチン関数で、各タスクの完了時に await される
+        （チェックポイントのディスク書き込みなどはスレッドへ逃がしてイベントループを止めないこと）。
+        """
+        sem = asyncio.Semaphore(self.max_concurrency)
+        known = dict(preloaded or {})
+        running: dict[str, asyncio.Task[Any]] = {}
+
+        async def _run(task: _Task) -> Any:
+            if task.key in known:
+                return known[task.key]
+            args = [await running[d] for d in task.deps]
+            async with sem:
+                value = await task.fn(*args)
+            if on_result is not None:
+                await on_result(task.key, value)
+            return value
+
+        for key, task in self._tasks.items():
+            running[key] = asyncio.ensure_future(_run(task))
+        try:
+            values = await asyncio.gather(*running.values())
+        except BaseException:
+            for t in running.values():
+                t.cancel()
+            await asyncio.gather(*running.values(), return_exceptions=True)
+            raise
+        return dict(zip(running.keys(), values))
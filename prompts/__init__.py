@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+from typing import Any, cast
+
 from openai.types.chat import (
     ChatCompletionFunctionToolParam,
     ChatCompletionNamedToolChoiceParam,
@@ -24,6 +27,35 @@ def split_scenes_system() -> str:
     )
 
 
+def plan_story_system() -> str:
+    """シーン分割とスタイル決定を1回で行う融合プランニング用のシステムプロンプトを返す。"""
+    return (
+        split_scenes_system()
+        + " Additionally, act as a style director: decide one overall visual style for the whole work "
+        "and return it as a single-line Japanese style hint (short phrases separated by '、') "
+        "that helps keep characters, palette, and tone consistent across all scenes."
+    )
+
+
+def anchor_image_prompt(
+    style_hint: str, scene_texts: Sequence[str], max_chars: int = 1500
+) -> str:
+    """アンカー一貫性モードで最初に1枚だけ作る、キャラクター/スタイル参照画像用のプロンプトを返す。
+
+    画像モデルへ直接渡す。各シーンの画像はこのアンカー画像のみを参照して生成される。
+    """
+    story = " ".join(t.strip() for t in scene_texts if t and t.strip())[:max_chars]
+    return (
+        "Create a character and style reference sheet for a picture book. "
+        "Show every main character of the story below in full body, front view, neutral pose, "
+        "side by side on a plain light background, with no text or labels. "
+        "Establish the definitive character designs, outfits, color palette, and rendering style "
+        "that all later scene illustrations will follow. "
+        f"Style: {style_hint}. "
+        f"Story (Japanese): {story}"
+    )
+
+
 def image_prompt_system() -> str:
     """画像プロンプト生成用のシステムプロンプトを返す。"""
     return (
@@ -34,12 +66,16 @@ def image_prompt_system() -> str:
     )
 
 
-def return_scenes_tool() -> ChatCompletionFunctionToolParam:
+def return_scenes_tool(
+    include_style_hint: bool = False,
+) -> ChatCompletionFunctionToolParam:
     """Function-calling tool schema for returning split scenes.
 
     llm_service.split_scenes から参照されます。
+    include_style_hint=True のときは全体のスタイルヒント(style_hint)も同時に返す
+    スキーマになります（llm_service.plan_story の融合呼び出し用）。
     """
-    return {
+    tool: ChatCompletionFunctionToolParam = {
         "type": "function",
         "function": {
             "name": "return_scenes",
@@ -88,6 +124,16 @@ def return_scenes_tool() -> ChatCompletionFunctionToolParam:
             },
         },
     }
+    if include_style_hint:
+        params: dict[str, Any] = cast(
+            dict[str, Any], tool["function"].get("parameters")
+        )
+        params["properties"]["style_hint"] = {
+            "type": "string",
+            "description": "物語全体のビジュアルスタイル指示（日本語、読点区切りの短い語句列を1行、10〜40文字程度）",
+        }
+        params["required"] = ["scenes", "style_hint"]
+    return tool
 
 
 def return_scenes_tool_choice() -> ChatCompletionNamedToolChoiceParam:
@@ -98,6 +144,92 @@ def return_scenes_tool_choice() -> ChatCompletionNamedToolChoiceParam:
     return {"type": "function", "function": {"name": "return_scenes"}}
 
 
+def return_image_prompts_tool() -> ChatCompletionFunctionToolParam:
+    """Function-calling tool schema for returning image prompts of all scenes at once.
+
+    llm_service.build_image_prompts_batch から参照されます。
+    """
+    return {
+        "type": "function",
+        "function": {
+            "name": "return_image_prompts",
+            "description": "全シーン分の英語の画像プロンプトを、シーン番号付きで一度に返す",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "prompts": {
+                        "type": "array",
+                        "description": "シーンごとの画像プロンプト（入力と同じ順序・同じ件数）",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "index": {
+                                    "type": "integer",
+                                    "description": "入力で示したシーン番号（1始まり）",
+                                },
+                                "prompt": {
+                                    "type": "string",
+                                    "description": "英語の画像プロンプト（簡潔、具体的な被写体・構図・雰囲気・配色）",
+                                },
+                            },
+                            "required": ["index", "prompt"],
+                        },
+                    }
+                },
+                "required": ["prompts"],
+            },
+        },
+    }
+
+
+def return_image_prompts_tool_choice() -> ChatCompletionNamedToolChoiceParam:
+    """tool_choice for the return_image_prompts function."""
+    return {"type": "function", "function": {"name": "return_image_prompts"}}
+
+
+def return_voice_scripts_tool() -> ChatCompletionFunctionToolParam:
+    """Function-calling tool schema for returning voice scripts of several scenes at once.
+
+    llm_service.build_voice_scripts_batch から参照されます。
+    """
+    return {
+        "type": "function",
+        "function": {
+            "name": "return_voice_scripts",
+            "description": "指定されたシーンの読み上げセリフを、シーン番号付きで一度に返す",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "scripts": {
+                        "type": "array",
+                        "description": "シーンごとのセリフ（依頼されたシーン番号のみ）",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "index": {
+                                    "type": "integer",
+                                    "description": "入力で示したシーン番号（1始まり）",
+                                },
+                                "voice_script": {
+                                    "type": "string",
+                                    "description": "実際に読み上げるセリフ（日本語1〜2文。背景説明・SFX/BGM・カメラ指示は含めない）",
+                                },
+                            },
+                            "required": ["index", "voice_script"],
+                        },
+                    }
+                },
+                "required": ["scripts"],
+            },
+        },
+    }
+
+
+def return_voice_scripts_tool_choice() -> ChatCompletionNamedToolChoiceParam:
+    """tool_choice for the return_voice_scripts function."""
+    return {"type": "function", "function": {"name": "return_voice_scripts"}}
+
+
 def style_hint_system() -> str:
     """シーン全体のスタイル方針を決めるためのシステムプロンプトを返す。
 
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import os
+import threading
+from collections.abc import Callable
+
 import pytest
 
 from app.utils.env import outputs_root
@@ -30,6 +33,50 @@ def pytest_load_initial_conftests(args, early_config, parser):
 os.environ.setdefault("PYTEST", "1")
 
 
+class FakeSegmentEncoder:
+    """
+    compose_video の ffmpeg 呼び出し（単一シーンのエンコードと連結）を置き換えるスタブ。
+
+    - `encoded` にエンコードされた画像バイト列、`concatenated` に連結されたパスの並びを記録する
+    - `on_encode` を設定すると各エンコードの途中で呼ばれる（並列度や順序の検証用）
+    """
+
+    def __init__(self) -> None:
+        self.encoded: list[bytes] = []
+        self.concatenated: list[list[str]] = []
+        self.on_encode: Callable[[bytes], None] | None = None
+        self._lock = threading.Lock()
+
+    def single(
+        self, image: bytes, _audio: bytes, _profile: object = None, _threads: int = 0
+    ) -> dict[str, str]:
+        with self._lock:
+            self.encoded.append(image)
+        if self.on_encode is not None:
+            self.on_encode(image)
+        path = f"/tmp/{image.decode('utf-8')}.mp4"
+        return {"video_gcs": "", "video_url": path, "video_path": path}
+
+    def concat(self, paths: list[str]) -> dict[str, str]:
+        self.concatenated.append(list(paths))
+        return {
+            "video_gcs": "",
+            "video_url": "file://concat",
+            "video_path": "/tmp/concat.mp4",
+        }
+
+
+@pytest.fixture
+def fake_segment_encoder(monkeypatch: pytest.MonkeyPatch) -> FakeSegmentEncoder:
+    """セグメントのエンコードと連結を ffmpeg なしのスタブに差し替える。"""
+    from app.pipelines import compose_video as cv
+
+    encoder = FakeSegmentEncoder()
+    monkeypatch.setattr(cv, "_compose_single_scene_video", encoder.single)
+    monkeypatch.setattr(cv, "concat_videos", encoder.concat)
+    return encoder
+
+
 @pytest.fixture(scope="session")
 def test_env():
     """
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, cast
+
+import httpx
+import openai
+
+from app.utils.adaptive import AdaptiveLimiter
+
+
+def _throttled() -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://openrouter.example/v1/chat/completions")
+    response = httpx.Response(429, request=request)
+    # 日本語コメント: SDK の型注釈は httpx2 だが、実行時は httpx の Response も受け付ける
+    return openai.APIStatusError(
+        "rate limited", response=cast(Any, response), body=None
+    )
+
+
+def test_adaptive_limiter_increases_additively_and_halves_on_throttle() -> None:
+    """健全な応答が続くと上限が少しずつ上がり、429 で半減することを確認する。"""
+    limiter = AdaptiveLimiter("image", initial=2, min_limit=1, max_limit=8)
+
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(0.5)
+    assert limiter.limit >= 4
+
+    before = limiter.limit
+    limiter.acquire()
+    limiter.release(0.5, _throttled())
+    assert limiter.limit == max(1, before // 2)
+    snap = limiter.snapshot()
+    assert snap["throttles"] == 1 and snap["in_flight"] == 0
+
+
+def test_adaptive_limiter_holds_limit_when_latency_degrades() -> None:
+    """応答時間が基準の許容倍率を超えた場合は上限を増やさないことを確認する。"""
+    limiter = AdaptiveLimiter("tts", initial=2, max_limit=8, latency_tolerance=2.0)
+    limiter.acquire()
+    limiter.release(0.1)
+    current = limiter.snapshot()["limit"]
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(1.0)
+    assert limiter.limit == current
+
+
+def test_adaptive_limiter_async_waiters_respect_limit() -> None:
+    """非同期の呼び出しでも同時実行数が上限を超えないことを確認する。"""
+    limiter = AdaptiveLimiter("image", initial=2, max_limit=2)
+    peak = 0
+    active = 0
+
+    async def _worker() -> None:
+        nonlocal peak, active
+        await limiter.acquire_async()
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        limiter.release(0.01)
+
+    async def _main() -> None:
+        await asyncio.gather(*(_worker() for _ in range(6)))
+
+    asyncio.run(_main())
+    assert peak == 2
+    assert limiter.snapshot()["successes"] == 6
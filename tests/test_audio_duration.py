@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import io
+import struct
+import wave
+
+from app.utils.audio_duration import audio_duration_sec
+
+# 日本語コメント: MPEG1 Layer III / 128kbps / 44.1kHz / ステレオ（パディングなし）のフレームヘッダ。1フレーム 417 バイト
+_MP3_HEADER = b"\xff\xfb\x90\x00"
+_MP3_FRAME_LEN = 417
+
+
+def _mp3_frames(count: int) -> bytes:
+    return (_MP3_HEADER + b"\x00" * (_MP3_FRAME_LEN - 4)) * count
+
+
+def test_wav_and_flac_durations_from_headers() -> None:
+    """WAV は data チャンク長、FLAC は STREAMINFO から長さを求めることを確認する。"""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(24000)
+        w.writeframes(b"\x00\x00" * 36000)
+    assert audio_duration_sec(buf.getvalue()) == 1.5
+
+    # 日本語コメント: ストリーミング出力のようにサイズが 0xFFFFFFFF の data チャンクでも実データ長で計算する
+    streamed = bytearray(buf.getvalue())
+    data_at = bytes(streamed).index(b"data")
+    streamed[data_at + 4 : data_at + 8] = b"\xff\xff\xff\xff"
+    assert audio_duration_sec(bytes(streamed)) == 1.5
+
+    packed = (44100 << 44) | (1 << 41) | (15 << 36) | 110250
+    streaminfo = struct.pack(
+        ">HH3s3sQ16s", 4096, 4096, b"\0\0\0", b"\0\0\0", packed, b"\0" * 16
+    )
+    flac = b"fLaC" + bytes([0x80]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+    assert audio_duration_sec(flac) == 2.5
+
+
+def test_mp3_duration_by_frame_walk_and_xing_header() -> None:
+    """MP3 は ID3v2 を飛ばして全フレームを走査し、Xing ヘッダがあればそのフレーム数を使うことを確認する。"""
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    plain = id3 + _mp3_frames(100) + b"TAG" + b"\x00" * 125
+    assert audio_duration_sec(plain) == round(100 * 1152 / 44100, 3)
+
+    xing_frame = bytearray(_mp3_frames(1))
+    xing_frame[4 + 32 : 4 + 32 + 12] = b"Xing" + struct.pack(">II", 1, 500)
+    assert audio_duration_sec(bytes(xing_frame) + _mp3_frames(3)) == round(
+        500 * 1152 / 44100, 3
+    )
+
+
+def test_aac_adts_and_unparseable_input() -> None:
+    """ADTS(AAC) のフレームを走査できること、解析できない入力は None（ffprobe フォールバック）になることを確認する。"""
+    length = 200
+    header = bytes(
+        [
+            0xFF,
+            0xF1,
+            (1 << 6) | (3 << 2),
+            (2 << 6) | ((length >> 11) & 0x3),
+            (length >> 3) & 0xFF,
+            ((length & 0x7) << 5) | 0x1F,
+            0xFC,
+        ]
+    )
+    adts = (header + b"\x00" * (length - 7)) * 48
+    assert audio_duration_sec(adts) == round(48 * 1024 / 48000, 3)
+
+    assert audio_duration_sec(b"not audio at all") is None
+    assert audio_duration_sec(_mp3_frames(10)[:-500] + b"garbage" * 100) is None
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import sys
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import pytest
+from PIL import Image
+
+from app.pipelines import compose_video as cv
+from app.pipelines.compose_video import SceneMedia, compose_scene_video
+from tests.conftest import FakeSegmentEncoder
+
+
+def test_single_pass_stream_renders_all_scenes_in_one_graph() -> None:
+    """全シーンの画像/音声が1つの filter_complex で連結され、各シーン長が音声長になることを確認する。"""
+    stream = cv._single_pass_stream(
+        ["a.png", "b.png", "c.png"],
+        ["a.mp3", "b.mp3", "c.mp3"],
+        [1.5, 2.25, 3.0],
+        Path("out.mp4"),
+        cv.RENDER_PROFILES["1080p"],
+    )
+    args: list[str] = stream.compile()
+
+    assert args.count("-filter_complex") == 1
+    assert [args[i + 1] for i, a in enumerate(args) if a == "-t"] == [
+        "1.500",
+        "2.250",
+        "3.000",
+    ]
+    graph = args[args.index("-filter_complex") + 1]
+    assert "concat=a=1:n=3:v=1" in graph
+    assert "atrim=duration=2.250" in graph
+    assert args[-2:] == ["out.mp4", "-y"]
+
+
+def test_compose_scene_video_falls_back_to_segments(
+    monkeypatch: pytest.MonkeyPatch, fake_segment_encoder: FakeSegmentEncoder
+) -> None:
+    """一括レンダーが失敗した場合、シーンごとのエンコード + 連結に切り替わることを確認する。"""
+
+    def _fail(
+        _images: list[bytes], _audios: list[bytes], _profile: object
+    ) -> dict[str, str]:
+        raise cv.ffmpeg.Error("ffmpeg", b"", b"boom")
+
+    monkeypatch.setattr(cv, "_compose_single_pass", _fail)
+
+    result = compose_scene_video(SceneMedia(image=[b"s1", b"s2"], audio=[b"a1", b"a2"]))
+
+    assert result["video_url"] == "file://concat"
+    assert fake_segment_encoder.concatenated == [["/tmp/s1.mp4", "/tmp/s2.mp4"]]
+
+
+def test_compose_scene_video_encodes_segments_in_parallel_in_order(
+    monkeypatch: pytest.MonkeyPatch, fake_segment_encoder: FakeSegmentEncoder
+) -> None:
+    """セグメント方式では複数シーンを同時にエンコードし、連結はシーン順を保つことを確認する。"""
+    settings = dataclasses.replace(
+        cv.get_settings(), single_pass_render=False, segment_encode_workers=3
+    )
+    monkeypatch.setattr(cv, "get_settings", lambda: settings)
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _track(image: bytes) -> None:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        # 日本語コメント: 先頭シーンほど遅く終わるようにして順序の維持を確かめる
+        time.sleep(0.05 * (4 - int(image.decode("utf-8")[1:])))
+        with lock:
+            active -= 1
+
+    fake_segment_encoder.on_encode = _track
+
+    compose_scene_video(
+        SceneMedia(image=[b"s1", b"s2", b"s3"], audio=[b"a1", b"a2", b"a3"])
+    )
+
+    assert peak == 3
+    assert fake_segment_encoder.concatenated == [
+        ["/tmp/s1.mp4", "/tmp/s2.mp4", "/tmp/s3.mp4"]
+    ]
+
+
+def test_segment_encode_workers_share_cpus(monkeypatch: pytest.MonkeyPatch) -> None:
+    """既定のワーカー数は CPU 数の半分で、ワーカー数 × ffmpeg スレッド数が CPU 数を超えないことを確認する。"""
+    settings = dataclasses.replace(cv.get_settings(), segment_encode_workers=0)
+    monkeypatch.setattr(cv, "get_settings", lambda: settings)
+    monkeypatch.setattr(cv, "_available_cpus", lambda: 8)
+
+    workers = cv.segment_encode_workers(10)
+    assert workers == 4
+    assert cv.segment_encode_threads(workers) == 2
+    assert cv.segment_encode_threads(1) == 0
+
+    args: list[str] = cv._single_scene_stream(
+        "a.png", "a.mp3", Path("out.mp4"), 2.0, cv.RENDER_PROFILES["1080p"], threads=2
+    ).compile()
+    assert args[args.index("-threads") + 1] == "2"
+
+
+def test_parallel_segment_encode_reports_stderr_only_on_failure(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """並列エンコードでは ffmpeg を quiet で実行し、失敗時だけ標準エラーを表示することを確認する。"""
+    quiet_flags: list[bool] = []
+
+    class _Stream:
+        def __init__(self, fail: bool) -> None:
+            self.fail = fail
+
+        def run(self, quiet: bool = False) -> None:
+            quiet_flags.append(quiet)
+            if self.fail:
+                raise cv.ffmpeg.Error("ffmpeg", b"", b"encoder exploded")
+
+    outcomes = iter([False, True])
+
+    def _fake_stream(*_args: object, **_kwargs: object) -> _Stream:
+        return _Stream(next(outcomes))
+
+    def _fake_duration(_audio: bytes, _path: str) -> float:
+        return 1.0
+
+    def _fake_output_path(_prefix: str) -> Path:
+        return Path("/tmp/out.mp4")
+
+    def _fake_result(path: Path) -> dict[str, str]:
+        return {"video_path": str(path)}
+
+    monkeypatch.setattr(cv, "_audio_duration_sec", _fake_duration)
+    monkeypatch.setattr(cv, "_single_scene_stream", _fake_stream)
+    monkeypatch.setattr(cv, "_new_output_path", _fake_output_path)
+    monkeypatch.setattr(cv, "_video_result", _fake_result)
+
+    cv._compose_single_scene_video(
+        b"img", b"aud", cv.RENDER_PROFILES["1080p"], threads=2
+    )
+    assert capsys.readouterr().err == ""
+    with pytest.raises(cv.ffmpeg.Error):
+        cv._compose_single_scene_video(
+            b"img", b"aud", cv.RENDER_PROFILES["1080p"], threads=2
+        )
+
+    assert quiet_flags == [True, True]
+    assert "encoder exploded" in capsys.readouterr().err
+
+
+def test_still_image_profile_uses_low_fps_and_long_gop(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """静止画プロファイルでは入力/出力とも低 fps・stillimage チューニング・長い GOP になることを確認する。"""
+    settings = dataclasses.replace(
+        cv.get_settings(),
+        still_image_encode=True,
+        still_image_fps=4,
+        still_image_gop_sec=10.0,
+    )
+    monkeypatch.setattr(cv, "get_settings", lambda: settings)
+
+    args: list[str] = cv._single_scene_stream(
+        "a.png", "a.mp3", Path("out.mp4"), 2.0, cv.RENDER_PROFILES["1080p"]
+    ).compile()
+
+    def _opt(name: str) -> str:
+        return args[args.index(name) + 1]
+
+    assert _opt("-framerate") == "4" and _opt("-r") == "4"
+    assert _opt("-tune") == "stillimage"
+    assert _opt("-g") == "40" and _opt("-sc_threshold") == "0"
+    assert _opt("-movflags") == "+faststart"
+    assert "-b:v" not in args
+
+
+def test_render_profiles_size_output_from_profile_or_image() -> None:
+    """native/preview は画像サイズ（偶数・長辺上限）に、vertical は 1080x1920 に合わせることを確認する。"""
+    with BytesIO() as buf:
+        Image.new("RGB", (577, 1025)).save(buf, format="PNG")
+        portrait = buf.getvalue()
+
+    native = cv._resolve_frame(cv.render_profile("native"), portrait)
+    preview = cv._resolve_frame(cv.render_profile("preview"), portrait)
+    vertical = cv._resolve_frame(
+        cv.render_profile("vertical", fps=24, video_bitrate="4000k"), portrait
+    )
+
+    assert (native.width, native.height) == (576, 1024)
+    assert (preview.width, preview.height) == (360, 640)
+    assert (vertical.width, vertical.height, vertical.fps) == (1080, 1920, 24)
+
+    args: list[str] = cv._single_scene_stream(
+        "a.png", "a.mp3", Path("out.mp4"), 2.0, vertical
+    ).compile()
+    assert (
+        "scale=1080:1920:force_original_aspect_ratio=decrease"
+        in args[args.index("-filter_complex") + 1]
+    )
+    assert args[args.index("-b:v") + 1] == "4000k" and "-crf" not in args
+    assert args[args.index("-r") + 1] == "24"
+
+    with pytest.raises(ValueError):
+        cv.render_profile("8k")
+
+
+def test_run_ffmpeg_async_kills_child_on_cancel(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """待機中にキャンセルされたら子プロセスを kill して回収することを確認する。"""
+    from app.utils import ffmpeg_async
+
+    class _Stream:
+        def compile(self, cmd: str = "ffmpeg") -> list[str]:
+            return [sys.executable, "-c", "import time; time.sleep(30)"]
+
+    spawned: list[asyncio.subprocess.Process] = []
+    original = asyncio.create_subprocess_exec
+
+    async def _spy(*args: Any, **kwargs: Any) -> asyncio.subprocess.Process:
+        proc = await original(*args, **kwargs)
+        spawned.append(proc)
+        return proc
+
+    monkeypatch.setattr(ffmpeg_async.asyncio, "create_subprocess_exec", _spy)
+
+    async def _main() -> None:
+        task = asyncio.ensure_future(ffmpeg_async.run_ffmpeg_async(_Stream()))
+        while not spawned:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_main())
+    assert spawned[0].returncode is not None
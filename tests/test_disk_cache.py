@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from app.utils.disk_cache import DiskCache
+
+
+def test_disk_cache_hit_and_miss(tmp_path: Path) -> None:
+    """保存した値が取得でき、ヒット/ミスが数えられることを確認する。"""
+    cache = DiskCache(tmp_path, max_bytes=1024)
+    key = DiskCache.make_key("model", "prompt", b"ref")
+    assert cache.get(key) is None
+    cache.put(key, b"png-bytes")
+    assert cache.get(key) == b"png-bytes"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_cache_make_key_is_unambiguous() -> None:
+    """要素の区切りが異なる入力が同じキーにならないことを確認する。"""
+    assert DiskCache.make_key("ab", "c") != DiskCache.make_key("a", "bc")
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """上限超過時に最も古く使われたエントリが追い出されることを確認する。"""
+    cache = DiskCache(tmp_path, max_bytes=20)
+    cache.put("aa01", b"x" * 8)
+    cache.put("aa02", b"y" * 8)
+    # 日本語コメント: aa01 を古く見せてから aa02 を参照し、aa01 が追い出し対象になるようにする
+    os.utime(cache._path("aa01"), (1, 1))
+    cache.put("aa03", b"z" * 8)
+    assert cache.get("aa01") is None
+    assert cache.get("aa02") == b"y" * 8
+    assert cache.get("aa03") == b"z" * 8
+    assert cache.stats()["evictions"] == 1
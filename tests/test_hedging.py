@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+
+from app.utils.hedging import Hedger
+
+
+def _warm_up(h: Hedger, n: int) -> None:
+    for _ in range(n):
+        h.call(lambda: time.sleep(0.01))
+
+
+def test_hedger_sends_duplicate_for_slow_call_and_counts_win() -> None:
+    """遅い呼び出しには追加リクエストを送り、先に返った追加側の結果を使うことを確認する。"""
+    h = Hedger("image", percentile=90, min_samples=5, max_extra=1, budget_ratio=1.0)
+    _warm_up(h, 5)
+    counter = itertools.count()
+
+    def _slow_then_fast() -> str:
+        if next(counter) == 0:
+            time.sleep(1.0)
+            return "primary"
+        return "hedge"
+
+    started = time.monotonic()
+    assert h.call(_slow_then_fast) == "hedge"
+    assert time.monotonic() - started < 0.5
+    snap = h.snapshot()
+    assert snap["hedges_sent"] == 1 and snap["hedge_wins"] == 1
+
+
+def test_hedger_respects_budget() -> None:
+    """予算（全呼び出し数に対する比率）を使い切ると追加リクエストを送らないことを確認する。"""
+    h = Hedger("image", percentile=50, min_samples=3, max_extra=2, budget_ratio=0.0)
+    _warm_up(h, 3)
+    calls = 0
+
+    def _slow() -> str:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.1)
+        return "ok"
+
+    assert h.call(_slow) == "ok"
+    assert calls == 1
+    assert h.snapshot()["hedges_sent"] == 0
+
+
+def test_hedger_async_cancels_loser() -> None:
+    """非同期版でも先に返った方を使い、遅い側はキャンセルされることを確認する。"""
+    h = Hedger("image", percentile=90, min_samples=3, max_extra=1, budget_ratio=1.0)
+    cancelled = False
+    counter = itertools.count()
+
+    async def _fast() -> str:
+        await asyncio.sleep(0.01)
+        return "warm"
+
+    async def _slow_then_fast() -> str:
+        nonlocal cancelled
+        if next(counter) == 0:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            return "primary"
+        return "hedge"
+
+    async def _main() -> str:
+        for _ in range(3):
+            await h.call_async(_fast)
+        result = await h.call_async(_slow_then_fast)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(_main()) == "hedge"
+    assert cancelled
+    assert h.snapshot()["hedge_wins"] == 1
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from app.utils.images import image_mime, normalize_reference_image
+
+
+def _encode(img: Image.Image, fmt: str) -> bytes:
+    with BytesIO() as buf:
+        img.save(buf, format=fmt)
+        return buf.getvalue()
+
+
+def test_normalize_downscales_and_drops_unused_alpha() -> None:
+    """不透明な大きい RGBA PNG は長辺を縮小し、JPEG として小さくなることを確認する。"""
+    src = Image.linear_gradient("L").resize((2400, 1200)).convert("RGBA")
+    data = _encode(src, "PNG")
+
+    out = normalize_reference_image(data, max_edge=512, fmt="auto", quality=85)
+
+    assert image_mime(out) == "image/jpeg"
+    with Image.open(BytesIO(out)) as img:
+        assert img.size == (512, 256)
+        assert img.mode == "RGB"
+    assert len(out) < len(data)
+
+
+def test_normalize_keeps_transparency_as_png() -> None:
+    """透過を使っている画像は PNG のまま（アルファ付き）になることを確認する。"""
+    src = Image.new("RGBA", (1600, 800), (255, 0, 0, 0))
+    src.paste((0, 0, 255, 255), (0, 0, 800, 800))
+    out = normalize_reference_image(_encode(src, "PNG"), max_edge=400, fmt="auto")
+
+    assert image_mime(out) == "image/png"
+    with Image.open(BytesIO(out)) as img:
+        assert img.size == (400, 200)
+        assert img.mode == "RGBA"
+
+
+def test_normalize_returns_small_or_unreadable_input_unchanged() -> None:
+    """縮小不要で形式も同じ画像と、読み込めないバイト列はそのまま返ることを確認する。"""
+    small_jpeg = _encode(Image.new("RGB", (64, 64), (10, 20, 30)), "JPEG")
+    assert normalize_reference_image(small_jpeg, max_edge=512, fmt="auto") == small_jpeg
+    assert normalize_reference_image(b"not-an-image") == b"not-an-image"
+
+
+def test_image_mime_detects_real_format() -> None:
+    """PNG 以外の形式（BMP/TIFF/WebP）を image/png と誤って判定しないことを確認する。"""
+    src = Image.new("RGB", (8, 8), (0, 128, 255))
+
+    assert image_mime(_encode(src, "BMP")) == "image/bmp"
+    assert image_mime(_encode(src, "TIFF")) == "image/tiff"
+    assert image_mime(_encode(src, "WEBP")) == "image/webp"
+    assert image_mime(b"unknown") == "image/png"
+
+
+def test_load_reference_images_converts_unsupported_formats(tmp_path: Path) -> None:
+    """UI のアップロードは PNG/JPEG をそのまま渡し、BMP などは PNG に変換することを確認する。"""
+    from app.ui.gradio_ui import _load_reference_images
+
+    src = Image.new("RGB", (8, 8), (0, 128, 255))
+    jpeg_path = tmp_path / "a.jpg"
+    jpeg_path.write_bytes(_encode(src, "JPEG"))
+    bmp_path = tmp_path / "b.bmp"
+    bmp_path.write_bytes(_encode(src, "BMP"))
+
+    jpeg, bmp = _load_reference_images(
+        [{"path": str(jpeg_path)}, {"path": str(bmp_path)}]
+    )
+
+    assert jpeg == jpeg_path.read_bytes()
+    assert image_mime(bmp) == "image/png"
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+from typing import Any
+
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import RateLimiter, TokenBucket, estimate_request_tokens
+
+
+def test_token_bucket_reserves_in_order() -> None:
+    """容量を使い切ると、以降の予約は補充速度に応じた待ち秒数になることを確認する。"""
+    bucket = TokenBucket(rate_per_min=60)  # 1トークン/秒
+    for _ in range(60):
+        assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(2.0, abs=0.05)
+
+
+def test_rate_limiter_waits_instead_of_failing(monkeypatch: pytest.MonkeyPatch) -> None:
+    """rpm/tpm のどちらかが足りなければ、長い方の待ち時間だけ待つことを確認する。"""
+    sleeps: list[float] = []
+    monkeypatch.setattr(rate_limit, "_sleep", sleeps.append)
+    limiter = RateLimiter("openai:test", rpm=120, tpm=600)
+
+    limiter.acquire(tokens=600)
+    assert sleeps == []
+    limiter.acquire(tokens=60)  # tpm が 10 トークン/秒で補充されるため約6秒
+    assert sleeps and sleeps[0] == pytest.approx(6.0, abs=0.1)
+    assert limiter.stats()["waits"] == 1
+
+    async def _acquire() -> None:
+        await limiter.acquire_async(tokens=0)
+
+    asyncio.run(_acquire())  # rpm には余裕があるので待たない
+
+
+def test_rate_limiter_budget_lookup(monkeypatch: pytest.MonkeyPatch) -> None:
+    """モデル別の予算を優先し、なければプロバイダ全体の予算を共有することを確認する。"""
+    settings = dataclasses.replace(
+        rate_limit.get_settings(),
+        rate_limits='{"openai:gpt-4o-mini": {"rpm": 500, "tpm": 200000}, "openrouter": {"rpm": 60}}',
+    )
+    monkeypatch.setattr(rate_limit, "get_settings", lambda: settings)
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    rate_limit._budgets.cache_clear()
+    try:
+        assert (
+            rate_limit.rate_limiter("openai", "gpt-4o-mini").name
+            == "openai:gpt-4o-mini"
+        )
+        a = rate_limit.rate_limiter("openrouter", "model-a")
+        b = rate_limit.rate_limiter("openrouter", "model-b")
+        assert a is b and a.name == "openrouter"
+    finally:
+        rate_limit._budgets.cache_clear()
+
+
+def test_estimate_request_tokens_counts_messages_and_output() -> None:
+    """メッセージ本文と出力上限（max_tokens）の合計で見積もることを確認する。"""
+    req: dict[str, Any] = {
+        "model": "m",
+        "messages": [{"role": "user", "content": "あいう"}],
+        "max_tokens": 100,
+    }
+    assert estimate_request_tokens(req) == 3 + 100
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Callable
+from pathlib import Path
+
+import httpx
+import pytest
+
+import app.services.reference_fetcher as rf
+from app.utils.disk_cache import DiskCache
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def _install(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    handler: Callable[[httpx.Request], httpx.Response],
+) -> None:
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(rf, "_http_client", lambda: client)
+    cache = DiskCache(tmp_path / "http_refs", 1024 * 1024)
+    monkeypatch.setattr(rf, "_ref_cache", lambda: cache)
+
+
+def test_fetch_revalidates_with_etag_and_reuses_cached_body(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """2回目は If-None-Match で再検証し、304 ならキャッシュ済みの本文を返すことを確認する。"""
+    seen: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(
+            200, content=PNG, headers={"content-type": "image/png", "etag": '"v1"'}
+        )
+
+    _install(monkeypatch, tmp_path, handler)
+
+    assert rf.fetch_reference_image("https://example.com/a.png") == PNG
+    assert rf.fetch_reference_image("https://example.com/a.png") == PNG
+    assert seen == [None, '"v1"']
+
+
+def test_fetch_reference_images_drops_oversized_and_non_image(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """サイズ上限超過と画像以外の応答は除外し、残りは入力順で返すことを確認する。"""
+    settings = dataclasses.replace(rf.get_settings(), ref_http_max_bytes=1024)
+    monkeypatch.setattr(rf, "get_settings", lambda: settings)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/big.png":
+            return httpx.Response(
+                200,
+                content=b"\x89PNG" + b"\x00" * 4096,
+                headers={"content-type": "image/png"},
+            )
+        if request.url.path == "/page.html":
+            return httpx.Response(
+                200, content=b"<html></html>", headers={"content-type": "text/html"}
+            )
+        if request.url.path == "/blob":
+            return httpx.Response(
+                200, content=PNG, headers={"content-type": "application/octet-stream"}
+            )
+        return httpx.Response(200, content=PNG, headers={"content-type": "image/png"})
+
+    _install(monkeypatch, tmp_path, handler)
+
+    urls = [
+        f"https://example.com{p}"
+        for p in ("/big.png", "/ok.png", "/page.html", "/blob")
+    ]
+    assert rf.fetch_reference_images(urls) == [PNG, PNG]
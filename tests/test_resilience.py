@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, cast
+
+import httpx
+import openai
+import pytest
+
+from app.utils import resilience
+from app.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    call_with_retry,
+    call_with_retry_async,
+    is_retryable,
+)
+
+
+def _status_error(
+    status: int, headers: dict[str, str] | None = None
+) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    # 日本語コメント: SDK の型注釈は httpx2 だが、実行時は httpx の Response も受け付ける
+    return openai.APIStatusError("error", response=cast(Any, response), body=None)
+
+
+def test_is_retryable_classifies_status_codes() -> None:
+    """429/5xx はリトライ対象、その他の 4xx は即失敗になることを確認する。"""
+    assert is_retryable(_status_error(429))
+    assert is_retryable(_status_error(503))
+    assert not is_retryable(_status_error(400))
+    assert not is_retryable(_status_error(401))
+    assert not is_retryable(ValueError("bad input"))
+
+
+def test_call_with_retry_honours_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Retry-After ヘッダの秒数以上待ってからリトライし、成功すればその値を返すことを確認する。"""
+    monkeypatch.setattr(resilience, "_breakers", {})
+    sleeps: list[float] = []
+    monkeypatch.setattr(resilience, "_sleep", sleeps.append)
+
+    attempts: list[int] = []
+
+    def _flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _status_error(429, {"retry-after": "2"})
+        return "ok"
+
+    assert call_with_retry("test-provider", _flaky) == "ok"
+    assert len(attempts) == 3
+    assert len(sleeps) == 2 and all(s >= 2.0 for s in sleeps)
+
+
+def test_call_with_retry_does_not_retry_fatal_errors(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """4xx などの失敗はリトライせず、そのまま送出されることを確認する。"""
+    monkeypatch.setattr(resilience, "_breakers", {})
+    sleeps: list[float] = []
+    monkeypatch.setattr(resilience, "_sleep", sleeps.append)
+    attempts: list[int] = []
+
+    def _bad_request() -> str:
+        attempts.append(1)
+        raise _status_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        call_with_retry("test-provider", _bad_request)
+    assert attempts == [1]
+    assert sleeps == []
+
+
+def test_circuit_breaker_opens_and_recovers() -> None:
+    """連続失敗で open になり、リセット時間後の試行が成功すると closed に戻ることを確認する。"""
+    breaker = CircuitBreaker("test-provider", failure_threshold=2, reset_timeout=0.05)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record(_status_error(503))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    # 日本語コメント: half_open 中の試行は1件のみ
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(None)
+    assert breaker.state == "closed"
+
+
+def test_circuit_breaker_ignores_rate_limits() -> None:
+    """429 が続いてもブレーカーは開かず、5xx の連続失敗の計数も崩さないことを確認する。"""
+    breaker = CircuitBreaker("test-provider", failure_threshold=2, reset_timeout=60)
+
+    for _ in range(5):
+        breaker.before_call()
+        breaker.record(_status_error(429))
+    assert breaker.state == "closed"
+
+    breaker.record(_status_error(503))
+    breaker.record(_status_error(429))
+    breaker.record(_status_error(503))
+    assert breaker.state == "open"
+
+
+def test_cancelled_half_open_probe_releases_breaker(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """half_open の試行がキャンセルされても、次の呼び出しが試行として通ることを確認する。"""
+    breaker = CircuitBreaker("test-provider", failure_threshold=1, reset_timeout=0.01)
+    monkeypatch.setattr(resilience, "_breakers", {"test-provider": breaker})
+    breaker.record(_status_error(503))
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+
+    async def _hang() -> str:
+        await asyncio.sleep(5)
+        return "late"
+
+    async def _run() -> None:
+        task = asyncio.ensure_future(call_with_retry_async("test-provider", _hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_run())
+    # 日本語コメント: キャンセルは成功とも失敗とも数えない（half_open のまま、試行枠は戻る）
+    assert breaker.state == "half_open"
+    assert call_with_retry("test-provider", lambda: "ok") == "ok"
+    assert breaker.state == "closed"
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.utils.scheduler import AsyncTaskGraph, TaskGraph
+
+
+def test_task_graph_passes_dependency_results() -> None:
+    """依存タスクの結果が deps の順で渡されることを確認する。"""
+    g = TaskGraph(max_workers=2)
+    g.add("a", lambda: 1)
+    g.add("b", lambda: 10)
+
+    def _sum(a: int, b: int) -> int:
+        return a + b
+
+    g.add("c", _sum, deps=["a", "b"])
+    assert g.run() == {"a": 1, "b": 10, "c": 11}
+
+
+def test_task_graph_respects_max_workers() -> None:
+    """同時実行数が max_workers を超えないことを確認する。"""
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def _work() -> None:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    g = TaskGraph(max_workers=2)
+    for i in range(6):
+        g.add(f"t{i}", _work)
+    g.run()
+    assert peak <= 2
+
+
+def test_task_graph_propagates_errors() -> None:
+    """失敗したタスクの例外が送出され、依存タスクは実行されないことを確認する。"""
+    called: list[str] = []
+
+    def _boom() -> None:
+        raise RuntimeError("boom")
+
+    g = TaskGraph(max_workers=2)
+    g.add("a", _boom)
+
+    def _after(_a: None) -> None:
+        called.append("b")
+
+    g.add("b", _after, deps=["a"])
+    with pytest.raises(RuntimeError, match="boom"):
+        g.run()
+    assert called == []
+
+
+def test_async_task_graph_passes_dependency_results() -> None:
+    """非同期版でも依存タスクの結果が渡されることを確認する。"""
+
+    async def _one() -> int:
+        return 1
+
+    async def _plus(a: int) -> int:
+        await asyncio.sleep(0)
+        return a + 1
+
+    g = AsyncTaskGraph(max_concurrency=1)
+    g.add("a", _one)
+    g.add("b", _plus, deps=["a"])
+    g.add("c", _plus, deps=["b"])
+    assert asyncio.run(g.run()) == {"a": 1, "b": 2, "c": 3}
+
+
+def test_async_task_graph_awaits_on_result() -> None:
+    """AsyncTaskGraph の on_result はコルーチンとして各タスクの完了時に await されることを確認する。"""
+    recorded: list[tuple[str, object]] = []
+
+    async def _one() -> int:
+        return 1
+
+    async def _plus(a: int) -> int:
+        return a + 1
+
+    async def _record(key: str, value: object) -> None:
+        await asyncio.sleep(0)
+        recorded.append((key, value))
+
+    g = AsyncTaskGraph(max_concurrency=2)
+    g.add("a", _one)
+    g.add("b", _plus, deps=["a"])
+    asyncio.run(g.run(preloaded={"a": 5}, on_result=_record))
+
+    # 日本語コメント: 既知（preloaded）のタスクは記録し直さない
+    assert recorded == [("b", 6)]
@@ -5,7 +5,7 @@ from pathlib import Path
 
 import pytest
 
-from app.services.llm_service import build_image_prompt, split_scenes
+from app.services.llm_service import SceneSpec, build_image_prompt, split_scenes
 from app.services.image_service import generate_image
 from app.services.tts_service import generate_tts
 from app.utils.env import outputs_root
@@ -98,3 +98,436 @@ def test_generate_tts_real(test_env, tmp_path: Path):
     out.write_bytes(audio)
     print("audio path:", str(out))
     assert out.is_file() and out.stat().st_size > 0
+
+
+def test_generate_tts_uses_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """
+    テスト概要: TTS キャッシュが有効なとき、同一条件の2回目は API を呼ばないことを確認します（オフライン）。
+    """
+    from app.services import tts_service as ts
+    from app.utils.disk_cache import DiskCache
+
+    cache = DiskCache(tmp_path, max_bytes=1024 * 1024)
+    monkeypatch.setattr(ts, "_tts_cache", lambda: cache)
+
+    calls: list[tuple[str, str, str, str]] = []
+
+    def _fake_uncached(text: str, voice: str, fmt: str, speed: str) -> bytes:
+        calls.append((text, voice, fmt, speed))
+        return f"{text}:{speed}".encode()
+
+    monkeypatch.setattr(ts, "_generate_tts_uncached", _fake_uncached)
+
+    first = generate_tts("こんにちは", voice="alloy", speed="fast")
+    second = generate_tts("こんにちは", voice="alloy", speed="fast")
+    other_speed = generate_tts("こんにちは", voice="alloy", speed="slow")
+
+    assert first == second
+    assert other_speed != first
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+
+
+class _FakeCompletions:
+    """日本語コメント: chat.completions.create の呼び出し回数を数えるフェイク。"""
+
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.calls = 0
+
+    def create(self, **_kwargs: object) -> object:
+        from types import SimpleNamespace
+
+        self.calls += 1
+        message = SimpleNamespace(content=self.content, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_build_image_prompt_memoized(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """
+    テスト概要: 同一リクエストの2回目はメモ化により LLM を呼ばず、memo_bypass 内では呼ぶことを確認します（オフライン）。
+    """
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import MemoStore, memo_bypass
+
+    completions = _FakeCompletions("A blue bird at dawn")
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ls, "openai_client", lambda: fake_client)
+    store = MemoStore(tmp_path)
+    monkeypatch.setattr(ls, "_llm_memo", lambda: store)
+
+    assert build_image_prompt("青い鳥", style_hint="水彩") == "A blue bird at dawn"
+    assert build_image_prompt("青い鳥", style_hint="水彩") == "A blue bird at dawn"
+    assert completions.calls == 1
+
+    with memo_bypass():
+        build_image_prompt("青い鳥", style_hint="水彩")
+    assert completions.calls == 2
+
+    build_image_prompt("青い鳥", style_hint="アニメ")
+    assert completions.calls == 3
+
+
+def test_memoized_keeps_result_when_put_fails(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """
+    テスト概要: メモへの保存が失敗しても、計算済みの LLM 結果を捨てずに返すことを確認します（オフライン）。
+    """
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import MemoStore
+
+    completions = _FakeCompletions("A blue bird at dawn")
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ls, "openai_client", lambda: fake_client)
+    store = MemoStore(tmp_path)
+
+    def _broken_put(_key: str, _value: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "put", _broken_put)
+    monkeypatch.setattr(ls, "_llm_memo", lambda: store)
+
+    assert build_image_prompt("青い鳥", style_hint="水彩") == "A blue bird at dawn"
+
+
+def test_split_scenes_does_not_memoize_fallback(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """
+    テスト概要: シーンが得られず既定シーンにフォールバックした結果はメモ化されないことを確認します（オフライン）。
+    """
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import MemoStore
+
+    completions = _FakeCompletions("[]")
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ls, "openai_client", lambda: fake_client)
+    store = MemoStore(tmp_path)
+    monkeypatch.setattr(ls, "_llm_memo", lambda: store)
+
+    assert [sc["text"] for sc in split_scenes("森へ行った。")] == ["森へ行った。"]
+    split_scenes("森へ行った。")
+    assert completions.calls == 2
+    assert store.stats()["memory_entries"] == 0
+
+
+def _tool_response(arguments: str) -> object:
+    """日本語コメント: tool call を1件含む chat.completions のレスポンスを模したオブジェクト。"""
+    from types import SimpleNamespace
+
+    call = SimpleNamespace(function=SimpleNamespace(arguments=arguments))
+    message = SimpleNamespace(content=None, tool_calls=[call])
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _specs(*texts: str) -> list[SceneSpec]:
+    return [
+        {
+            "text": t,
+            "image_hint": "",
+            "voice_hint": "",
+            "voice_script": "",
+            "sfx_hint": "",
+        }
+        for t in texts
+    ]
+
+
+def test_build_image_prompts_batch_single_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    テスト概要: 一括生成が1回の呼び出しで、シーン番号順のプロンプト配列を返すことを確認します（オフライン）。
+    """
+    import json
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import memo_bypass
+
+    calls: list[dict[str, object]] = []
+
+    def _create(**kwargs: object) -> object:
+        calls.append(kwargs)
+        return _tool_response(
+            json.dumps(
+                {
+                    "prompts": [
+                        {"index": 2, "prompt": "two"},
+                        {"index": 1, "prompt": "one"},
+                    ]
+                }
+            )
+        )
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=_create))
+    )
+    monkeypatch.setattr(ls, "openai_client", lambda: fake)
+
+    with memo_bypass():
+        prompts = ls.build_image_prompts_batch(_specs("A", "B"), "水彩")
+
+    assert prompts == ["one", "two"]
+    assert len(calls) == 1
+
+
+def test_build_image_prompts_batch_falls_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    テスト概要: 一括生成の件数が揃わない場合、シーンごとの呼び出しにフォールバックすることを確認します（オフライン）。
+    """
+    import json
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import memo_bypass
+
+    def _create(**_kwargs: object) -> object:
+        return _tool_response(json.dumps({"prompts": [{"index": 1, "prompt": "one"}]}))
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=_create))
+    )
+    monkeypatch.setattr(ls, "openai_client", lambda: fake)
+
+    def _single(text: str, style_hint: str | None = None) -> str:
+        return f"single:{text}"
+
+    monkeypatch.setattr(ls, "build_image_prompt", _single)
+
+    with memo_bypass():
+        prompts = ls.build_image_prompts_batch(_specs("A", "B"), "水彩")
+
+    assert prompts == ["single:A", "single:B"]
+
+
+def test_build_voice_scripts_batch_fills_missing(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    テスト概要: voice_script が空のシーンだけを一括生成し、既存のセリフは保持されることを確認します（オフライン）。
+    """
+    import json
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import memo_bypass
+
+    calls: list[dict[str, object]] = []
+
+    def _create(**kwargs: object) -> object:
+        calls.append(kwargs)
+        return _tool_response(
+            json.dumps(
+                {
+                    "scripts": [
+                        {
+                            "index": 2,
+                            "voice_script": "ナレーション: （静かに）そして朝が来た。",
+                        }
+                    ]
+                }
+            )
+        )
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=_create))
+    )
+    monkeypatch.setattr(ls, "openai_client", lambda: fake)
+
+    scenes = _specs("夜", "朝")
+    scenes[0]["voice_script"] = "夜が更けた。"
+    with memo_bypass():
+        scripts = ls.build_voice_scripts_batch(scenes)
+
+    assert scripts == ["夜が更けた。", "そして朝が来た。"]
+    assert len(calls) == 1
+
+
+def test_plan_story_returns_scenes_and_style(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    テスト概要: 融合プランニングが1回の呼び出しでシーンとスタイルヒントを返すことを確認します（オフライン）。
+    """
+    import json
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import memo_bypass
+
+    calls: list[dict[str, object]] = []
+
+    def _create(**kwargs: object) -> object:
+        calls.append(kwargs)
+        return _tool_response(
+            json.dumps(
+                {
+                    "scenes": [
+                        {
+                            "text": "森",
+                            "image_hint": "",
+                            "voice_hint": "",
+                            "voice_script": "森へ。",
+                            "sfx_hint": "",
+                        }
+                    ],
+                    "style_hint": "絵本風、やさしい色彩",
+                }
+            )
+        )
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=_create))
+    )
+    monkeypatch.setattr(ls, "openai_client", lambda: fake)
+
+    def _unexpected(*_args: object, **_kwargs: object) -> str:
+        raise AssertionError("fallback should not be called")
+
+    monkeypatch.setattr(ls, "decide_style_hint", _unexpected)
+
+    with memo_bypass():
+        scenes, style = ls.plan_story("森へ行った。", max_scenes=2)
+
+    assert [sc["text"] for sc in scenes] == ["森"]
+    assert style == "絵本風、やさしい色彩"
+    assert len(calls) == 1
+
+
+def test_build_image_request_reuses_encoded_references(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """同じ参照画像は1回だけ添付・エンコードされ、次のシーンではキャッシュが使われることを確認する。"""
+    from app.services import image_service as im
+    from app.utils.images import DataUrlCache
+
+    cache = DataUrlCache(max_chars=1024 * 1024)
+    monkeypatch.setattr(im, "_data_url_cache", lambda: cache)
+    png = b"\x89PNG\r\n\x1a\n" + b"base"
+    jpeg = b"\xff\xd8\xff" + b"scene"
+
+    req = im._build_image_request("p", "1024x576", [png], [jpeg, png])
+    urls = [part["image_url"]["url"] for part in req["messages"][0]["content"][1:]]
+    assert [u.split(";")[0] for u in urls] == ["data:image/png", "data:image/jpeg"]
+
+    im._build_image_request("p2", "1024x576", [png], [jpeg])
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_build_image_request_passes_anchor_as_reference_sheet(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """アンカー画像は参照シートとして添付され、直近シーン向けの指示が付かないことを確認する。"""
+    from app.services import image_service as im
+    from app.utils.images import DataUrlCache
+
+    monkeypatch.setattr(
+        im, "_data_url_cache", lambda: DataUrlCache(max_chars=1024 * 1024)
+    )
+    png = b"\x89PNG\r\n\x1a\n" + b"anchor"
+
+    req = im._build_image_request("p", "1024x576", None, None, anchor_image=png)
+    content = req["messages"][0]["content"]
+    assert "reference sheet" in content[0]["text"]
+    assert "most recent scene" not in content[0]["text"]
+    assert len(content) == 2
+
+
+def test_generate_image_skips_cache_key_when_cache_disabled(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """画像キャッシュ無効時は参照画像のハッシュ（キャッシュキー）を計算しないことを確認する。"""
+    from app.services import image_service as im
+
+    def _unexpected(*_args: object) -> str:
+        raise AssertionError("cache key should not be computed")
+
+    class _Stop(Exception):
+        pass
+
+    def _stop(*_args: object) -> dict[str, object]:
+        raise _Stop()
+
+    monkeypatch.setattr(im, "_image_cache", lambda: None)
+    monkeypatch.setattr(im, "_image_cache_key", _unexpected)
+    monkeypatch.setattr(im, "_build_image_request", _stop)
+
+    with pytest.raises(_Stop):
+        im.generate_image("p", base_images=[b"\x89PNG\r\n\x1a\nbase"])
+
+
+def test_build_image_prompts_batch_fallback_runs_in_parallel(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    テスト概要: 一括生成のフォールバック時、シーンごとの呼び出しが直列ではなく並行に走ることを確認します（オフライン）。
+    """
+    import threading
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import memo_bypass
+
+    def _create(**_kwargs: object) -> object:
+        raise ValueError("batch failed")
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=_create))
+    )
+    monkeypatch.setattr(ls, "openai_client", lambda: fake)
+    # 日本語コメント: 2シーンが同時に待ち合わせられなければタイムアウトで失敗する
+    barrier = threading.Barrier(2, timeout=5)
+
+    def _single(text: str, style_hint: str | None = None) -> str:
+        barrier.wait()
+        return f"single:{text}"
+
+    monkeypatch.setattr(ls, "build_image_prompt", _single)
+
+    with memo_bypass():
+        prompts = ls.build_image_prompts_batch(_specs("A", "B"), "水彩")
+
+    assert prompts == ["single:A", "single:B"]
+
+
+def test_build_voice_scripts_batch_fallback_runs_in_parallel(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    テスト概要: セリフの一括生成が失敗した場合、シーンごとの呼び出しが並行に走ることを確認します（オフライン）。
+    """
+    import threading
+    from types import SimpleNamespace
+
+    from app.services import llm_service as ls
+    from app.utils.memo import memo_bypass
+
+    def _create(**_kwargs: object) -> object:
+        raise ValueError("batch failed")
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=_create))
+    )
+    monkeypatch.setattr(ls, "openai_client", lambda: fake)
+    # 日本語コメント: 2シーンが同時に待ち合わせられなければタイムアウトで失敗する
+    barrier = threading.Barrier(2, timeout=5)
+
+    def _single(text: str, voice_hint: str | None = None) -> str:
+        barrier.wait()
+        return f"{text}のセリフ。"
+
+    monkeypatch.setattr(ls, "build_voice_script", _single)
+
+    with memo_bypass():
+        scripts = ls.build_voice_scripts_batch(_specs("夜", "朝"))
+
+    assert scripts == ["夜のセリフ。", "朝のセリフ。"]
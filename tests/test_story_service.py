@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from pathlib import Path
+from typing import cast
 from urllib.parse import urlparse, unquote
 
 import pytest
@@ -9,6 +11,7 @@ import pytest
 from app.services.story_service import StoryGenerationOptions, generate_from_story
 from app.pipelines.compose_video import SceneMedia
 from app.services.llm_service import SceneSpec
+from tests.conftest import FakeSegmentEncoder
 
 
 def require_openai_key() -> None:
@@ -19,6 +22,17 @@ def require_openai_key() -> None:
         pytest.skip("AAP_OPENAI_API_KEY が未設定のためスキップ")
 
 
+@pytest.fixture(autouse=True)
+def _isolated_outputs(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """日本語コメント: ジョブのマニフェストやシーン/動画の出力をテストごとの一時ディレクトリへ向ける。"""
+    from app.pipelines import compose_video
+    from app.services import job_manifest
+    from app.services import story_service as ss
+
+    for module in (job_manifest, ss, compose_video):
+        monkeypatch.setattr(module, "outputs_root", lambda: tmp_path)
+
+
 def _path_from_file_url(url: str) -> Path:
     """
     日本語コメント: file:// URL からローカルパスを取得するユーティリティ。
@@ -109,7 +123,7 @@ def test_generate_from_story_reference_images(
         },
     ]
 
-    def _fake_split_scenes(_story: str, _max: int | None) -> list[SceneSpec]:
+    def _fake_split_scenes(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
         return scenes
 
     def _fake_decide_style_hint(_story: str) -> str:
@@ -135,6 +149,7 @@ def test_generate_from_story_reference_images(
         size: str | None = None,
         base_images: list[bytes] | None = None,
         scene_images: list[bytes] | None = None,
+        anchor_image: bytes | None = None,
     ) -> bytes:
         captured_images.append(
             (
@@ -161,23 +176,11 @@ def test_generate_from_story_reference_images(
     local_file = tmp_path / "ref_local.png"
     local_file.write_bytes(b"local-bytes")
 
-    class _DummyResponse:
-        def __init__(self, data: bytes) -> None:
-            self._data = data
-
-        def read(self) -> bytes:
-            return self._data
-
-        def __enter__(self) -> "_DummyResponse":
-            return self
+    def _fake_fetch_reference_images(urls: list[str]) -> list[bytes]:
+        assert urls == ["https://example.com/ref.png"]
+        return [b"http-bytes"]
 
-        def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
-            return False
-
-    def _fake_urlopen(_req: object) -> _DummyResponse:  # type: ignore[override]
-        return _DummyResponse(b"http-bytes")
-
-    monkeypatch.setattr(ss, "urlopen", _fake_urlopen)
+    monkeypatch.setattr(ss, "fetch_reference_images", _fake_fetch_reference_images)
 
     options = StoryGenerationOptions(
         reference_images=(b"ref-a",),
@@ -200,3 +203,485 @@ def test_generate_from_story_reference_images(
     assert first_scene == []
     assert second_base == [b"ref-a", b"local-bytes", b"http-bytes"]
     assert second_scene == [generated_payloads[0]]
+
+
+def _fixed_style(_story: str) -> str:
+    return "スタイル"
+
+
+def _no_references(_opts: StoryGenerationOptions) -> list[bytes]:
+    return []
+
+
+def _identity(data: bytes) -> bytes:
+    return data
+
+
+def _patch_story_services(monkeypatch: pytest.MonkeyPatch, scene_count: int) -> None:
+    """日本語コメント: LLM/画像/TTS をオフラインのフェイクに差し替える。"""
+    from app.services import story_service as ss
+
+    scenes: list[SceneSpec] = [
+        {
+            "text": f"シーン{i}",
+            "image_hint": "",
+            "voice_hint": "",
+            "voice_script": f"セリフ{i}",
+            "sfx_hint": "",
+        }
+        for i in range(1, scene_count + 1)
+    ]
+
+    def _fake_split(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
+        return scenes
+
+    def _fake_prompt(text: str, style_hint: str | None = None) -> str:
+        return f"prompt:{text}"
+
+    def _fake_encode(text: str, **_kw: object) -> bytes:
+        return text.encode("utf-8")
+
+    monkeypatch.setattr(ss, "split_scenes", _fake_split)
+    monkeypatch.setattr(ss, "decide_style_hint", _fixed_style)
+    monkeypatch.setattr(ss, "build_image_prompt", _fake_prompt)
+    monkeypatch.setattr(ss, "generate_image", _fake_encode)
+    monkeypatch.setattr(ss, "generate_tts", _fake_encode)
+
+
+def test_generate_from_story_streaming_compose(
+    monkeypatch: pytest.MonkeyPatch, fake_segment_encoder: FakeSegmentEncoder
+) -> None:
+    """ストリーミング合成時、各シーンがエンコーダへ渡され番号順に連結されることを確認する。"""
+    _patch_story_services(monkeypatch, scene_count=3)
+
+    result = generate_from_story(
+        "テスト物語",
+        options=StoryGenerationOptions(streaming_compose=True),
+    )
+
+    assert result[3] == "file://concat"
+    assert sorted(fake_segment_encoder.encoded) == [
+        f"prompt:シーン{i}".encode() for i in (1, 2, 3)
+    ]
+    assert fake_segment_encoder.concatenated == [
+        [f"/tmp/prompt:シーン{i}.mp4" for i in (1, 2, 3)]
+    ]
+
+
+def test_generate_from_story_async_keeps_scene_chain(monkeypatch: pytest.MonkeyPatch) -> None:
+    """非同期版でもシーン順の結果と直近シーン画像の参照が維持されることを確認する。"""
+    from app.services import story_service as ss
+
+    scenes: list[SceneSpec] = [
+        {
+            "text": f"シーン{i}",
+            "image_hint": "",
+            "voice_hint": "",
+            "voice_script": "",
+            "sfx_hint": "",
+        }
+        for i in (1, 2, 3)
+    ]
+
+    async def _fake_split(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
+        return scenes
+
+    async def _fake_style(_story: str) -> str:
+        return "スタイル"
+
+    async def _fake_prompt(text: str, style_hint: str | None = None) -> str:
+        return f"prompt:{text}"
+
+    async def _fake_voice(text: str, _hint: str | None = None) -> str:
+        return f"voice:{text}"
+
+    captured_scene_images: list[list[bytes]] = []
+
+    async def _fake_image(prompt: str, **kw: object) -> bytes:
+        captured_scene_images.append(list(kw["scene_images"]))  # type: ignore[arg-type]
+        return prompt.encode("utf-8")
+
+    async def _fake_tts(text: str, **_kw: object) -> bytes:
+        return text.encode("utf-8")
+
+    composed: list[SceneMedia] = []
+
+    async def _fake_compose(media: SceneMedia) -> dict[str, str]:
+        composed.append(media)
+        return {"video_url": "file://video", "video_path": "/tmp/video.mp4", "video_gcs": ""}
+
+    monkeypatch.setattr(ss, "split_scenes_async", _fake_split)
+    monkeypatch.setattr(ss, "decide_style_hint_async", _fake_style)
+    monkeypatch.setattr(ss, "build_image_prompt_async", _fake_prompt)
+    monkeypatch.setattr(ss, "build_voice_script_async", _fake_voice)
+    monkeypatch.setattr(ss, "generate_image_async", _fake_image)
+    monkeypatch.setattr(ss, "generate_tts_async", _fake_tts)
+    monkeypatch.setattr(ss, "compose_scene_video_async", _fake_compose)
+
+    result = asyncio.run(
+        ss.generate_from_story_async(
+            "テスト物語", options=StoryGenerationOptions(streaming_compose=False)
+        )
+    )
+
+    assert result[0] == "prompt:シーン1"
+    assert result[3] == "file://video"
+    img1, img2 = "prompt:シーン1".encode(), "prompt:シーン2".encode()
+    assert captured_scene_images == [[], [img1], [img1, img2]]
+    assert composed[0].audio == [f"voice:シーン{i}".encode() for i in (1, 2, 3)]
+
+
+def test_generate_from_story_async_writes_checkpoints_off_the_event_loop(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """非同期版ではマニフェストの作成・記録・完了をイベントループ以外のスレッドで行うことを確認する。"""
+    import threading
+
+    from app.services import job_manifest
+    from app.services import story_service as ss
+
+    scenes: list[SceneSpec] = [
+        {"text": "シーン1", "image_hint": "", "voice_hint": "", "voice_script": "セリフ", "sfx_hint": ""}
+    ]
+
+    async def _fake_split(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
+        return scenes
+
+    async def _fake_style(_story: str) -> str:
+        return "スタイル"
+
+    async def _fake_prompt(text: str, style_hint: str | None = None) -> str:
+        return f"prompt:{text}"
+
+    async def _fake_image(prompt: str, **_kw: object) -> bytes:
+        return prompt.encode("utf-8")
+
+    async def _fake_tts(text: str, **_kw: object) -> bytes:
+        return text.encode("utf-8")
+
+    async def _fake_compose(_media: SceneMedia) -> dict[str, str]:
+        return {"video_url": "file://video", "video_path": "/tmp/video.mp4", "video_gcs": ""}
+
+    monkeypatch.setattr(ss, "split_scenes_async", _fake_split)
+    monkeypatch.setattr(ss, "decide_style_hint_async", _fake_style)
+    monkeypatch.setattr(ss, "build_image_prompt_async", _fake_prompt)
+    monkeypatch.setattr(ss, "generate_image_async", _fake_image)
+    monkeypatch.setattr(ss, "generate_tts_async", _fake_tts)
+    monkeypatch.setattr(ss, "compose_scene_video_async", _fake_compose)
+
+    writer_threads: set[int] = set()
+    original_save = job_manifest.JobManifest._save_locked
+
+    def _tracking_save(self: job_manifest.JobManifest) -> None:
+        writer_threads.add(threading.get_ident())
+        original_save(self)
+
+    monkeypatch.setattr(job_manifest.JobManifest, "_save_locked", _tracking_save)
+
+    async def _run() -> int:
+        await ss.generate_from_story_async(
+            "テスト物語",
+            options=StoryGenerationOptions(job_id="job-async-io", streaming_compose=False, batch_llm=False),
+        )
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(_run())
+
+    assert writer_threads
+    assert loop_thread not in writer_threads
+
+
+def test_plan_story_overlaps_steps_under_one_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """計画フェーズの3処理が並行に走り、締め切りに間に合わない処理は既定値になることを確認する。"""
+    import dataclasses
+    import threading
+
+    from app.services import story_service as ss
+    from app.services.llm_service import DEFAULT_STYLE_HINT
+
+    # 日本語コメント: 参照画像の取得とシーン分割が同時に走らないとバリアを通過できない
+    barrier = threading.Barrier(2, timeout=2)
+    release_style = threading.Event()
+    scenes: list[SceneSpec] = [
+        {"text": "シーン1", "image_hint": "", "voice_hint": "", "voice_script": "", "sfx_hint": ""}
+    ]
+
+    def _fake_refs(_opts: StoryGenerationOptions) -> list[bytes]:
+        barrier.wait()
+        return [b"ref"]
+
+    def _fake_split(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
+        barrier.wait()
+        return scenes
+
+    def _slow_style(_story: str) -> str:
+        release_style.wait(5)
+        return "遅いスタイル"
+
+    settings = dataclasses.replace(ss.get_settings(), planning_timeout_sec=0.5)
+    monkeypatch.setattr(ss, "get_settings", lambda: settings)
+    monkeypatch.setattr(ss, "_collect_reference_images", _fake_refs)
+    monkeypatch.setattr(ss, "split_scenes", _fake_split)
+    monkeypatch.setattr(ss, "decide_style_hint", _slow_style)
+
+    try:
+        refs, specs, style = ss._plan_story(
+            "テスト物語", 9999, StoryGenerationOptions(fused_planning=False)
+        )
+    finally:
+        release_style.set()
+
+    assert refs == [b"ref"]
+    assert specs == scenes
+    assert style == DEFAULT_STYLE_HINT
+
+
+def test_plan_story_warns_when_references_miss_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """参照画像の取得が締め切りに間に合わない場合、黙って捨てずに警告を出すことを確認する。"""
+    import dataclasses
+    import threading
+
+    from app.services import story_service as ss
+
+    release_refs = threading.Event()
+    scenes: list[SceneSpec] = [
+        {"text": "シーン1", "image_hint": "", "voice_hint": "", "voice_script": "", "sfx_hint": ""}
+    ]
+
+    def _slow_refs(_opts: StoryGenerationOptions) -> list[bytes]:
+        release_refs.wait(5)
+        return [b"ref"]
+
+    def _fake_split(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
+        return scenes
+
+    def _fake_style(_story: str) -> str:
+        return "スタイル"
+
+    settings = dataclasses.replace(ss.get_settings(), planning_timeout_sec=0.2)
+    monkeypatch.setattr(ss, "get_settings", lambda: settings)
+    monkeypatch.setattr(ss, "_collect_reference_images", _slow_refs)
+    monkeypatch.setattr(ss, "split_scenes", _fake_split)
+    monkeypatch.setattr(ss, "decide_style_hint", _fake_style)
+
+    try:
+        with pytest.warns(RuntimeWarning, match="reference images"):
+            refs, specs, _style = ss._plan_story(
+                "テスト物語", 9999, StoryGenerationOptions(fused_planning=False)
+            )
+    finally:
+        release_refs.set()
+
+    assert refs == []
+    assert specs == scenes
+
+
+def test_plan_story_raises_when_scene_split_misses_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """シーン分割が締め切りに間に合わない場合は単一シーンで代替せず TimeoutError になることを確認する。"""
+    import dataclasses
+    import threading
+
+    from app.services import story_service as ss
+
+    release_split = threading.Event()
+
+    def _slow_split(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
+        release_split.wait(5)
+        return []
+
+    settings = dataclasses.replace(ss.get_settings(), planning_timeout_sec=0.2)
+    monkeypatch.setattr(ss, "get_settings", lambda: settings)
+    monkeypatch.setattr(ss, "_collect_reference_images", _no_references)
+    monkeypatch.setattr(ss, "split_scenes", _slow_split)
+    monkeypatch.setattr(ss, "decide_style_hint", _fixed_style)
+
+    try:
+        with pytest.raises(TimeoutError, match="scenes"):
+            ss._plan_story("テスト物語", 9999, StoryGenerationOptions(fused_planning=False))
+    finally:
+        release_split.set()
+
+
+def test_plan_story_async_cancels_unfinished_scene_split(monkeypatch: pytest.MonkeyPatch) -> None:
+    """非同期版でも締め切り超過時にシーン分割タスクを取り消し、TimeoutError を送出することを確認する。"""
+    import dataclasses
+
+    from app.services import story_service as ss
+
+    cancelled: list[bool] = []
+
+    async def _slow_plan(_story: str, max_scenes: int | None = None) -> tuple[list[SceneSpec], str]:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return [], ""
+
+    settings = dataclasses.replace(ss.get_settings(), planning_timeout_sec=0.2)
+    monkeypatch.setattr(ss, "get_settings", lambda: settings)
+    monkeypatch.setattr(ss, "_collect_reference_images", _no_references)
+    monkeypatch.setattr(ss, "plan_story_async", _slow_plan)
+
+    async def _run() -> None:
+        with pytest.raises(TimeoutError, match="plan"):
+            await ss._plan_story_async("テスト物語", 9999, StoryGenerationOptions(fused_planning=True))
+        await asyncio.sleep(0)
+
+    asyncio.run(_run())
+    assert cancelled == [True]
+
+
+def test_generate_from_story_anchor_mode_renders_scenes_in_parallel(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """アンカーモードでは全シーンがアンカー画像のみを参照し、並列に生成されることを確認する。"""
+    import threading
+
+    from app.services import story_service as ss
+
+    _patch_story_services(monkeypatch, scene_count=3)
+
+    # 日本語コメント: 3シーンの画像生成が同時に走らないとバリアを通過できない
+    barrier = threading.Barrier(3, timeout=2)
+    calls: list[tuple[str, list[bytes], bytes | None]] = []
+    hints: list[str] = []
+
+    def _fake_prompt(text: str, style_hint: str | None = None) -> str:
+        hints.append(style_hint or "")
+        return f"prompt:{text}"
+
+    def _fake_image(
+        prompt: str,
+        *,
+        scene_images: list[bytes],
+        anchor_image: bytes | None = None,
+        **_kw: object,
+    ) -> bytes:
+        calls.append((prompt, list(scene_images), anchor_image))
+        if prompt.startswith("prompt:"):
+            barrier.wait()
+            return prompt.encode("utf-8")
+        return b"anchor"
+
+    def _fake_compose(_media: object) -> dict[str, str]:
+        return {"video_url": "file://video", "video_path": "", "video_gcs": ""}
+
+    monkeypatch.setattr(ss, "build_image_prompt", _fake_prompt)
+    monkeypatch.setattr(ss, "generate_image", _fake_image)
+    monkeypatch.setattr(ss, "compose_scene_video", _fake_compose)
+
+    ss.generate_from_story(
+        "テスト物語",
+        options=StoryGenerationOptions(
+            consistency_mode="anchor", max_workers=4, streaming_compose=False, batch_llm=False
+        ),
+    )
+
+    anchor_prompt, anchor_refs, anchor_ref = calls[0]
+    assert "reference sheet" in anchor_prompt
+    assert anchor_refs == [] and anchor_ref is None
+    # 日本語コメント: アンカーは直近シーン画像ではなくキャラクターシートとして渡す
+    assert sorted(calls[1:]) == [(f"prompt:シーン{i}", [], b"anchor") for i in (1, 2, 3)]
+    # 日本語コメント: 前のシーンを参照しないため「前のシーンと同一」の指示は付かない
+    assert len(hints) == 3
+    assert all("前のシーン" not in h for h in hints)
+
+
+def test_resume_story_regenerates_only_missing_assets(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """失敗したジョブを再開すると、マニフェストに記録済みのアセットは再生成されないことを確認する。"""
+    import json
+
+    from app.services import story_service as ss
+
+    _patch_story_services(monkeypatch, scene_count=3)
+
+    image_calls: list[str] = []
+    prompt_calls: list[str] = []
+    fail_scene3 = True
+
+    def _fake_scene_image(prompt: str, **_kw: object) -> bytes:
+        image_calls.append(prompt)
+        if fail_scene3 and prompt.endswith("シーン3"):
+            raise RuntimeError("provider down")
+        return prompt.encode("utf-8")
+
+    def _fake_prompt(text: str, style_hint: str | None = None) -> str:
+        prompt_calls.append(text)
+        return f"prompt:{text}"
+
+    composed: list[SceneMedia] = []
+
+    def _fake_compose(media: SceneMedia) -> dict[str, str]:
+        composed.append(media)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"mp4")
+        return {"video_url": video.as_uri(), "video_path": str(video), "video_gcs": ""}
+
+    monkeypatch.setattr(ss, "_generate_scene_image", _fake_scene_image)
+    monkeypatch.setattr(ss, "build_image_prompt", _fake_prompt)
+    monkeypatch.setattr(ss, "compose_scene_video", _fake_compose)
+
+    opts = StoryGenerationOptions(job_id="job-resume-test", streaming_compose=False, batch_llm=False)
+    with pytest.raises(RuntimeError, match="provider down"):
+        generate_from_story("テスト物語", options=opts)
+
+    manifest = json.loads((tmp_path / "job-resume-test" / "manifest.json").read_text("utf-8"))
+    assert manifest["status"] == "failed"
+    assert manifest["scenes"]["1"]["image"] == "scenes/0001/image.png"
+    assert "image" not in manifest["scenes"]["3"]
+
+    fail_scene3 = False
+    image_calls.clear()
+    prompt_calls.clear()
+    result = ss.resume_story("job-resume-test")
+
+    assert image_calls == ["prompt:シーン3"]
+    assert prompt_calls == []
+    assert composed[-1].image == [f"prompt:シーン{i}".encode() for i in (1, 2, 3)]
+    assert result[3] == (tmp_path / "video.mp4").as_uri()
+    # 日本語コメント: 完了済みジョブの再開は保存済みの結果をそのまま返す
+    assert ss.resume_story("job-resume-test") == result
+    assert len(composed) == 1
+
+
+def test_resume_story_after_planning_failure_keeps_references(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """計画フェーズで失敗したジョブを再開しても、開始時の参照画像で計画し直すことを確認する。"""
+    from app.services import story_service as ss
+
+    _patch_story_services(monkeypatch, scene_count=1)
+
+    def _failing_split(_story: str, max_scenes: int | None = None) -> list[SceneSpec]:
+        raise RuntimeError("split failed")
+
+    base_images: list[list[bytes]] = []
+
+    def _fake_image(prompt: str, **kw: object) -> bytes:
+        base_images.append(list(cast(list[bytes], kw.get("base_images") or [])))
+        return prompt.encode("utf-8")
+
+    def _fake_compose(media: SceneMedia) -> dict[str, str]:
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"mp4")
+        return {"video_url": video.as_uri(), "video_path": str(video), "video_gcs": ""}
+
+    monkeypatch.setattr(ss, "normalize_reference_image", _identity)
+    monkeypatch.setattr(ss, "generate_image", _fake_image)
+    monkeypatch.setattr(ss, "compose_scene_video", _fake_compose)
+    monkeypatch.setattr(ss, "split_scenes", _failing_split)
+
+    opts = StoryGenerationOptions(
+        reference_images=[b"REF"], job_id="job-plan-fail", streaming_compose=False, batch_llm=False
+    )
+    with pytest.raises(RuntimeError, match="split failed"):
+        generate_from_story("テスト物語", options=opts)
+
+    _patch_story_services(monkeypatch, scene_count=1)
+    monkeypatch.setattr(ss, "generate_image", _fake_image)
+    ss.resume_story("job-plan-fail")
+
+    assert base_images == [[b"REF"]]